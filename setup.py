@@ -37,8 +37,10 @@ setup(
     name='simpleTR64',
     version=version,
     packages=['simpletr64', 'simpletr64.actions', 'tests'],
+    package_data={'tests': ['data/*.xml', 'data/*.txt']},
     scripts=glob('bin/**'),
-    install_requires=['requests>=2.8.1'],
+    install_requires=['requests>=2.8.1', 'futures>=3.0; python_version < "3"'],
+    extras_require={'async': ['aiohttp>=3.0'], 'lxml': ['lxml>=3.3'], 'numpy': ['numpy']},
     url='http://bpannier.github.io/simpletr64/',
     license='Apache 2.0',
     author='Benjamin Pannier',
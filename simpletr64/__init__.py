@@ -7,12 +7,25 @@ Simple TR64-UPnP library
 
 """
 from .devicetr64 import DeviceTR64
-from .discover import Discover, DiscoveryResponse
+from .discover import Discover, DiscoveryResponse, DiscoveryStatistics
+from .xmlparser import XMLBackend
+from .cache import DefinitionCache
+from .signature import ActionSignature
+from .services import ServiceProxies, ServiceProxy, ActionProxy
+from .statistics import CounterTracker, RingBuffer
 from .actions.lan import Lan, HostDetails, EthernetInfo, EthernetStatistic
 from .actions.system import System, SystemInfo, TimeInfo
-from .actions.wan import Wan, WanLinkInfo, WanLinkProperties, ConnectionInfo, ADSLInfo
+from .actions.wan import Wan, WanLinkInfo, WanLinkProperties, WanStatistic, ConnectionInfo, ADSLInfo
 from .actions.wifi import Wifi, WifiDeviceInfo, WifiBasicInfo
 
+try:
+    # the asyncio classes need Python 3.5+ and aiohttp, the discovery only Python 3.5+
+    from .asyncdiscover import DiscoveryStream
+    from .asyncdevicetr64 import AsyncDeviceTR64
+    from .actions.asyncactions import AsyncLan, AsyncWan, AsyncWifi, AsyncSystem, AsyncFritz
+except (ImportError, SyntaxError):
+    pass
+
 __title__ = 'simpletr64'
 __version__ = '1.0.6'
 __author__ = 'Benjamin Pannier'
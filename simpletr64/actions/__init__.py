@@ -8,6 +8,12 @@ TR 64 specific actions
 """
 from .lan import Lan, HostDetails, EthernetInfo, EthernetStatistic
 from .system import System, SystemInfo, TimeInfo
-from .wan import Wan, WanLinkInfo, WanLinkProperties, ConnectionInfo, ADSLInfo
+from .wan import Wan, WanLinkInfo, WanLinkProperties, WanStatistic, ConnectionInfo, ADSLInfo
 from .wifi import Wifi, WifiDeviceInfo, WifiBasicInfo
 from .fritz import Fritz
+
+try:
+    # the asyncio classes need Python 3.5+ and aiohttp
+    from .asyncactions import AsyncLan, AsyncWan, AsyncWifi, AsyncSystem, AsyncFritz
+except (ImportError, SyntaxError):
+    pass
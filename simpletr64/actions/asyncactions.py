@@ -0,0 +1,176 @@
+import asyncio
+
+from simpletr64.asyncdevicetr64 import AsyncDeviceTR64
+from simpletr64.actions.fritz import Fritz
+from simpletr64.actions.lan import Lan, HostDetails
+from simpletr64.actions.system import System
+from simpletr64.actions.wan import Wan
+from simpletr64.actions.wifi import Wifi
+
+
+class AsyncLan(AsyncDeviceTR64, Lan):
+    """The asyncio variant of :class:`~simpletr64.actions.Lan`, all actions are coroutines.
+
+    The actions are shared with :class:`~simpletr64.actions.Lan`, only the requests are sent over the event loop.
+    :meth:`~simpletr64.actions.AsyncLan.iterHosts` is an asynchronous iterator.
+
+    .. seealso::
+
+        Baseclass: :class:`~simpletr64.AsyncDeviceTR64`, :class:`~simpletr64.actions.Lan`
+    """
+
+    def iterHosts(self, lanInterfaceId=1, timeout=1, concurrency=None):
+        """Iterate over the details of all known hosts while they are loaded, see
+        :meth:`~simpletr64.actions.Lan.iterHosts`.
+
+        Example:
+
+        ::
+
+            async for host in lan.iterHosts(concurrency=8):
+                print(host.ipaddress)
+
+        :param int lanInterfaceId: the id of the LAN interface
+        :param float timeout: the timeout to wait for each action to be executed
+        :param int concurrency: the maximum amount of actions which are executed at the same time, by default the
+            :meth:`~simpletr64.DeviceTR64.poolSize`
+        :return: an asynchronous iterator of the details of the hosts, it can be closed to stop early
+        :rtype: collections.AsyncIterator[HostDetails]
+        :raises ValueError: if the concurrency is not a positive number, the iteration raises it if a host can not be
+            loaded
+        """
+        if concurrency is None:
+            concurrency = self.poolSize
+
+        if concurrency < 1:
+            raise ValueError("The concurrency needs to be at least 1.")
+
+        return _HostIterator(self, lanInterfaceId, timeout, concurrency)
+
+
+class _HostIterator(object):
+    """Internal asynchronous iterator of :meth:`~simpletr64.actions.AsyncLan.iterHosts`.
+
+    :type __lan: AsyncLan
+    :type __pending: dict[asyncio.Future, int]
+    :type __hosts: list[HostDetails]
+    """
+
+    def __init__(self, lan, lanInterfaceId, timeout, concurrency):
+        self.__lan = lan
+        self.__lanInterfaceId = lanInterfaceId
+        self.__timeout = timeout
+        self.__concurrency = concurrency
+        self.__namespace = Lan.getServiceType("iterHosts") + str(lanInterfaceId)
+        self.__uri = lan.getControlURL(self.__namespace)
+        self.__amount = None
+        self.__nextIndex = 0
+        self.__pending = {}
+        self.__hosts = []
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        lan = self.__lan
+
+        if self.__amount is None:
+            self.__amount = await lan.getAmountOfHostsConnected(self.__lanInterfaceId, timeout=self.__timeout)
+
+        while not self.__hosts:
+            # keep up to concurrency actions running, stop early if the table has shrunk
+            while self.__nextIndex < self.__amount and len(self.__pending) < self.__concurrency:
+                future = asyncio.ensure_future(lan.execute(self.__uri, self.__namespace, "GetGenericHostEntry",
+                                                           timeout=self.__timeout, NewIndex=self.__nextIndex))
+                self.__pending[future] = self.__nextIndex
+                self.__nextIndex += 1
+
+            if not self.__pending:
+                raise StopAsyncIteration
+
+            done = (await asyncio.wait(list(self.__pending.keys()), return_when=asyncio.FIRST_COMPLETED))[0]
+
+            for future in done:
+                index = self.__pending.pop(future)
+
+                try:
+                    results = future.result()
+                except ValueError:
+                    if index >= self.__amount:
+                        # the table is known to be shorter already
+                        continue
+
+                    # the index is only allowed to fail if the host has been removed in the meantime
+                    self.__amount = min(self.__amount, await lan.getAmountOfHostsConnected(
+                        self.__lanInterfaceId, timeout=self.__timeout))
+                    if index < self.__amount:
+                        self.close()
+                        raise
+
+                    continue
+
+                self.__hosts.append(HostDetails(results))
+
+        return self.__hosts.pop(0)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, excType, excValue, traceback):
+        self.close()
+
+    def close(self):
+        """Cancel the actions which are still running, the iteration ends after the hosts loaded already."""
+        for future in self.__pending.keys():
+            if future.done() and not future.cancelled():
+                # do not leave the error of a finished action unretrieved
+                future.exception()
+            else:
+                future.cancel()
+
+        self.__pending = {}
+        self.__amount = 0
+
+
+class AsyncWan(AsyncDeviceTR64, Wan):
+    """The asyncio variant of :class:`~simpletr64.actions.Wan`, all actions are coroutines.
+
+    The actions are shared with :class:`~simpletr64.actions.Wan`, only the requests are sent over the event loop.
+
+    .. seealso::
+
+        Baseclass: :class:`~simpletr64.AsyncDeviceTR64`, :class:`~simpletr64.actions.Wan`
+    """
+
+
+class AsyncWifi(AsyncDeviceTR64, Wifi):
+    """The asyncio variant of :class:`~simpletr64.actions.Wifi`, all actions are coroutines.
+
+    The actions are shared with :class:`~simpletr64.actions.Wifi`, only the requests are sent over the event loop.
+
+    .. seealso::
+
+        Baseclass: :class:`~simpletr64.AsyncDeviceTR64`, :class:`~simpletr64.actions.Wifi`
+    """
+
+
+class AsyncSystem(AsyncDeviceTR64, System):
+    """The asyncio variant of :class:`~simpletr64.actions.System`, all actions are coroutines.
+
+    The actions are shared with :class:`~simpletr64.actions.System`, only the requests are sent over the event loop.
+
+    .. seealso::
+
+        Baseclass: :class:`~simpletr64.AsyncDeviceTR64`, :class:`~simpletr64.actions.System`
+    """
+
+
+class AsyncFritz(AsyncDeviceTR64, Fritz):
+    """The asyncio variant of :class:`~simpletr64.actions.Fritz`, all actions are coroutines.
+
+    The actions are shared with :class:`~simpletr64.actions.Fritz`, only the requests are sent over the event loop.
+
+    .. seealso::
+
+        Baseclass: :class:`~simpletr64.AsyncDeviceTR64`, :class:`~simpletr64.actions.Fritz`
+    """
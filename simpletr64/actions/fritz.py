@@ -1,6 +1,4 @@
-from simpletr64.devicetr64 import DeviceTR64
-import xml.etree.ElementTree as ET
-import requests
+from simpletr64.devicetr64 import DeviceTR64, _actionSteps, _Execute, _Download
 
 try:
     # noinspection PyCompatibility
@@ -88,6 +86,7 @@ class Fritz(DeviceTR64):
             return Fritz.serviceTypeLookup[method]
         return None
 
+    @_actionSteps
     def sendWakeOnLan(self, macAddress, lanInterfaceId=1, timeout=1):
         """Send a wake up package to a device specified by its MAC address.
 
@@ -103,9 +102,10 @@ class Fritz(DeviceTR64):
         namespace = Fritz.getServiceType("sendWakeOnLan") + str(lanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        self.execute(uri, namespace, "X_AVM-DE_WakeOnLANByMACAddress", timeout=timeout,
-                     NewMACAddress=macAddress)
+        yield _Execute(uri, namespace, "X_AVM-DE_WakeOnLANByMACAddress", timeout=timeout,
+                       NewMACAddress=macAddress)
 
+    @_actionSteps
     def doUpdate(self, timeout=1):
         """Do a software update of the Fritz Box if available.
 
@@ -116,10 +116,11 @@ class Fritz(DeviceTR64):
         namespace = Fritz.getServiceType("doUpdate")
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "X_AVM-DE_DoUpdate", timeout=timeout)
+        results = yield _Execute(uri, namespace, "X_AVM-DE_DoUpdate", timeout=timeout)
 
-        return results["NewUpgradeAvailable"], results["NewX_AVM-DE_UpdateState"]
+        yield results["NewUpgradeAvailable"], results["NewX_AVM-DE_UpdateState"]
 
+    @_actionSteps
     def isOptimizedForIPTV(self, wifiInterfaceId=1, timeout=1):
         """Return if the Wifi interface is optimized for IP TV
 
@@ -133,10 +134,11 @@ class Fritz(DeviceTR64):
         namespace = Fritz.getServiceType("isOptimizedForIPTV") + str(wifiInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "X_AVM-DE_GetIPTVOptimized", timeout=timeout)
+        results = yield _Execute(uri, namespace, "X_AVM-DE_GetIPTVOptimized", timeout=timeout)
 
-        return bool(int(results["NewX_AVM-DE_IPTVoptimize"]))
+        yield bool(int(results["NewX_AVM-DE_IPTVoptimize"]))
 
+    @_actionSteps
     def setOptimizedForIPTV(self, status, wifiInterfaceId=1, timeout=1):
         """Set if the Wifi interface is optimized for IP TV
 
@@ -156,8 +158,9 @@ class Fritz(DeviceTR64):
 
         arguments = {"timeout": timeout, "NewX_AVM-DE_IPTVoptimize": setStatus}
 
-        self.execute(uri, namespace, "X_AVM-DE_SetIPTVOptimized", **arguments)
+        yield _Execute(uri, namespace, "X_AVM-DE_SetIPTVOptimized", **arguments)
 
+    @_actionSteps
     def getCallList(self, timeout=1):
         """Get the list of phone calls made
 
@@ -182,38 +185,37 @@ class Fritz(DeviceTR64):
         namespace = Fritz.getServiceType("getCallList")
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetCallList")
+        results = yield _Execute(uri, namespace, "GetCallList", timeout=timeout)
 
-        # setup proxies
-        proxies = {}
-        if self.httpProxy:
-            proxies = {"https": self.httpProxy}
+        # the call list can be large, parse it while it gets downloaded
+        calls = yield _Download(results["NewCallListURL"], timeout, "call list", Fritz._parseCallList)
 
-        if self.httpsProxy:
-            proxies = {"http": self.httpsProxy}
+        yield calls
 
-        # get the content
-        request = requests.get(results["NewCallListURL"], proxies=proxies, timeout=float(timeout))
-
-        if request.status_code != 200:
-            errorStr = DeviceTR64._extractErrorString(request)
-            raise ValueError('Could not get CPE definitions "' + results["NewCallListURL"] + '" : ' +
-                             str(request.status_code) + ' - ' + request.reason + " -- " + errorStr)
+    @staticmethod
+    def _parseCallList(url, data):
+        """Internal method to parse the call list XML.
 
+        :param str url: the URL the call list has been loaded from
+        :param data: the content of the call list, see :meth:`~simpletr64.DeviceTR64._parseXML`
+        :type data: bytes or collections.Iterable[bytes]
+        :return: the list of made phone calls
+        :rtype: list[dict[str: str]]
+        """
         # parse xml
         try:
-            root = ET.fromstring(request.text.encode('utf-8'))
+            root = DeviceTR64._parseXML(data)
         except Exception as e:
-            raise ValueError("Could not parse call list '" + results["NewCallListURL"] + "': " + str(e))
+            raise ValueError("Could not parse call list '" + url + "': " + str(e))
 
         calls = []
 
-        for child in root.getchildren():
+        for child in root:
             if child.tag.lower() == "call":
 
                 callParameters = {}
 
-                for callChild in child.getchildren():
+                for callChild in child:
                     callParameters[callChild.tag] = callChild.text
 
                 calls.append(callParameters)
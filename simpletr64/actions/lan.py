@@ -1,4 +1,5 @@
-from simpletr64.devicetr64 import DeviceTR64
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from simpletr64.devicetr64 import DeviceTR64, _actionSteps, _Execute, _ExecuteMany, _Download
 import json
 
 try:
@@ -38,6 +39,8 @@ class Lan(DeviceTR64):
         "getAmountOfHostsConnected": "urn:dslforum-org:service:Hosts:",
         "getHostDetailsByIndex": "urn:dslforum-org:service:Hosts:",
         "getHostDetailsByMACAddress": "urn:dslforum-org:service:Hosts:",
+        "getAllHosts": "urn:dslforum-org:service:Hosts:",
+        "iterHosts": "urn:dslforum-org:service:Hosts:",
         "getEthernetInfo": "urn:dslforum-org:service:LANEthernetInterfaceConfig:",
         "getEthernetStatistic": "urn:dslforum-org:service:LANEthernetInterfaceConfig:",
         "setEnable": "urn:dslforum-org:service:LANEthernetInterfaceConfig:"
@@ -88,6 +91,7 @@ class Lan(DeviceTR64):
             return Lan.serviceTypeLookup[method]
         return None
 
+    @_actionSteps
     def getAmountOfHostsConnected(self, lanInterfaceId=1, timeout=1):
         """Execute NewHostNumberOfEntries action to get the amount of known hosts.
 
@@ -101,10 +105,11 @@ class Lan(DeviceTR64):
         namespace = Lan.getServiceType("getAmountOfHostsConnected") + str(lanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetHostNumberOfEntries", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetHostNumberOfEntries", timeout=timeout)
 
-        return int(results["NewHostNumberOfEntries"])
+        yield int(results["NewHostNumberOfEntries"])
 
+    @_actionSteps
     def getHostDetailsByIndex(self, index, lanInterfaceId=1, timeout=1):
         """Execute GetGenericHostEntry action to get detailed information's of a connected host.
 
@@ -119,10 +124,11 @@ class Lan(DeviceTR64):
         namespace = Lan.getServiceType("getHostDetailsByIndex") + str(lanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetGenericHostEntry", timeout=timeout, NewIndex=index)
+        results = yield _Execute(uri, namespace, "GetGenericHostEntry", timeout=timeout, NewIndex=index)
 
-        return HostDetails(results)
+        yield HostDetails(results)
 
+    @_actionSteps
     def getHostDetailsByMACAddress(self, macAddress, lanInterfaceId=1, timeout=1):
         """Get host details for a host specified by its MAC address.
 
@@ -136,10 +142,198 @@ class Lan(DeviceTR64):
         namespace = Lan.getServiceType("getHostDetailsByMACAddress") + str(lanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetSpecificHostEntry", timeout=timeout, NewMACAddress=macAddress)
+        results = yield _Execute(uri, namespace, "GetSpecificHostEntry", timeout=timeout, NewMACAddress=macAddress)
 
-        return HostDetails(results, macAddress=macAddress)
+        yield HostDetails(results, macAddress=macAddress)
 
+    @_actionSteps
+    def getAllHosts(self, lanInterfaceId=1, timeout=1, concurrency=None):
+        """Get the details of all known hosts.
+
+        AVM Fritz products provide the whole host table as one XML document with the action
+        ``X_AVM-DE_GetHostListPath``, the document gets parsed while it is downloaded. For all other devices the hosts
+        are loaded with one GetGenericHostEntry action per host, executed concurrently, hosts which have been removed
+        from the table in the meantime are skipped. Only a device which does not support the action, by its loaded
+        SCPD or by its answer, falls back to the single hosts; a host list which can not be downloaded or parsed raises
+        an error.
+
+        :param int lanInterfaceId: the id of the LAN interface
+        :param float timeout: the timeout to wait for each action to be executed
+        :param int concurrency: the maximum amount of GetGenericHostEntry actions which are executed at the same time if
+            the device has no host list, by default the :meth:`~simpletr64.DeviceTR64.poolSize`
+        :return: the details of all known hosts
+        :rtype: list[HostDetails]
+
+        .. seealso:: :meth:`~simpletr64.actions.Lan.getHostDetailsByIndex`
+        """
+        namespace = Lan.getServiceType("getAllHosts") + str(lanInterfaceId)
+        uri = self.getControlURL(namespace)
+
+        results = None
+
+        if self._isActionSupported(namespace, "X_AVM-DE_GetHostListPath"):
+            try:
+                results = yield _Execute(uri, namespace, "X_AVM-DE_GetHostListPath", timeout=timeout)
+            except ValueError as e:
+                if not DeviceTR64._isUnsupportedActionError(e):
+                    raise
+
+                # the device has no host list, get every single host
+                self._setActionUnsupported(namespace, "X_AVM-DE_GetHostListPath")
+
+        if results is not None:
+            hosts = yield _Download(Lan._getHostListURL(self, results), timeout, "host list", Lan._parseHostList)
+        else:
+            results = yield _Execute(uri, namespace, "GetHostNumberOfEntries", timeout=timeout)
+            amount = int(results["NewHostNumberOfEntries"])
+
+            allResults = yield _ExecuteMany([(uri, namespace, "GetGenericHostEntry", {"NewIndex": index})
+                                             for index in range(amount)], concurrency, timeout)
+
+            hosts = []
+            failures = []
+            for index, results in enumerate(allResults):
+                if isinstance(results, ValueError):
+                    failures.append((index, results))
+                elif isinstance(results, Exception):
+                    raise results
+                else:
+                    hosts.append(HostDetails(results))
+
+            if failures:
+                # an index is only allowed to fail if the host has been removed in the meantime
+                results = yield _Execute(uri, namespace, "GetHostNumberOfEntries", timeout=timeout)
+                amount = int(results["NewHostNumberOfEntries"])
+
+                for index, error in failures:
+                    if index < amount:
+                        raise error
+
+        yield hosts
+
+    def iterHosts(self, lanInterfaceId=1, timeout=1, concurrency=None):
+        """Iterate over the details of all known hosts while they are loaded.
+
+        The amount of hosts is asked once, then up to ``concurrency`` GetGenericHostEntry actions are executed at the
+        same time over the connection pool. Every host is returned as soon as its action has finished, so the hosts are
+        not in the order of their index. If the device removes hosts from its table during the iteration the hosts
+        which are gone are skipped.
+
+        Example:
+
+        ::
+
+            for host in lan.iterHosts(concurrency=8):
+                print(host.ipaddress)
+
+        :param int lanInterfaceId: the id of the LAN interface
+        :param float timeout: the timeout to wait for each action to be executed
+        :param int concurrency: the maximum amount of actions which are executed at the same time, by default the
+            :meth:`~simpletr64.DeviceTR64.poolSize`
+        :return: a generator of the details of the hosts
+        :rtype: collections.Iterable[HostDetails]
+        :raises ValueError: if the concurrency is not a positive number or a host can not be loaded
+
+        .. seealso:: :meth:`~simpletr64.actions.Lan.getAllHosts`
+        """
+        if concurrency is None:
+            concurrency = self.poolSize
+
+        if concurrency < 1:
+            raise ValueError("The concurrency needs to be at least 1.")
+
+        namespace = Lan.getServiceType("iterHosts") + str(lanInterfaceId)
+        uri = self.getControlURL(namespace)
+
+        amount = self.getAmountOfHostsConnected(lanInterfaceId, timeout=timeout)
+        nextIndex = 0
+        pending = {}
+
+        executor = ThreadPoolExecutor(max_workers=max(min(concurrency, amount), 1))
+        try:
+            while True:
+                # keep up to concurrency actions running, stop early if the table has shrunk
+                while nextIndex < amount and len(pending) < concurrency:
+                    future = executor.submit(self.execute, uri, namespace, "GetGenericHostEntry", timeout=timeout,
+                                             NewIndex=nextIndex)
+                    pending[future] = nextIndex
+                    nextIndex += 1
+
+                if not pending:
+                    break
+
+                done = wait(list(pending.keys()), return_when=FIRST_COMPLETED)[0]
+
+                for future in done:
+                    index = pending.pop(future)
+
+                    try:
+                        results = future.result()
+                    except ValueError:
+                        if index >= amount:
+                            # the table is known to be shorter already
+                            continue
+
+                        # the index is only allowed to fail if the host has been removed in the meantime
+                        amount = min(amount, self.getAmountOfHostsConnected(lanInterfaceId, timeout=timeout))
+                        if index < amount:
+                            raise
+
+                        continue
+
+                    yield HostDetails(results)
+        finally:
+            # the iteration might have been stopped early
+            for future in pending.keys():
+                future.cancel()
+
+            executor.shutdown(wait=True)
+
+    @staticmethod
+    def _getHostListURL(device, results):
+        """Internal method to get the URL of the host list out of the results of X_AVM-DE_GetHostListPath.
+
+        :param DeviceTR64 device: the device the host list belongs to
+        :param results: the results of the X_AVM-DE_GetHostListPath action
+        :type results: dict[str, str]
+        :return: the URL of the host list
+        :rtype: str
+        :raises ValueError: if the results contain no path
+        """
+        path = results.get("NewX_AVM-DE_HostListPath")
+
+        if not path:
+            raise ValueError("The device returned no host list path.")
+
+        return device.protocol + "://" + device.host + ":" + str(device.port) + "/" + path.lstrip("/")
+
+    @staticmethod
+    def _parseHostList(url, data):
+        """Internal method to parse the host list XML of AVM Fritz products.
+
+        The list is parsed incrementally, every host gets converted as soon as its element is complete.
+
+        :param str url: the URL the host list has been loaded from
+        :param data: the content of the host list, see :meth:`~simpletr64.DeviceTR64._iterparseXML`
+        :type data: bytes or collections.Iterable[bytes]
+        :return: the details of all hosts
+        :rtype: list[HostDetails]
+        """
+        return [HostDetails(Lan.__completeHostResults(results))
+                for results in DeviceTR64._iterateListItems(url, data)]
+
+    @staticmethod
+    def __completeHostResults(results):
+        # not every firmware version lists all values, HostDetails needs them
+        for key, default in (("NewIPAddress", ""), ("NewMACAddress", ""), ("NewHostName", ""),
+                             ("NewInterfaceType", ""), ("NewAddressSource", ""), ("NewLeaseTimeRemaining", "0"),
+                             ("NewActive", "0")):
+            if not results.get(key):
+                results[key] = default
+
+        return results
+
+    @_actionSteps
     def getEthernetInfo(self, lanInterfaceId=1, timeout=1):
         """Execute GetInfo action to get information's about the Ethernet interface.
 
@@ -151,10 +345,11 @@ class Lan(DeviceTR64):
         namespace = Lan.getServiceType("getEthernetInfo") + str(lanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetInfo", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetInfo", timeout=timeout)
 
-        return EthernetInfo(results)
+        yield EthernetInfo(results)
 
+    @_actionSteps
     def getEthernetStatistic(self, lanInterfaceId=1, timeout=1):
         """Execute GetStatistics action to get statistics of the Ethernet interface.
 
@@ -166,10 +361,11 @@ class Lan(DeviceTR64):
         namespace = Lan.getServiceType("getEthernetStatistic") + str(lanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetStatistics", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetStatistics", timeout=timeout)
 
-        return EthernetStatistic(results)
+        yield EthernetStatistic(results)
 
+    @_actionSteps
     def setEnable(self, status, lanInterfaceId=1, timeout=1):
         """Set enable status for a LAN interface, be careful you don't cut yourself off.
 
@@ -185,7 +381,7 @@ class Lan(DeviceTR64):
         else:
             setStatus = 0
 
-        self.execute(uri, namespace, "SetEnable", timeout=timeout, NewEnable=setStatus)
+        yield _Execute(uri, namespace, "SetEnable", timeout=timeout, NewEnable=setStatus)
 
 
 class EthernetStatistic:
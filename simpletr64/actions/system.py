@@ -1,4 +1,4 @@
-from simpletr64.devicetr64 import DeviceTR64
+from simpletr64.devicetr64 import DeviceTR64, _actionSteps, _Execute
 
 try:
     # noinspection PyCompatibility
@@ -83,6 +83,7 @@ class System(DeviceTR64):
             return System.serviceTypeLookup[method]
         return None
 
+    @_actionSteps
     def getSystemInfo(self, timeout=1):
         """Execute GetInfo action to get information's about the System on the device.
 
@@ -92,17 +93,19 @@ class System(DeviceTR64):
         namespace = System.getServiceType("getSystemInfo")
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetInfo", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetInfo", timeout=timeout)
 
-        return SystemInfo(results)
+        yield SystemInfo(results)
 
+    @_actionSteps
     def reboot(self, timeout=1):
         """Reboot the device"""
         namespace = System.getServiceType("reboot")
         uri = self.getControlURL(namespace)
 
-        self.execute(uri, namespace, "Reboot", timeout=timeout)
+        yield _Execute(uri, namespace, "Reboot", timeout=timeout)
 
+    @_actionSteps
     def getTimeInfo(self, timeout=1):
         """Execute GetInfo action to get information's about the time on the device.
 
@@ -112,10 +115,11 @@ class System(DeviceTR64):
         namespace = System.getServiceType("getTimeInfo")
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetInfo", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetInfo", timeout=timeout)
 
-        return TimeInfo(results)
+        yield TimeInfo(results)
 
+    @_actionSteps
     def softwareUpdateAvailable(self, timeout=1):
         """Returns if a software update is available
 
@@ -125,9 +129,9 @@ class System(DeviceTR64):
         namespace = System.getServiceType("softwareUpdateAvailable")
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetInfo", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetInfo", timeout=timeout)
 
-        return bool(int(results["NewUpgradeAvailable"]))
+        yield bool(int(results["NewUpgradeAvailable"]))
 
 
 class TimeInfo:
@@ -1,4 +1,5 @@
-from simpletr64.devicetr64 import DeviceTR64
+from simpletr64.devicetr64 import DeviceTR64, _actionSteps, _Execute, _ExecuteMany
+import time
 
 try:
     # noinspection PyCompatibility
@@ -39,6 +40,7 @@ class Wan(DeviceTR64):
         "getEthernetLinkStatus": "urn:dslforum-org:service:WANEthernetLinkConfig:",
         "getByteStatistic": "urn:dslforum-org:service:WANCommonInterfaceConfig:",
         "getPacketStatistic": "urn:dslforum-org:service:WANCommonInterfaceConfig:",
+        "getStatistic": "urn:dslforum-org:service:WANCommonInterfaceConfig:",
         "getConnectionInfo": "urn:dslforum-org:service:WANIPConnection:",
         "setEnable": "urn:dslforum-org:service:WANDSLLinkConfig:",
         "requestConnection": "urn:dslforum-org:service:WANIPConnection:1",
@@ -90,6 +92,7 @@ class Wan(DeviceTR64):
             return Wan.serviceTypeLookup[method]
         return None
 
+    @_actionSteps
     def getLinkInfo(self, wanInterfaceId=1, timeout=1):
         """Execute GetInfo action to get basic WAN link information's.
 
@@ -101,10 +104,11 @@ class Wan(DeviceTR64):
         namespace = Wan.getServiceType("getLinkInfo") + str(wanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetInfo", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetInfo", timeout=timeout)
 
-        return WanLinkInfo(results)
+        yield WanLinkInfo(results)
 
+    @_actionSteps
     def getLinkProperties(self, wanInterfaceId=1, timeout=1):
         """Execute GetCommonLinkProperties action to get WAN link properties.
 
@@ -116,10 +120,11 @@ class Wan(DeviceTR64):
         namespace = Wan.getServiceType("getLinkProperties") + str(wanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetCommonLinkProperties", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetCommonLinkProperties", timeout=timeout)
 
-        return WanLinkProperties(results)
+        yield WanLinkProperties(results)
 
+    @_actionSteps
     def getADSLInfo(self, wanInterfaceId=1, timeout=1):
         """Execute GetInfo action to get basic ADSL information's.
 
@@ -131,10 +136,11 @@ class Wan(DeviceTR64):
         namespace = Wan.getServiceType("getADSLInfo") + str(wanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetInfo", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetInfo", timeout=timeout)
 
-        return ADSLInfo(results)
+        yield ADSLInfo(results)
 
+    @_actionSteps
     def getEthernetLinkStatus(self, wanInterfaceId=1, timeout=1):
         """Execute GetEthernetLinkStatus action to get the status of the ethernet link.
 
@@ -146,10 +152,11 @@ class Wan(DeviceTR64):
         namespace = Wan.getServiceType("getEthernetLinkStatus") + str(wanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetEthernetLinkStatus", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetEthernetLinkStatus", timeout=timeout)
 
-        return results["NewEthernetLinkStatus"]
+        yield results["NewEthernetLinkStatus"]
 
+    @_actionSteps
     def getByteStatistic(self, wanInterfaceId=1, timeout=1):
         """Execute GetTotalBytesSent&GetTotalBytesReceived actions to get WAN statistics.
 
@@ -161,12 +168,13 @@ class Wan(DeviceTR64):
         namespace = Wan.getServiceType("getByteStatistic") + str(wanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetTotalBytesSent", timeout=timeout)
-        results2 = self.execute(uri, namespace, "GetTotalBytesReceived", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetTotalBytesSent", timeout=timeout)
+        results2 = yield _Execute(uri, namespace, "GetTotalBytesReceived", timeout=timeout)
 
-        return [int(results["NewTotalBytesSent"]),
-                int(results2["NewTotalBytesReceived"])]
+        yield [int(results["NewTotalBytesSent"]),
+               int(results2["NewTotalBytesReceived"])]
 
+    @_actionSteps
     def getPacketStatistic(self, wanInterfaceId=1, timeout=1):
         """Execute GetTotalPacketsSent&GetTotalPacketsReceived actions to get WAN statistics.
 
@@ -178,12 +186,69 @@ class Wan(DeviceTR64):
         namespace = Wan.getServiceType("getPacketStatistic") + str(wanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetTotalPacketsSent", timeout=timeout)
-        results2 = self.execute(uri, namespace, "GetTotalPacketsReceived", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetTotalPacketsSent", timeout=timeout)
+        results2 = yield _Execute(uri, namespace, "GetTotalPacketsReceived", timeout=timeout)
 
-        return [int(results["NewTotalPacketsSent"]),
-                int(results2["NewTotalPacketsReceived"])]
+        yield [int(results["NewTotalPacketsSent"]),
+               int(results2["NewTotalPacketsReceived"])]
 
+    @_actionSteps
+    def getStatistic(self, wanInterfaceId=1, timeout=1):
+        """Get the byte counters and, if the device provides them, the current rates of the WAN link in one snapshot.
+
+        Devices which support the action ``GetAddonInfos``, as AVM Fritz products, return the counters and rates with
+        one request, the byte counters are 64 bit wide there. For all other devices GetTotalBytesSent and
+        GetTotalBytesReceived are executed at the same time. If the SCPD of the service has been loaded it decides
+        which way is taken, otherwise GetAddonInfos is tried first and not again once the device has answered that it
+        does not support it.
+
+        :param int wanInterfaceId: the id of the WAN device
+        :param float timeout: the timeout to wait for the actions to be executed
+        :return: the statistic of the WAN link
+        :rtype: WanStatistic
+        """
+        namespace = Wan.getServiceType("getStatistic") + str(wanInterfaceId)
+        uri = self.getControlURL(namespace)
+
+        results = None
+
+        if self._isActionSupported(namespace, "GetAddonInfos"):
+            try:
+                results = yield _Execute(uri, namespace, "GetAddonInfos", timeout=timeout)
+            except ValueError as e:
+                if not DeviceTR64._isUnsupportedActionError(e):
+                    raise
+
+                # do not ask again with every poll
+                self._setActionUnsupported(namespace, "GetAddonInfos")
+
+        if results is None:
+            allResults = yield _ExecuteMany([(uri, namespace, "GetTotalBytesSent"),
+                                             (uri, namespace, "GetTotalBytesReceived")], 2, timeout)
+            results = Wan._mergeResults(allResults)
+
+        yield WanStatistic(results, time.time())
+
+    @staticmethod
+    def _mergeResults(allResults):
+        """Internal method to merge the results of actions which have been executed at the same time.
+
+        :param allResults: the results of the actions or the exceptions they raised
+        :type allResults: list[dict[str, str] or Exception]
+        :rtype: dict[str, str]
+        :raises Exception: the first exception of an action
+        """
+        results = {}
+
+        for actionResults in allResults:
+            if isinstance(actionResults, Exception):
+                raise actionResults
+
+            results.update(actionResults)
+
+        return results
+
+    @_actionSteps
     def getConnectionInfo(self, wanInterfaceId=1, timeout=1):
         """Execute GetInfo action to get WAN connection information's.
 
@@ -195,10 +260,11 @@ class Wan(DeviceTR64):
         namespace = Wan.getServiceType("getConnectionInfo") + str(wanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetInfo", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetInfo", timeout=timeout)
 
-        return ConnectionInfo(results)
+        yield ConnectionInfo(results)
 
+    @_actionSteps
     def setEnable(self, status, wanInterfaceId=1, timeout=1):
         """Set enable status for a WAN interface, be careful you don't cut yourself off.
 
@@ -214,8 +280,9 @@ class Wan(DeviceTR64):
         else:
             setStatus = 0
 
-        self.execute(uri, namespace, "SetEnable", timeout=timeout, NewEnable=setStatus)
+        yield _Execute(uri, namespace, "SetEnable", timeout=timeout, NewEnable=setStatus)
 
+    @_actionSteps
     def requestConnection(self, wanInterfaceId=1, timeout=1):
         """Request the connection to be established
 
@@ -225,8 +292,9 @@ class Wan(DeviceTR64):
         namespace = Wan.getServiceType("requestConnection") + str(wanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        self.execute(uri, namespace, "RequestConnection", timeout=timeout)
+        yield _Execute(uri, namespace, "RequestConnection", timeout=timeout)
 
+    @_actionSteps
     def terminateConnection(self, wanInterfaceId=1, timeout=1):
         """Terminate the connection
 
@@ -236,7 +304,7 @@ class Wan(DeviceTR64):
         namespace = Wan.getServiceType("terminateConnection") + str(wanInterfaceId)
         uri = self.getControlURL(namespace)
 
-        self.execute(uri, namespace, "ForceTermination", timeout=timeout)
+        yield _Execute(uri, namespace, "ForceTermination", timeout=timeout)
 
 
 class WanLinkInfo:
@@ -456,6 +524,123 @@ class WanLinkProperties:
         return self.__downstreamMaxBitRate
 
 
+class WanStatistic:
+    """A container class for a snapshot of the WAN byte counters and rates, see
+    :meth:`~simpletr64.actions.Wan.getStatistic`."""
+
+    def __init__(self, results, timestamp=None):
+        """Initialize an object
+
+        :param results: action results of an GetAddonInfos action or of GetTotalBytesSent and GetTotalBytesReceived
+        :type results: dict[str,str]
+        :param float timestamp: the time the results have been received as seconds since the epoch, by default now
+        :rtype: WanStatistic
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        self.__timestamp = timestamp
+        self.__bytesSent = WanStatistic.__getCounter(results, "NewX_AVM_DE_TotalBytesSent64", "NewTotalBytesSent")
+        self.__bytesReceived = WanStatistic.__getCounter(results, "NewX_AVM_DE_TotalBytesReceived64",
+                                                         "NewTotalBytesReceived")
+        self.__byteSendRate = WanStatistic.__getInteger(results, "NewByteSendRate")
+        self.__byteReceiveRate = WanStatistic.__getInteger(results, "NewByteReceiveRate")
+        self.__packetSendRate = WanStatistic.__getInteger(results, "NewPacketSendRate")
+        self.__packetReceiveRate = WanStatistic.__getInteger(results, "NewPacketReceiveRate")
+        self.__raw = results
+
+    @staticmethod
+    def __getCounter(results, wideName, name):
+        # the 64 bit counters do not wrap, prefer them
+        counter = WanStatistic.__getInteger(results, wideName)
+        if counter is not None:
+            return counter
+
+        return int(results[name])
+
+    @staticmethod
+    def __getInteger(results, name):
+        value = results.get(name)
+
+        # a typed result of 0 is a valid value, a missing or empty one is not
+        if value is None or value == "":
+            return None
+
+        return int(value)
+
+    @property
+    def raw(self):
+        """Return the raw results which have been used to initialize the object.
+
+        :return: the raw results
+        :rtype: dict[str,str]
+        """
+        return self.__raw
+
+    @property
+    def timestamp(self):
+        """Return the time the statistic has been received.
+
+        :return: the time as seconds since the epoch
+        :rtype: float
+        """
+        return self.__timestamp
+
+    @property
+    def bytesSent(self):
+        """Return the total amount of bytes sent, 64 bit wide if the device provides it.
+
+        :return: the total amount of bytes sent
+        :rtype: int
+        """
+        return self.__bytesSent
+
+    @property
+    def bytesReceived(self):
+        """Return the total amount of bytes received, 64 bit wide if the device provides it.
+
+        :return: the total amount of bytes received
+        :rtype: int
+        """
+        return self.__bytesReceived
+
+    @property
+    def byteSendRate(self):
+        """Return the current upstream rate in bytes per second.
+
+        :return: the current upstream rate or None if the device does not provide it
+        :rtype: int
+        """
+        return self.__byteSendRate
+
+    @property
+    def byteReceiveRate(self):
+        """Return the current downstream rate in bytes per second.
+
+        :return: the current downstream rate or None if the device does not provide it
+        :rtype: int
+        """
+        return self.__byteReceiveRate
+
+    @property
+    def packetSendRate(self):
+        """Return the current rate of packets sent per second.
+
+        :return: the current rate of packets sent or None if the device does not provide it
+        :rtype: int
+        """
+        return self.__packetSendRate
+
+    @property
+    def packetReceiveRate(self):
+        """Return the current rate of packets received per second.
+
+        :return: the current rate of packets received or None if the device does not provide it
+        :rtype: int
+        """
+        return self.__packetReceiveRate
+
+
 class ConnectionInfo:
     """A container class for WAN connection information's."""
 
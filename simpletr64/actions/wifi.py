@@ -1,4 +1,4 @@
-from simpletr64.devicetr64 import DeviceTR64
+from simpletr64.devicetr64 import DeviceTR64, _actionSteps, _Execute, _ExecuteMany, _Download, _DownloadMany
 import json
 
 try:
@@ -40,6 +40,7 @@ class Wifi(DeviceTR64):
         "getTotalAssociations": "urn:dslforum-org:service:WLANConfiguration:",
         "getGenericAssociatedDeviceInfo": "urn:dslforum-org:service:WLANConfiguration:",
         "getSpecificAssociatedDeviceInfo": "urn:dslforum-org:service:WLANConfiguration:",
+        "getAllAssociatedDevices": "urn:dslforum-org:service:WLANConfiguration:",
         "setEnable": "urn:dslforum-org:service:WLANConfiguration:",
         "setChannel": "urn:dslforum-org:service:WLANConfiguration:",
         "setSSID": "urn:dslforum-org:service:WLANConfiguration:"
@@ -90,6 +91,7 @@ class Wifi(DeviceTR64):
             return Wifi.serviceTypeLookup[method]
         return None
 
+    @_actionSteps
     def getWifiInfo(self, wifiInterfaceId=1, timeout=1):
         """Execute GetInfo action to get Wifi basic information's.
 
@@ -101,10 +103,11 @@ class Wifi(DeviceTR64):
         namespace = Wifi.getServiceType("getWifiInfo") + str(wifiInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetInfo", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetInfo", timeout=timeout)
 
-        return WifiBasicInfo(results)
+        yield WifiBasicInfo(results)
 
+    @_actionSteps
     def getStatistic(self, wifiInterfaceId=1, timeout=1):
         """Execute GetStatistics action to get Wifi statistics.
 
@@ -116,10 +119,11 @@ class Wifi(DeviceTR64):
         namespace = Wifi.getServiceType("getStatistic") + str(wifiInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetStatistics", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetStatistics", timeout=timeout)
 
-        return [int(results["NewTotalPacketsSent"]), int(results["NewTotalPacketsReceived"])]
+        yield [int(results["NewTotalPacketsSent"]), int(results["NewTotalPacketsReceived"])]
 
+    @_actionSteps
     def getPacketStatistic(self, wifiInterfaceId=1, timeout=1):
         """Execute GetPacketStatistics action to get Wifi statistics.
 
@@ -131,10 +135,11 @@ class Wifi(DeviceTR64):
         namespace = Wifi.getServiceType("getPacketStatistic") + str(wifiInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetPacketStatistics", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetPacketStatistics", timeout=timeout)
 
-        return [int(results["NewTotalPacketsSent"]), int(results["NewTotalPacketsReceived"])]
+        yield [int(results["NewTotalPacketsSent"]), int(results["NewTotalPacketsReceived"])]
 
+    @_actionSteps
     def getTotalAssociations(self, wifiInterfaceId=1, timeout=1):
         """Execute GetTotalAssociations action to get the amount of associated Wifi clients.
 
@@ -148,10 +153,11 @@ class Wifi(DeviceTR64):
         namespace = Wifi.getServiceType("getTotalAssociations") + str(wifiInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetTotalAssociations", timeout=timeout)
+        results = yield _Execute(uri, namespace, "GetTotalAssociations", timeout=timeout)
 
-        return int(results["NewTotalAssociations"])
+        yield int(results["NewTotalAssociations"])
 
+    @_actionSteps
     def getGenericAssociatedDeviceInfo(self, index, wifiInterfaceId=1, timeout=1):
         """Execute GetGenericAssociatedDeviceInfo action to get detailed information about a Wifi client.
 
@@ -166,11 +172,12 @@ class Wifi(DeviceTR64):
         namespace = Wifi.getServiceType("getGenericAssociatedDeviceInfo") + str(wifiInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetGenericAssociatedDeviceInfo", timeout=timeout,
-                               NewAssociatedDeviceIndex=index)
+        results = yield _Execute(uri, namespace, "GetGenericAssociatedDeviceInfo", timeout=timeout,
+                                 NewAssociatedDeviceIndex=index)
 
-        return WifiDeviceInfo(results)
+        yield WifiDeviceInfo(results)
 
+    @_actionSteps
     def getSpecificAssociatedDeviceInfo(self, macAddress, wifiInterfaceId=1, timeout=1):
         """Execute GetSpecificAssociatedDeviceInfo action to get detailed information about a Wifi client.
 
@@ -186,11 +193,292 @@ class Wifi(DeviceTR64):
         namespace = Wifi.getServiceType("getSpecificAssociatedDeviceInfo") + str(wifiInterfaceId)
         uri = self.getControlURL(namespace)
 
-        results = self.execute(uri, namespace, "GetSpecificAssociatedDeviceInfo", timeout=timeout,
-                               NewAssociatedDeviceMACAddress=macAddress)
+        results = yield _Execute(uri, namespace, "GetSpecificAssociatedDeviceInfo", timeout=timeout,
+                                 NewAssociatedDeviceMACAddress=macAddress)
 
-        return WifiDeviceInfo(results, macAddress=macAddress)
+        yield WifiDeviceInfo(results, macAddress=macAddress)
 
+    def getWifiInterfaceIds(self):
+        """Return the ids of all Wifi interfaces the device announces in its device definitions.
+
+        :return: the ids of the Wifi interfaces
+        :rtype: list[int]
+
+        .. seealso:: :meth:`~simpletr64.DeviceTR64.deviceServiceDefinitions`
+        """
+        return Wifi._getWifiInterfaceIds(self)
+
+    @_actionSteps
+    def getAllAssociatedDevices(self, timeout=1, concurrency=None):
+        """Get the details of all Wifi clients of all Wifi interfaces.
+
+        All interfaces are asked at the same time. AVM Fritz products provide the clients of an interface as one XML
+        document with the action ``X_AVM-DE_GetWLANDeviceListPath``, the documents are downloaded at the same time.
+        Only the interfaces which do not support the action, by the loaded SCPD or by their answer, fall back to one
+        GetGenericAssociatedDeviceInfo action per client; a device list which can not be downloaded or parsed raises
+        an error. Clients which disconnect while they are loaded are skipped.
+
+        :param float timeout: the timeout to wait for each action to be executed
+        :param int concurrency: the maximum amount of actions or downloads which run at the same time over all
+            interfaces, by default the :meth:`~simpletr64.DeviceTR64.poolSize`
+        :return: the details of all clients by their MAC address in upper case
+        :rtype: dict[str, WifiDeviceInfo]
+
+        .. seealso:: :meth:`~simpletr64.actions.Wifi.getWifiInterfaceIds`
+        """
+        interfaceIds = self.getWifiInterfaceIds()
+        deviceLists = {}
+
+        listIds = [interfaceId for interfaceId in interfaceIds
+                   if self._isActionSupported(Wifi._getAssociationNamespace(interfaceId),
+                                              "X_AVM-DE_GetWLANDeviceListPath")]
+
+        allResults = yield _ExecuteMany([Wifi._getAssociationAction(self, interfaceId,
+                                                                    "X_AVM-DE_GetWLANDeviceListPath")
+                                         for interfaceId in listIds], concurrency, timeout)
+
+        downloadIds = []
+        downloads = []
+        for interfaceId, results in zip(listIds, allResults):
+            if Wifi._isDeviceListUnsupported(self, interfaceId, results):
+                continue
+
+            downloadIds.append(interfaceId)
+            downloads.append(_Download(
+                Wifi._getDeviceListURL(self, results), timeout, "Wifi device list",
+                lambda url, data, wifiInterfaceId=interfaceId: Wifi._parseDeviceList(url, data, wifiInterfaceId)))
+
+        # the device lists are downloaded with the same budget of concurrent requests
+        allResults = yield _DownloadMany(downloads, concurrency)
+
+        for interfaceId, results in zip(downloadIds, allResults):
+            if isinstance(results, Exception):
+                raise results
+
+            deviceLists[interfaceId] = results
+
+        # the interfaces without device list get every single client, all with one budget of concurrent actions
+        otherIds = [interfaceId for interfaceId in interfaceIds if interfaceId not in deviceLists]
+
+        allResults = yield _ExecuteMany([Wifi._getAssociationAction(self, interfaceId, "GetTotalAssociations")
+                                         for interfaceId in otherIds], concurrency, timeout)
+        amounts = Wifi._getTotalAssociationsResults(allResults)
+
+        allResults = yield _ExecuteMany(Wifi._getAssociatedDeviceActions(self, otherIds, amounts), concurrency,
+                                        timeout)
+
+        for interfaceId, amount, results in Wifi._splitAssociatedDeviceResults(otherIds, amounts, allResults):
+            if any(isinstance(result, ValueError) for result in results):
+                # clients might have been disconnected in the meantime
+                namespace = Wifi._getAssociationNamespace(interfaceId)
+                totalResults = yield _Execute(self.getControlURL(namespace), namespace, "GetTotalAssociations",
+                                              timeout=timeout)
+                amount = min(amount, int(totalResults["NewTotalAssociations"]))
+
+            deviceLists[interfaceId] = Wifi._createAssociatedDevices(results, amount, interfaceId)
+
+        yield Wifi._mergeAssociatedDevices([deviceLists[interfaceId] for interfaceId in interfaceIds])
+
+    @staticmethod
+    def _isDeviceListUnsupported(device, wifiInterfaceId, results):
+        """Internal method to check the results of X_AVM-DE_GetWLANDeviceListPath for an interface without device
+        list, the action gets remembered as unsupported.
+
+        :param DeviceTR64 device: the device
+        :param int wifiInterfaceId: the id of the Wifi interface
+        :param results: the results of the action or the exception it raised
+        :type results: dict[str, str] or Exception
+        :return: if the interface has no device list
+        :rtype: bool
+        :raises Exception: the exception of the action if it is not caused by an unsupported action
+        """
+        if not isinstance(results, Exception):
+            return False
+
+        if not DeviceTR64._isUnsupportedActionError(results):
+            raise results
+
+        device._setActionUnsupported(Wifi._getAssociationNamespace(wifiInterfaceId), "X_AVM-DE_GetWLANDeviceListPath")
+        return True
+
+    @staticmethod
+    def _getAssociationNamespace(wifiInterfaceId):
+        """Internal method to get the namespace of the Wifi service of an interface.
+
+        :param int wifiInterfaceId: the id of the Wifi interface
+        :rtype: str
+        """
+        return Wifi.getServiceType("getAllAssociatedDevices") + str(wifiInterfaceId)
+
+    @staticmethod
+    def _getAssociationAction(device, wifiInterfaceId, action, arguments=None):
+        """Internal method to create an action of the Wifi service of an interface for executeMany.
+
+        :param DeviceTR64 device: the device
+        :param int wifiInterfaceId: the id of the Wifi interface
+        :param str action: the name of the action
+        :param dict arguments: the arguments of the action
+        :rtype: tuple
+        """
+        namespace = Wifi._getAssociationNamespace(wifiInterfaceId)
+
+        return device.getControlURL(namespace), namespace, action, arguments
+
+    @staticmethod
+    def _getTotalAssociationsResults(allResults):
+        """Internal method to get the amount of clients out of the results of GetTotalAssociations per interface.
+
+        :param allResults: the results or exceptions of the actions per interface
+        :type allResults: list[dict[str, str] or Exception]
+        :rtype: list[int]
+        :raises Exception: the first exception of an action
+        """
+        for results in allResults:
+            if isinstance(results, Exception):
+                raise results
+
+        return [int(results["NewTotalAssociations"]) for results in allResults]
+
+    @staticmethod
+    def _getAssociatedDeviceActions(device, wifiInterfaceIds, amounts):
+        """Internal method to create the GetGenericAssociatedDeviceInfo actions of all clients of the interfaces.
+
+        :param DeviceTR64 device: the device
+        :param list[int] wifiInterfaceIds: the ids of the Wifi interfaces
+        :param list[int] amounts: the amount of clients per interface
+        :rtype: list[tuple]
+        """
+        actions = []
+
+        for interfaceId, amount in zip(wifiInterfaceIds, amounts):
+            actions.extend(Wifi._getAssociationAction(device, interfaceId, "GetGenericAssociatedDeviceInfo",
+                                                      {"NewAssociatedDeviceIndex": index}) for index in range(amount))
+
+        return actions
+
+    @staticmethod
+    def _splitAssociatedDeviceResults(wifiInterfaceIds, amounts, allResults):
+        """Internal method to split the results of all GetGenericAssociatedDeviceInfo actions per interface.
+
+        :param list[int] wifiInterfaceIds: the ids of the Wifi interfaces
+        :param list[int] amounts: the amount of clients per interface
+        :param allResults: the results or exceptions of the actions of all interfaces
+        :type allResults: list[dict[str, str] or Exception]
+        :return: the interface id, the amount of clients and the results of its actions per interface
+        :rtype: list[tuple]
+        """
+        split = []
+        offset = 0
+
+        for interfaceId, amount in zip(wifiInterfaceIds, amounts):
+            split.append((interfaceId, amount, allResults[offset:offset + amount]))
+            offset += amount
+
+        return split
+
+    @staticmethod
+    def _getWifiInterfaceIds(device):
+        """Internal method to get the ids of all Wifi interfaces out of the device definitions.
+
+        :param DeviceTR64 device: the device
+        :rtype: list[int]
+        """
+        prefix = Wifi.getServiceType("getAllAssociatedDevices")
+
+        interfaceIds = []
+        for serviceType in device.deviceServiceDefinitions.keys():
+            if serviceType.startswith(prefix) and serviceType[len(prefix):].isdigit():
+                interfaceIds.append(int(serviceType[len(prefix):]))
+
+        return sorted(interfaceIds)
+
+    @staticmethod
+    def _getDeviceListURL(device, results):
+        """Internal method to get the URL of the device list out of the results of X_AVM-DE_GetWLANDeviceListPath.
+
+        :param DeviceTR64 device: the device the device list belongs to
+        :param results: the results of the X_AVM-DE_GetWLANDeviceListPath action
+        :type results: dict[str, str]
+        :return: the URL of the device list
+        :rtype: str
+        :raises ValueError: if the results contain no path
+        """
+        path = results.get("NewX_AVM-DE_WLANDeviceListPath")
+
+        if not path:
+            raise ValueError("The device returned no Wifi device list path.")
+
+        return device.protocol + "://" + device.host + ":" + str(device.port) + "/" + path.lstrip("/")
+
+    @staticmethod
+    def _parseDeviceList(url, data, wifiInterfaceId):
+        """Internal method to parse the Wifi device list XML of AVM Fritz products.
+
+        :param str url: the URL the device list has been loaded from
+        :param data: the content of the device list, see :meth:`~simpletr64.DeviceTR64._iterparseXML`
+        :type data: bytes or collections.Iterable[bytes]
+        :param int wifiInterfaceId: the id of the Wifi interface
+        :return: the details of all clients
+        :rtype: list[WifiDeviceInfo]
+        """
+        devices = []
+
+        for results in DeviceTR64._iterateListItems(url, data):
+            # not every firmware version lists all values, WifiDeviceInfo needs them
+            if not results.get("NewAssociatedDeviceAuthState"):
+                results["NewAssociatedDeviceAuthState"] = "0"
+            results.setdefault("NewAssociatedDeviceIPAddress", "")
+            if not results.get("NewX_AVM-DE_SignalStrength"):
+                results.pop("NewX_AVM-DE_SignalStrength", None)
+
+            devices.append(WifiDeviceInfo(results, wifiInterfaceId=wifiInterfaceId))
+
+        return devices
+
+    @staticmethod
+    def _createAssociatedDevices(allResults, amount, wifiInterfaceId):
+        """Internal method to create the details of the clients out of the results of GetGenericAssociatedDeviceInfo.
+
+        :param allResults: the results or exceptions of the actions per index
+        :type allResults: list[dict[str, str] or Exception]
+        :param int amount: the amount of clients which are still connected
+        :param int wifiInterfaceId: the id of the Wifi interface
+        :return: the details of all clients
+        :rtype: list[WifiDeviceInfo]
+        :raises ValueError: if a client could not be loaded which is still connected
+        """
+        devices = []
+
+        for index, results in enumerate(allResults):
+            if isinstance(results, Exception):
+                if isinstance(results, ValueError) and index >= amount:
+                    # the client has been disconnected
+                    continue
+
+                raise results
+
+            devices.append(WifiDeviceInfo(results, wifiInterfaceId=wifiInterfaceId))
+
+        return devices
+
+    @staticmethod
+    def _mergeAssociatedDevices(deviceLists):
+        """Internal method to merge the clients of all interfaces by their MAC address.
+
+        :param deviceLists: the clients per interface
+        :type deviceLists: list[list[WifiDeviceInfo]]
+        :rtype: dict[str, WifiDeviceInfo]
+        """
+        devices = {}
+
+        for deviceList in deviceLists:
+            for device in deviceList:
+                if device.macAddress:
+                    devices[device.macAddress.upper()] = device
+
+        return devices
+
+    @_actionSteps
     def setEnable(self, status, wifiInterfaceId=1, timeout=1):
         """Set enable status for a Wifi interface, be careful you don't cut yourself off.
 
@@ -206,8 +494,9 @@ class Wifi(DeviceTR64):
         else:
             setStatus = 0
 
-        self.execute(uri, namespace, "SetEnable", timeout=timeout, NewEnable=setStatus)
+        yield _Execute(uri, namespace, "SetEnable", timeout=timeout, NewEnable=setStatus)
 
+    @_actionSteps
     def setChannel(self, channel, wifiInterfaceId=1, timeout=1):
         """Set the channel of this Wifi interface
 
@@ -218,8 +507,9 @@ class Wifi(DeviceTR64):
         namespace = Wifi.getServiceType("setChannel") + str(wifiInterfaceId)
         uri = self.getControlURL(namespace)
 
-        self.execute(uri, namespace, "SetChannel", timeout=timeout, NewChannel=channel)
+        yield _Execute(uri, namespace, "SetChannel", timeout=timeout, NewChannel=channel)
 
+    @_actionSteps
     def setSSID(self, ssid, wifiInterfaceId=1, timeout=1):
         """Set the SSID (name of the Wifi network)
 
@@ -230,18 +520,19 @@ class Wifi(DeviceTR64):
         namespace = Wifi.getServiceType("setChannel") + str(wifiInterfaceId)
         uri = self.getControlURL(namespace)
 
-        self.execute(uri, namespace, "SetChannel", timeout=timeout, NewSSID=ssid)
+        yield _Execute(uri, namespace, "SetChannel", timeout=timeout, NewSSID=ssid)
 
 
 class WifiDeviceInfo:
     """A container class for Wifi device information's."""
 
-    def __init__(self, results, macAddress=None):
+    def __init__(self, results, macAddress=None, wifiInterfaceId=None):
         """Initialize an object
 
         :param str results: action results of an GetSpecificAssociatedDeviceInfo or
             GetGenericAssociatedDeviceInfo action
         :param str macAddress: in the result for getSpecificAssociatedDeviceInfo is no Mac Address, lets add it again
+        :param int wifiInterfaceId: the id of the Wifi interface the client is connected to, if known
         :type results: dict[str,str]
         :rtype: WifiDeviceInfo
         """
@@ -255,6 +546,7 @@ class WifiDeviceInfo:
             self.__signalStrength = int(results["NewX_AVM-DE_SignalStrength"])
         else:
             self.__signalStrength = None
+        self.__wifiInterfaceId = wifiInterfaceId
         self.__raw = results
 
     @property
@@ -275,6 +567,15 @@ class WifiDeviceInfo:
         """
         return self.__raw
 
+    @property
+    def wifiInterfaceId(self):
+        """Return the id of the Wifi interface the client is connected to.
+
+        :return: the id of the Wifi interface or None if not known
+        :rtype: int
+        """
+        return self.__wifiInterfaceId
+
     @property
     def macAddress(self):
         """Returns the mac address
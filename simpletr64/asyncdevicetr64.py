@@ -0,0 +1,564 @@
+import asyncio
+import ssl
+
+import aiohttp
+
+from simpletr64.devicetr64 import DeviceTR64, _Step, _Execute, _ExecuteMany, _DownloadMany
+
+try:
+    # noinspection PyCompatibility
+    from urlparse import urlparse
+except ImportError:
+    # noinspection PyCompatibility,PyUnresolvedReferences
+    from urllib.parse import urlparse
+
+# get_running_loop is new in Python 3.7, before get_event_loop returns the running loop inside of a coroutine
+_getRunningLoop = getattr(asyncio, "get_running_loop", asyncio.get_event_loop)
+
+
+class AsyncDeviceTR64(DeviceTR64):
+    """The asyncio variant of :class:`~simpletr64.DeviceTR64`.
+
+    :meth:`~simpletr64.AsyncDeviceTR64.execute`, :meth:`~simpletr64.AsyncDeviceTR64.loadDeviceDefinitions` and
+    :meth:`~simpletr64.AsyncDeviceTR64.loadSCPD` are coroutines, all other methods and properties behave like in
+    :class:`~simpletr64.DeviceTR64`. The SOAP envelope and the parsing of all responses is shared with the synchronous
+    class. The requests are sent with `aiohttp <https://docs.aiohttp.org/>`_ over a connection pool which gets created
+    with the first request, so many actions on many devices can run on one event loop at the same time. The connections
+    are closed with :meth:`~simpletr64.AsyncDeviceTR64.close` or by using the object with ``async with``, a plain
+    ``with`` is not supported.
+
+    This class needs Python 3.5 or newer and aiohttp installed, ``pip install simpleTR64[async]``.
+
+    Example:
+
+    ::
+
+        async with AsyncDeviceTR64("fritz.box") as device:
+            device.setupTR64Device("fritz.box")
+            results = await device.execute("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1",
+                                           "GetGenericHostEntry", NewIndex=1)
+
+    :type __session: aiohttp.ClientSession
+    :type __staleSessions: list[aiohttp.ClientSession]
+    """
+
+    def __init__(self, hostname, port=49000, protocol="http", verify=True):
+        """Initialize an AsyncDeviceTR64 object.
+
+        :param str hostname: hostname or IP address of the device
+        :param int port: there is no default port usually, it is different per vendor. Default port for fritz.box is
+            49000 and when encrypted 49443
+        :param str protocol: protocol is either http or https
+        :param verify: Whether to verify the SSL certificate of the server, or the path of a certificate file
+        :rtype: AsyncDeviceTR64
+        """
+        self.__session = None
+        self.__staleSessions = []
+        self.__verify = verify
+
+        DeviceTR64.__init__(self, hostname, port, protocol, verify)
+
+    @classmethod
+    def createFromURL(cls, urlOfXMLDefinition):
+        """Factory method to create an object from an URL to the XML device definitions.
+
+        :param str urlOfXMLDefinition:
+        :return: the new object
+        :rtype: AsyncDeviceTR64
+        """
+        url = urlparse(urlOfXMLDefinition)
+
+        if not url.port:
+            if url.scheme.lower() == "https":
+                port = 443
+            else:
+                port = 80
+        else:
+            port = url.port
+
+        return cls(url.hostname, port, url.scheme)
+
+    def __enter__(self):
+        raise TypeError("An AsyncDeviceTR64 can only be used with async with.")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, excType, excValue, traceback):
+        await self.close()
+
+    async def close(self):
+        """Close all open connections to the device.
+
+        The object can still be used afterwards, a new connection pool gets created with the next request. Instead of
+        calling this method the object can be used as asynchronous context manager.
+        """
+        self._resetConnections()
+        await self.__closeStaleSessions()
+
+    def _resetConnections(self):
+        """Internal method to drop the connection pool, it gets closed inside the event loop with the next request."""
+        if self.__session is not None:
+            self.__staleSessions.append(self.__session)
+            self.__session = None
+
+    async def __closeStaleSessions(self):
+        """Internal method to close all connection pools which have been replaced."""
+        while self.__staleSessions:
+            await self.__staleSessions.pop().close()
+
+    async def _getSession(self):
+        """Internal method to get the http session which holds the connection pool to the device.
+
+        :return: the session of this device
+        :rtype: aiohttp.ClientSession
+        """
+        await self.__closeStaleSessions()
+
+        if self.__session is None:
+            if self.__verify is True:
+                sslContext = None
+            elif self.__verify is False:
+                sslContext = False
+            else:
+                sslContext = ssl.create_default_context(cafile=self.__verify)
+
+            keepAliveTimeout = self.maxIdleTime if self.maxIdleTime else None
+
+            if self.keepAlive:
+                connector = aiohttp.TCPConnector(limit_per_host=self.poolSize, keepalive_timeout=keepAliveTimeout,
+                                                 ssl=sslContext)
+            else:
+                connector = aiohttp.TCPConnector(limit_per_host=self.poolSize, force_close=True, ssl=sslContext)
+
+            self.__session = aiohttp.ClientSession(connector=connector)
+
+        return self.__session
+
+    async def _sendRequest(self, method, location, timeout, headers=None, data=None, authenticate=True):
+        """Internal method to send a http request to the device over the shared connection pool.
+
+        :param str method: the http method, ``GET`` or ``POST``
+        :param str location: the full URL to request
+        :param float timeout: the timeout to wait for the response
+        :param headers: optional http headers
+        :type headers: dict[str, str]
+        :param str data: optional body of the request
+        :param bool authenticate: if set to false no authentication will be used even if a password is set
+        :return: the response of the device and its content
+        :rtype: tuple(aiohttp.ClientResponse, bytes)
+        :raises aiohttp.ClientError: when the request can not be placed on the device
+        :raises asyncio.TimeoutError: when the request time out
+        """
+        session = await self._getSession()
+
+        # setup proxy, aiohttp supports one proxy per request
+        if location.lower().startswith("https:"):
+            proxy = self.httpsProxy or None
+        else:
+            proxy = self.httpProxy or None
+
+        auth = None
+        if authenticate:
+            auth = self._getAuth()
+
+        url = urlparse(location)
+        path = url.path or "/"
+        if url.query:
+            path += "?" + url.query
+
+        clientTimeout = aiohttp.ClientTimeout(total=float(timeout))
+
+        # the authentication state is shared with the synchronous class, see simpletr64.auth.DigestAuth
+        for attempt in range(2):
+            requestHeaders = dict(headers or {})
+
+            if auth is not None:
+                authorization = auth.authorization(method, path)
+                if authorization is not None:
+                    requestHeaders["Authorization"] = authorization
+
+            async with session.request(method, location, data=data, headers=requestHeaders, proxy=proxy,
+                                       timeout=clientTimeout) as response:
+                content = await response.read()
+
+            if attempt == 0 and response.status == 401 and auth is not None and \
+                    auth.challenge(response.headers.get("WWW-Authenticate", "")):
+                # repeat the request once with the new challenge
+                continue
+
+            return response, content
+
+    async def _runSteps(self, steps):
+        """Internal method to run an action method which yields the requests it needs, the coroutine variant of
+        :meth:`~simpletr64.DeviceTR64._runSteps`.
+
+        :param steps: the generator of the action method
+        :return: the first value the generator yields which is not a step, None if it yields none
+        """
+        value = None
+        error = None
+
+        try:
+            while True:
+                if error is None:
+                    step = steps.send(value)
+                else:
+                    step = steps.throw(error)
+
+                if not isinstance(step, _Step):
+                    return step
+
+                try:
+                    value, error = await self._runStep(step), None
+                except Exception as e:
+                    value, error = None, e
+        except StopIteration:
+            return None
+        finally:
+            steps.close()
+
+    async def _runStep(self, step):
+        """Internal method to execute one step of an action method.
+
+        :param _Step step: the step
+        :return: the result of the step
+        :raises ValueError: if a document could not be downloaded
+        """
+        if isinstance(step, _Execute):
+            return await self.execute(step.uri, step.namespace, step.action, timeout=step.timeout, **step.arguments)
+
+        if isinstance(step, _ExecuteMany):
+            return await self.executeMany(step.actions, concurrency=step.concurrency, timeout=step.timeout)
+
+        if isinstance(step, _DownloadMany):
+            return await self._downloadMany(step.downloads, step.concurrency)
+
+        return await self._download(step)
+
+    async def _download(self, step):
+        """Internal method to download and parse a document of the device.
+
+        :param _Download step: the download step
+        :return: the result of the parse function of the step
+        :raises ValueError: if the document could not be downloaded
+        """
+        # the location contains a session id already
+        response, content = await self._sendRequest("GET", step.location, step.timeout, authenticate=False)
+
+        if response.status != 200:
+            errorStr = DeviceTR64._parseErrorString(content)
+            raise ValueError('Could not get ' + step.name + ' "' + step.location + '" : ' + str(response.status) +
+                             ' - ' + str(response.reason) + " -- " + errorStr)
+
+        return step.parse(step.location, content)
+
+    async def _downloadMany(self, downloads, concurrency=None):
+        """Internal method to download and parse documents of the device at the same time.
+
+        :param list[_Download] downloads: the download steps
+        :param int concurrency: the maximum amount of downloads at the same time, by default the
+            :meth:`~simpletr64.DeviceTR64.poolSize`
+        :return: the result of the parse function or the exception for every download, in the same order
+        :rtype: list
+        :raises ValueError: if the concurrency is not a positive number
+        """
+        if concurrency is None:
+            concurrency = self.poolSize
+
+        if concurrency < 1:
+            raise ValueError("The concurrency needs to be at least 1.")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def downloadOne(download):
+            async with semaphore:
+                return await self._download(download)
+
+        return await asyncio.gather(*[downloadOne(download) for download in downloads], return_exceptions=True)
+
+    async def execute(self, uri, namespace, action, timeout=2, **kwargs):
+        """Executes a given action with optional arguments.
+
+        The coroutine variant of :meth:`~simpletr64.DeviceTR64.execute`.
+
+        :param str uri: the control URI, for example ``/upnp/control/hosts``
+        :param str namespace: the namespace for the given action, for example ``urn:dslforum-org:service:Hosts:1``
+        :param str action: the name of the action to call, for example ``GetGenericHostEntry``
+        :param float timeout: the timeout to wait for the action to be executed
+        :param kwargs: optional arguments for the given action, depends if the action needs parameter. The arguments
+            are given as dict where the key is the parameter name and the value the value of the parameter.
+        :type kwargs: dict[str, str]
+        :return: returns the results of the action, if any. The results are structured as dict where the key is the
+            name of the result argument and the value is the value of the result.
+        :rtype: dict[str,str]
+        :raises ValueError: if parameters are not set correctly
+        :raises aiohttp.ClientError: when the action can not be placed on the device
+        :raises asyncio.TimeoutError: when the action time out
+        """
+        if not uri:
+            raise ValueError("No action URI has been defined.")
+
+        if not namespace:
+            raise ValueError("No namespace has been defined.")
+
+        if not action:
+            raise ValueError("No action has been defined.")
+
+        signature = self._prepareAction(namespace, action, kwargs)
+
+        # build the URL
+        location = self.protocol + "://" + self.host + ":" + str(self.port) + uri
+
+        return await self._executeAction(location, namespace, action, DeviceTR64._getSOAPTemplate(namespace, action),
+                                         signature, timeout, kwargs)
+
+    async def _executeAction(self, location, namespace, action, template, signature, timeout, arguments):
+        """Internal method to execute an action which has been prepared already.
+
+        :param str location: the full URL of the control URI
+        :param str namespace: the namespace of the action
+        :param str action: the name of the action
+        :param template: the SOAP template of the action
+        :type template: tuple(dict[str, str], str, str)
+        :param signature: the signature to convert the results with or None to not convert them
+        :type signature: ActionSignature
+        :param float timeout: the timeout to wait for the action to be executed
+        :param arguments: the arguments of the action
+        :type arguments: dict[str, str]
+        :return: the results of the action
+        :rtype: dict[str,str]
+        """
+        # build the SOAP request
+        header, body = DeviceTR64._renderSOAPRequest(template, arguments)
+
+        # Post http request
+        response, content = await self._sendRequest("POST", location, timeout, headers=header, data=body)
+
+        if response.status != 200:
+            errorStr = DeviceTR64._parseErrorString(content)
+            error = ValueError('Could not execute "' + action + str(arguments) + '": ' + str(response.status) +
+                               ' - ' + str(response.reason) + " -- " + errorStr)
+            error.upnpErrorCode = DeviceTR64._parseErrorCode(content)
+            raise error
+
+        results = DeviceTR64._parseSOAPResponse(namespace, action, content)
+
+        if signature is not None:
+            signature.convertResults(results)
+
+        return results
+
+    async def executeMany(self, actions, concurrency=None, timeout=2, deadline=None):
+        """Executes a list of actions at the same time over the shared connection pool.
+
+        The coroutine variant of :meth:`~simpletr64.DeviceTR64.executeMany`, actions which could not be executed
+        before the deadline return an :class:`asyncio.TimeoutError`.
+
+        :param actions: the actions to execute, a list of tuples ``(uri, namespace, action, kwargs)``, kwargs can be
+            omitted
+        :type actions: list[tuple]
+        :param int concurrency: the maximum amount of actions which are executed at the same time, by default the
+            :meth:`~simpletr64.DeviceTR64.poolSize`
+        :param float timeout: the timeout to wait for each action to be executed
+        :param float deadline: optional time in seconds the whole batch has to be finished in
+        :return: the results of each action or the exception it raised, in the same order as the given actions
+        :rtype: list[dict[str,str] or Exception]
+        :raises ValueError: if the concurrency is not a positive number
+        """
+        if concurrency is None:
+            concurrency = self.poolSize
+
+        if concurrency < 1:
+            raise ValueError("The concurrency needs to be at least 1.")
+
+        loop = _getRunningLoop()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        endTime = None
+        if deadline is not None:
+            endTime = loop.time() + float(deadline)
+
+        async def executeOne(item):
+            async with semaphore:
+                actionTimeout = float(timeout)
+
+                if endTime is not None:
+                    remaining = endTime - loop.time()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError('Deadline exceeded before "' + item[2] + '" could be executed.')
+
+                    actionTimeout = min(actionTimeout, remaining)
+
+                arguments = {}
+                if len(item) > 3 and item[3]:
+                    arguments = item[3]
+
+                return await self.execute(item[0], item[1], item[2], timeout=actionTimeout, **arguments)
+
+        return await asyncio.gather(*[executeOne(item) for item in actions], return_exceptions=True)
+
+    async def loadDeviceDefinitions(self, urlOfXMLDefinition, timeout=3):
+        """Loads the device definitions from a given URL which points to the root XML in the device.
+
+        The coroutine variant of :meth:`~simpletr64.DeviceTR64.loadDeviceDefinitions`.
+
+        :param str urlOfXMLDefinition: the URL to the root XML which sets the device definitions.
+        :param float timeout: the timeout for downloading
+        :raises ValueError: if the XML could not be parsed correctly
+        :raises aiohttp.ClientError: when the device definitions can not be downloaded
+        :raises asyncio.TimeoutError: when download time out
+        """
+        # some devices response differently without a User-Agent
+        headers = {"User-Agent": "Mozilla/5.0; SimpleTR64-1"}
+
+        # only get the content if it has changed since it has been loaded the last time
+        conditions = self._getDeviceDefinitionsConditions(urlOfXMLDefinition)
+        conditions.update(headers)
+
+        # get the content
+        response, content = await self._sendRequest("GET", urlOfXMLDefinition, timeout, headers=conditions)
+
+        if response.status == 304:
+            # not modified, keep what has been parsed before or take it out of the cache
+            if self._keepValidatedDeviceDefinitions(urlOfXMLDefinition):
+                return
+
+            # the cache entry is gone in the meantime
+            response, content = await self._sendRequest("GET", urlOfXMLDefinition, timeout, headers=headers)
+
+        if response.status != 200:
+            errorStr = DeviceTR64._parseErrorString(content)
+            raise ValueError('Could not get CPE definitions "' + urlOfXMLDefinition + '" : ' +
+                             str(response.status) + ' - ' + str(response.reason) + " -- " + errorStr)
+
+        self._loadDeviceDefinitions(urlOfXMLDefinition, content, response.headers)
+
+    async def loadSCPD(self, serviceType=None, timeout=3, ignoreFailures=False, concurrency=None):
+        """Load action definition(s) (Service Control Protocol Document).
+
+        The coroutine variant of :meth:`~simpletr64.DeviceTR64.loadSCPD`, if all service types get loaded the SCPD's
+        are downloaded at the same time.
+
+        :param serviceType: the serviceType for which the action definitions should be loaded or all known service
+            types if None.
+        :param float timeout: the timeout for downloading
+        :param bool ignoreFailures: if set to true and serviceType is None any failure in the iteration of loading
+            all SCPD will be ignored.
+        :param int concurrency: the maximum amount of SCPD's which are downloaded at the same time if serviceType is
+            None, by default the :meth:`~simpletr64.DeviceTR64.poolSize`
+        :raises ValueType: if the given serviceType is not known or when the definition can not be loaded or if the
+            concurrency is not a positive number.
+        :raises aiohttp.ClientError: when the scpd can not be downloaded
+        :raises asyncio.TimeoutError: when download time out
+        """
+        if serviceType is not None:
+            await self._loadSCPD(serviceType, float(timeout))
+            return
+
+        if concurrency is None:
+            concurrency = self.poolSize
+
+        if concurrency < 1:
+            raise ValueError("The concurrency needs to be at least 1.")
+
+        cachedSCPD = self._loadCachedSCPD()
+        self._resetSCPD(cachedSCPD)
+
+        serviceTypes = []
+        for serviceType in self.deviceServiceDefinitions.keys():
+            # remove any previous error
+            self.deviceServiceDefinitions[serviceType].pop("error", None)
+
+            # not taken from the cache
+            if serviceType not in cachedSCPD.keys():
+                serviceTypes.append(serviceType)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def loadOne(serviceType):
+            async with semaphore:
+                await self._loadSCPD(serviceType, float(timeout))
+
+        results = await asyncio.gather(*[loadOne(serviceType) for serviceType in serviceTypes],
+                                       return_exceptions=True)
+
+        for serviceType, result in zip(serviceTypes, results):
+            if isinstance(result, ValueError) and ignoreFailures:
+                # add a message in the structure
+                self.deviceServiceDefinitions[serviceType]["error"] = str(result)
+            elif isinstance(result, BaseException):
+                # we not ignoring this so rethrow the exception
+                raise result
+
+        # service types which keep failing do not write the cache again with every call
+        if self._hasNewSCPD(serviceTypes):
+            self._storeInCache()
+
+    async def getSCPD(self, serviceType, timeout=3):
+        """Returns the action definitions of a service type, the SCPD gets loaded if it has not been loaded before.
+
+        The coroutine variant of :meth:`~simpletr64.DeviceTR64.getSCPD`. A lazy access to
+        :meth:`~simpletr64.DeviceTR64.deviceSCPD` can not download, with :meth:`~simpletr64.DeviceTR64.lazySCPD`
+        set it takes missing SCPD's only out of the definition cache.
+
+        :param str serviceType: the service type to get the action definitions for
+        :param float timeout: the timeout for downloading
+        :return: the action definitions of the service type
+        :rtype: dict[str, dict[str, dict[str, str]]]
+        :raises ValueError: if the given serviceType is not known or when the definition can not be loaded.
+        :raises aiohttp.ClientError: when the scpd can not be downloaded
+        :raises asyncio.TimeoutError: when download time out
+        """
+        actions = self.deviceSCPD.get(serviceType)
+
+        if actions is None:
+            actions = self._takeCachedSCPD(serviceType)
+
+        if actions is None:
+            await self._loadSCPD(serviceType, float(timeout))
+            actions = self._getLoadedSCPD(serviceType)
+            self._storeInCache()
+
+        return actions
+
+    def _loadMissingSCPD(self, serviceType):
+        """Internal method to take the SCPD of a service type out of the definition cache when it gets accessed.
+
+        :param str serviceType: the service type which has been accessed
+        :return: the action definitions of the service type
+        :rtype: dict[str, dict[str, dict[str, str]]]
+        :raises KeyError: if the SCPD is not in the cache, it needs to be loaded with getSCPD()
+        """
+        actions = self._takeCachedSCPD(serviceType)
+        if actions is None:
+            raise KeyError(serviceType)
+
+        return actions
+
+    async def _loadSCPD(self, serviceType, timeout):
+        """Internal method to load the action definitions.
+
+        :param str serviceType: the service type to load
+        :param float timeout: the timeout for downloading
+        """
+        location = self._getSCPDLocation(serviceType)
+
+        # some devices response differently without a User-Agent
+        headers = {"User-Agent": "Mozilla/5.0; SimpleTR64-2"}
+
+        # only get the content if it has changed since it has been loaded the last time
+        headers.update(self._getSCPDConditions(serviceType))
+
+        # http request
+        response, content = await self._sendRequest("GET", location, timeout, headers=headers)
+
+        if response.status == 304 and self._keepValidatedSCPD(serviceType):
+            return
+
+        if response.status != 200:
+            errorStr = DeviceTR64._parseErrorString(content)
+            raise ValueError('Could not load SCPD for "' + serviceType + '" from ' + location + ': ' +
+                             str(response.status) + ' - ' + str(response.reason) + " -- " + errorStr)
+
+        self._processSCPD(serviceType, location, content, response.headers)
@@ -0,0 +1,205 @@
+import asyncio
+
+from simpletr64.discover import Discover, DiscoveryStatistics, _createSocket, _createSchedule, _parseResponse
+
+# get_running_loop is new in Python 3.7, before get_event_loop returns the running loop inside of a coroutine
+_getRunningLoop = getattr(asyncio, "get_running_loop", asyncio.get_event_loop)
+
+
+class DiscoveryStream(object):
+    """The asyncio variant of :meth:`~simpletr64.Discover.discover`, the responses are returned as they arrive.
+
+    The stream is an asynchronous iterator, it sends the search requests with the first iteration and returns every
+    response as soon as it has been received, duplicated responses of the same location are filtered. The iteration
+    ends after ``retries * timeout`` seconds or when ``expectedDevices`` hosts have responded. The follow up requests
+    for a device can run while the discovery still goes on. Use :meth:`~simpletr64.Discover.stream` to create one.
+
+    This class needs Python 3.5 or newer.
+
+    Example:
+
+    ::
+
+        async with Discover.stream(retries=3) as responses:
+            async for response in responses:
+                device = AsyncDeviceTR64.createFromURL(response.location)
+                asyncio.ensure_future(device.loadDeviceDefinitions(response.location))
+
+    :type __targets: list[tuple(str, int, list[tuple(bytes, tuple)])]
+    :type __queue: asyncio.Queue
+    :type __transports: list[tuple(asyncio.DatagramTransport, list[tuple(bytes, tuple)])]
+    :type __handles: list[asyncio.Handle]
+    :type __responses: dict[tuple(str, str), DiscoveryResponse]
+    :type __hosts: set[tuple(str, str)]
+    :type __statistics: DiscoveryStatistics
+    """
+
+    def __init__(self, service="ssdp:all", timeout=1, retries=2, ipAddress="239.255.255.250", port=1900,
+                 expectedDevices=None, statistics=None, interfaces=None, ipv6Interfaces=None,
+                 ipv6Addresses=("ff02::c", "ff05::c")):
+        """Initialize the stream, nothing is sent before the first iteration.
+
+        :param service: the service type or list of service types of devices you look for
+        :type service: str or list[str]
+        :param float timeout: the time between the retries, also the maximal time a device waits before it responds
+        :param int retries: how often should be a discovery request send
+        :param str ipAddress: the multicast ip address to use
+        :param int port: the port to use
+        :param int expectedDevices: end as soon as responses of this amount of different hosts have been received
+        :param DiscoveryStatistics statistics: counts the received, invalid and duplicated responses, asyncio
+            receives datagrams up to 256 KiB so none get truncated
+        :param list[str] interfaces: the IPv4 addresses of the local interfaces to search on, by default the interface
+            of the default route, an empty list for none
+        :param ipv6Interfaces: the names or indexes of the local interfaces to search on with IPv6, by default none
+        :type ipv6Interfaces: list[str or int]
+        :param ipv6Addresses: the IPv6 multicast addresses to search with, link-local and site-local by default
+        :type ipv6Addresses: list[str]
+        :rtype: DiscoveryStream
+        :raises ValueError: if an IPv6 interface is not known
+        """
+        self.__targets = Discover._createTargets(service, timeout, ipAddress, port, interfaces, ipv6Interfaces,
+                                                 ipv6Addresses)
+        self.__timeout = timeout
+        self.__retries = retries
+        self.__expectedDevices = expectedDevices
+        self.__queue = None
+        self.__transports = []
+        self.__handles = []
+        self.__responses = {}
+        self.__hosts = set()
+        self.__statistics = statistics if statistics is not None else DiscoveryStatistics()
+        self.__closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.__queue is None:
+            if self.__closed:
+                raise StopAsyncIteration
+
+            await self.__start()
+
+            if self.__queue is None:
+                # closed while the endpoints have been created
+                raise StopAsyncIteration
+
+        response = await self.__queue.get()
+
+        if response is None:
+            # the end stays in the queue for the next call
+            self.__queue.put_nowait(None)
+            raise StopAsyncIteration
+
+        return response
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, excType, excValue, traceback):
+        self.close()
+
+    @property
+    def responses(self):
+        """Return all responses which have been received so far, one per location and interface.
+
+        :rtype: list[DiscoveryResponse]
+        """
+        return list(self.__responses.values())
+
+    def close(self):
+        """Stop the discovery, the iteration ends after the responses which have been received already."""
+        if self.__closed:
+            return
+
+        self.__closed = True
+
+        for handle in self.__handles:
+            handle.cancel()
+
+        for transport, searchRequests in self.__transports:
+            transport.close()
+
+        if self.__queue is not None:
+            self.__queue.put_nowait(None)
+
+    async def __start(self):
+        loop = _getRunningLoop()
+
+        try:
+            for interface, family, searchRequests in self.__targets:
+                sock = _createSocket(family, interface)
+                protocol = _DiscoveryProtocol(self.__receive, interface)
+
+                try:
+                    transport, _ = await loop.create_datagram_endpoint(lambda: protocol, sock=sock)
+                except BaseException:
+                    sock.close()
+                    raise
+
+                self.__transports.append((transport, searchRequests))
+
+                if self.__closed:
+                    # closed while the endpoints have been created
+                    transport.close()
+                    return
+        except BaseException:
+            # do not leave the endpoints of the other interfaces open, the iteration ends
+            self.close()
+            raise
+
+        # the responses are only taken once all endpoints exist
+        self.__queue = asyncio.Queue()
+
+        start = loop.time()
+
+        for sendTime in _createSchedule(start, self.__timeout, self.__retries):
+            self.__handles.append(loop.call_at(sendTime, self.__send))
+
+        self.__handles.append(loop.call_at(start + self.__timeout * max(1, self.__retries), self.close))
+
+    def __send(self):
+        # all interfaces at the same time
+        for transport, searchRequests in self.__transports:
+            for message, destination in searchRequests:
+                transport.sendto(message, destination)
+
+    def __receive(self, data, interface):
+        if self.__closed or self.__queue is None:
+            # nothing has been sent yet
+            return
+
+        self.__statistics.received += 1
+
+        response = _parseResponse(data, interface)
+        if response is None:
+            self.__statistics.invalid += 1
+            return
+
+        # filter duplicated responses, the same address can belong to different devices on different interfaces
+        key = (interface, response.location)
+        if key in self.__responses.keys():
+            self.__statistics.duplicates += 1
+            return
+
+        self.__responses[key] = response
+        self.__hosts.add((interface, response.locationHost))
+        self.__queue.put_nowait(response)
+
+        if self.__expectedDevices is not None and len(self.__hosts) >= self.__expectedDevices:
+            self.close()
+
+
+class _DiscoveryProtocol(asyncio.DatagramProtocol):
+    """Internal protocol which hands the received datagrams to a :class:`DiscoveryStream`."""
+
+    def __init__(self, receive, interface):
+        self.__receive = receive
+        self.__interface = interface
+
+    def datagram_received(self, data, address):
+        self.__receive(data, self.__interface)
+
+    def error_received(self, exc):
+        # an unreachable device does not end the discovery
+        pass
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import re
+import threading
+
+from requests.auth import AuthBase
+from requests.utils import parse_dict_header
+
+
+class DigestAuth(AuthBase):
+    """HTTP digest authentication which remembers the challenge of the device between requests.
+
+    The first request to a device gets answered with a ``401`` and a challenge (realm, nonce). The challenge is kept
+    and every following request carries a pre-emptive ``Authorization`` header with an incremented nonce count, so an
+    authenticated action costs one round trip instead of two. Only when the device rejects the nonce, for example
+    because it got stale, the request is repeated with the new challenge.
+
+    One object is shared by all requests and threads of a :class:`~simpletr64.DeviceTR64`.
+
+    :type __challenge: dict[str, str]
+    :type __nonceCount: int
+    """
+
+    _hashes = {
+        "MD5": hashlib.md5,
+        "MD5-SESS": hashlib.md5,
+        "SHA-256": hashlib.sha256,
+        "SHA-256-SESS": hashlib.sha256
+    }
+
+    def __init__(self, username, password):
+        """Initialize the object.
+
+        :param str username: the username to authenticate with
+        :param str password: the password to authenticate with
+        :rtype: DigestAuth
+        """
+        self.__username = username
+        self.__password = password
+        self.__lock = threading.Lock()
+        self.__challenge = None
+        self.__nonceCount = 0
+
+    def challenge(self, authenticateHeader):
+        """Remember a new challenge sent by the device.
+
+        :param str authenticateHeader: the content of the ``WWW-Authenticate`` header
+        :return: if the header contained a usable digest challenge
+        :rtype: bool
+        """
+        if not authenticateHeader or not authenticateHeader.lower().startswith("digest "):
+            return False
+
+        challenge = parse_dict_header(re.sub(r"^digest ", "", authenticateHeader, flags=re.IGNORECASE))
+
+        if "nonce" not in challenge.keys() or "realm" not in challenge.keys():
+            return False
+
+        if challenge.get("algorithm", "MD5").upper() not in DigestAuth._hashes.keys():
+            return False
+
+        with self.__lock:
+            self.__challenge = challenge
+            self.__nonceCount = 0
+
+        return True
+
+    def authorization(self, method, uri):
+        """Build the ``Authorization`` header for a request with the last known challenge.
+
+        :param str method: the http method of the request
+        :param str uri: the path and query of the request
+        :return: the header value or None if no challenge is known yet
+        :rtype: str or None
+        """
+        with self.__lock:
+            challenge = self.__challenge
+            if challenge is None:
+                return None
+
+            self.__nonceCount += 1
+            nonceCount = "%08x" % self.__nonceCount
+
+        algorithm = challenge.get("algorithm", "MD5").upper()
+        qop = challenge.get("qop")
+        nonce = challenge["nonce"]
+        cnonce = hashlib.sha1(os.urandom(16)).hexdigest()[:16]
+
+        def digest(value):
+            return DigestAuth._hashes[algorithm](value.encode("utf-8")).hexdigest()
+
+        ha1 = digest(self.__username + ":" + challenge["realm"] + ":" + self.__password)
+        if algorithm.endswith("-SESS"):
+            ha1 = digest(ha1 + ":" + nonce + ":" + cnonce)
+
+        ha2 = digest(method + ":" + uri)
+
+        if qop and "auth" in [option.strip() for option in qop.split(",")]:
+            response = digest(ha1 + ":" + nonce + ":" + nonceCount + ":" + cnonce + ":auth:" + ha2)
+        else:
+            qop = None
+            response = digest(ha1 + ":" + nonce + ":" + ha2)
+
+        header = 'Digest username="' + self.__username + '", realm="' + challenge["realm"] + '", nonce="' + nonce + \
+                 '", uri="' + uri + '", response="' + response + '"'
+
+        if "opaque" in challenge.keys():
+            header += ', opaque="' + challenge["opaque"] + '"'
+
+        if "algorithm" in challenge.keys():
+            header += ', algorithm=' + challenge["algorithm"]
+
+        if qop:
+            header += ', qop=auth, nc=' + nonceCount + ', cnonce="' + cnonce + '"'
+
+        return header
+
+    def __call__(self, request):
+        """Add the pre-emptive authorization to a request, called by requests.
+
+        :param request: the request to authorize
+        :type request: requests.PreparedRequest
+        :rtype: requests.PreparedRequest
+        """
+        header = self.authorization(request.method, request.path_url)
+        if header is not None:
+            request.headers["Authorization"] = header
+
+        request.register_hook("response", self.__handleChallenge)
+
+        return request
+
+    def __handleChallenge(self, response, **kwargs):
+        """Repeat a request once if the device answered with a new challenge.
+
+        :param response: the response of the device
+        :type response: requests.Response
+        :rtype: requests.Response
+        """
+        if response.status_code != 401 or not self.challenge(response.headers.get("www-authenticate", "")):
+            return response
+
+        # consume the content to release the connection for the repeated request
+        response.content
+        response.close()
+
+        request = response.request.copy()
+        request.headers["Authorization"] = self.authorization(request.method, request.path_url)
+
+        newResponse = response.connection.send(request, **kwargs)
+        newResponse.history.append(response)
+        newResponse.request = request
+
+        return newResponse
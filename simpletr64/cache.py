@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import tempfile
+
+
+class DefinitionCache(object):
+    """A persistent cache of the device definitions and SCPD's of devices in a directory.
+
+    Loading the device definitions and all SCPD's of a device needs one request per service type, for an AVM Fritz Box
+    these are around 30 requests. With a cache set on a :class:`~simpletr64.DeviceTR64` the definitions and SCPD's
+    are only loaded once per device and software version. :meth:`~simpletr64.DeviceTR64.loadDeviceDefinitions` sends
+    a conditional request for the root XML, if the device answers it has not been modified the definitions are taken
+    out of the cache without parsing them. :meth:`~simpletr64.DeviceTR64.loadSCPD` and the SCPD's loaded with
+    :meth:`~simpletr64.DeviceTR64.getSCPD` or :meth:`~simpletr64.DeviceTR64.lazySCPD` take them out of the cache as
+    long as the root XML of the device has not changed. Devices which send no ETag or Last-Modified header for the
+    root XML get it downloaded every time, the SCPD's still come out of the cache.
+
+    An entry is identified by the UDN, the model number and the software version of a device and stores the digest of
+    the root XML, the device service definitions without errors, the device informations, the unknown keys and the
+    SCPD's which could be loaded as JSON file. A second entry per URL of a root XML remembers the device and the
+    validators of the root XML. The cache can be shared by many processes.
+
+    Example:
+
+    ::
+
+        device = DeviceTR64.createFromURL("http://fritz.box:49000/tr64desc.xml")
+        device.definitionCache = DefinitionCache("/var/cache/simpletr64")
+        device.loadDeviceDefinitions("http://fritz.box:49000/tr64desc.xml")
+        device.loadSCPD()
+
+    :type __directory: str
+    """
+
+    def __init__(self, directory):
+        """Initialize the cache, the directory gets created with the first entry which is stored.
+
+        :param str directory: the directory to store the entries in
+        :rtype: DefinitionCache
+        """
+        self.__directory = directory
+
+    @property
+    def directory(self):
+        """Return the directory of this cache.
+
+        :return: the directory of this cache
+        :rtype: str
+        """
+        return self.__directory
+
+    @staticmethod
+    def createKey(deviceInformations, deviceUnknownKeys):
+        """Create the key of a device from its device definitions.
+
+        :param deviceInformations: the device informations, see :meth:`~simpletr64.DeviceTR64.deviceInformations`
+        :type deviceInformations: dict[str, str]
+        :param deviceUnknownKeys: the unknown keys of the device definitions, the software version of a device
+            is announced there, see :meth:`~simpletr64.DeviceTR64.deviceInformationUnknownKeys`
+        :type deviceUnknownKeys: dict[str, str]
+        :return: the key or None if the device has no UDN
+        :rtype: str
+        """
+        if not deviceInformations.get("UDN"):
+            return None
+
+        softwareVersion = ""
+        for tag in sorted(deviceUnknownKeys.keys()):
+            tagName = tag.lower()
+
+            # Fritz Boxes announce the software version in <systemVersion><Display>
+            if tagName.endswith("}display") or tagName.endswith("softwareversion") or \
+                    tagName.endswith("firmwareversion"):
+                softwareVersion = deviceUnknownKeys[tag] or ""
+                break
+
+        key = deviceInformations["UDN"] + "|" + (deviceInformations.get("modelNumber") or "") + "|" + softwareVersion
+
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def createURLKey(urlOfXMLDefinition):
+        """Create the key of the root XML of a device, its entry refers to the entry of the device.
+
+        :param str urlOfXMLDefinition: the URL to the root XML
+        :return: the key
+        :rtype: str
+        """
+        return hashlib.sha1(("url|" + urlOfXMLDefinition).encode("utf-8")).hexdigest()
+
+    def __getPath(self, key):
+        return os.path.join(self.__directory, key + ".json")
+
+    def load(self, key):
+        """Load an entry from the cache.
+
+        :param str key: the key of the device, see :meth:`~simpletr64.DefinitionCache.createKey`
+        :return: the entry or None if the cache has no or no readable entry for this key
+        :rtype: dict
+        """
+        try:
+            with open(self.__getPath(key), "r") as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def store(self, key, entry):
+        """Store an entry in the cache, an existing entry gets replaced.
+
+        :param str key: the key of the device, see :meth:`~simpletr64.DefinitionCache.createKey`
+        :param dict entry: the entry to store
+        :raises IOError: if the entry can not be written
+        """
+        if not os.path.isdir(self.__directory):
+            os.makedirs(self.__directory)
+
+        # write to a temporary file first, readers never see a half written entry
+        handle, temporaryPath = tempfile.mkstemp(dir=self.__directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w") as f:
+                json.dump(entry, f)
+
+            if hasattr(os, "replace"):
+                os.replace(temporaryPath, self.__getPath(key))
+            else:
+                os.rename(temporaryPath, self.__getPath(key))
+        except:
+            os.remove(temporaryPath)
+            raise
+
+    def remove(self, key):
+        """Remove an entry from the cache.
+
+        :param str key: the key of the device, see :meth:`~simpletr64.DefinitionCache.createKey`
+        """
+        try:
+            os.remove(self.__getPath(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        if not os.path.isdir(self.__directory):
+            return
+
+        for name in os.listdir(self.__directory):
+            if name.endswith(".json"):
+                self.remove(name[:-len(".json")])
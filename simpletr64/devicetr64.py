@@ -1,6 +1,17 @@
-import xml.etree.ElementTree as ET
+import functools
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
 import requests
-from requests.auth import HTTPDigestAuth
+from requests.adapters import HTTPAdapter
+
+from simpletr64.auth import DigestAuth
+from simpletr64.cache import DefinitionCache
+from simpletr64.services import ServiceProxies
+from simpletr64.signature import ActionSignature
+from simpletr64.xmlparser import XMLBackend
 
 try:
     # noinspection PyCompatibility
@@ -20,6 +31,7 @@ class DeviceTR64(object):
     :type __protocol: str
     :type __username: str
     :type __password: str
+    :type __auth: DigestAuth
     :type __httpProxy: str
     :type __httpsProxy: str
     :type __deviceServiceDefinitions: dict[str, dict[str, str]]
@@ -27,7 +39,27 @@ class DeviceTR64(object):
     :type __deviceSCPD: dict[str, dict[str, dict[str, str]]]
     :type __deviceXMLInitialized: bool
     :type __deviceUnknownKeys: dict[str, str]
+    :type __deviceXMLDigest: str
+    :type __deviceXMLValidators: dict[str, str]
+    :type __scpdValidated: dict[str, dict]
+    :type __definitionCache: DefinitionCache
+    :type __lazySCPD: bool
+    :type __failedSCPD: set[str]
+    :type __signatures: dict[str, tuple(dict, dict[str, ActionSignature])]
+    :type __validateArguments: bool
+    :type __typedResults: bool
+    :type __services: ServiceProxies
+    :type __unsupportedActions: set[tuple(str, str)]
+    :type __session: requests.Session
+    :type __sessionLastUsed: float
+    :type __poolSize: int
+    :type __maxIdleTime: float
+    :type __keepAlive: bool
     """
+
+    #: rendered SOAP headers and envelope parts per (namespace, action), shared by all devices
+    _soapTemplates = {}
+
     def __init__(self, hostname, port=49000, protocol="http", verify=True):
         """Initialize a DeviceTR64 object.
 
@@ -47,6 +79,7 @@ class DeviceTR64(object):
 
         self.__username = ""
         self.__password = ""
+        self.__auth = None
 
         self.__httpProxy = ""
         self.__httpsProxy = ""
@@ -56,6 +89,30 @@ class DeviceTR64(object):
         self.__deviceSCPD = {}
         self.__deviceXMLInitialized = False
         self.__deviceUnknownKeys = {}
+        self.__deviceXMLDigest = None
+        self.__deviceXMLValidators = None
+        self.__scpdValidated = {}
+        self.__definitionCache = None
+        self.__lazySCPD = False
+        self.__failedSCPD = set()
+        self.__signatures = {}
+        self.__validateArguments = True
+        self.__typedResults = False
+        self.__services = None
+        self.__unsupportedActions = set()
+
+        self.__session = None
+        self.__sessionLock = threading.Lock()
+        self.__sessionLastUsed = 0
+        self.__poolSize = 10
+        self.__maxIdleTime = 30
+        self.__keepAlive = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
 
     @staticmethod
     def createFromURL(urlOfXMLDefinition):
@@ -115,6 +172,7 @@ class DeviceTR64(object):
     @username.setter
     def username(self, username):
         self.__username = username
+        self.__auth = None
 
     @property
     def password(self):
@@ -127,6 +185,7 @@ class DeviceTR64(object):
     @password.setter
     def password(self, password):
         self.__password = password
+        self.__auth = None
 
     @property
     def httpProxy(self):
@@ -168,6 +227,383 @@ class DeviceTR64(object):
     def httpsProxy(self, proxy):
         self.__httpsProxy = proxy
 
+    @property
+    def poolSize(self):
+        """Property to get and set the maximum amount of connections which are kept open to the device.
+
+        All requests to the device share one connection pool, the pool size limits how many connections are kept
+        alive at the same time. Changing the pool size closes all open connections.
+
+        :rtype: int
+        """
+        return self.__poolSize
+
+    @poolSize.setter
+    def poolSize(self, poolSize):
+        self.__poolSize = int(poolSize)
+        self._resetConnections()
+
+    @property
+    def maxIdleTime(self):
+        """Property to get and set the time in seconds an unused connection is kept open.
+
+        If no request has been sent to the device for longer than this time all open connections get closed before the
+        next request, as devices tend to drop idle connections silently. Set it to 0 to never close idle connections.
+
+        :rtype: float
+        """
+        return self.__maxIdleTime
+
+    @maxIdleTime.setter
+    def maxIdleTime(self, maxIdleTime):
+        self.__maxIdleTime = float(maxIdleTime)
+        self._resetConnections()
+
+    @property
+    def keepAlive(self):
+        """Property to get and set if connections to the device are kept open and reused between requests.
+
+        :rtype: bool
+        """
+        return self.__keepAlive
+
+    @keepAlive.setter
+    def keepAlive(self, keepAlive):
+        self.__keepAlive = bool(keepAlive)
+        self._resetConnections()
+
+    @property
+    def definitionCache(self):
+        """Property to get and set the cache for the device definitions and SCPD's, None to not use a cache.
+
+        With a cache :meth:`~simpletr64.DeviceTR64.loadDeviceDefinitions` takes the definitions out of the cache if
+        the device answers the root XML has not been modified, :meth:`~simpletr64.DeviceTR64.loadSCPD` downloads the
+        SCPD's only if they are not in the cache or the root XML of the device has changed since they were stored.
+
+        :rtype: DefinitionCache
+
+        .. seealso::
+
+            :class:`~simpletr64.DefinitionCache`
+        """
+        return self.__definitionCache
+
+    @definitionCache.setter
+    def definitionCache(self, cache):
+        self.__definitionCache = cache
+
+    @property
+    def lazySCPD(self):
+        """Property to get and set if SCPD's are loaded on demand, by default they are not.
+
+        If set the SCPD of a service type is downloaded and parsed the first time it is accessed in
+        :meth:`~simpletr64.DeviceTR64.deviceSCPD`, :meth:`~simpletr64.DeviceTR64.loadSCPD` does not need to be called
+        then. Only the SCPD's of the services which are used get loaded.
+
+        Example:
+
+        ::
+
+            device = DeviceTR64(...)
+            device.lazySCPD = True
+            device.loadDeviceDefinitions("http://fritz.box:49000/tr64desc.xml")
+            actions = device.deviceSCPD["urn:dslforum-org:service:Hosts:1"]
+
+        :rtype: bool
+
+        .. seealso::
+
+            :meth:`~simpletr64.DeviceTR64.getSCPD`
+        """
+        return self.__lazySCPD
+
+    @lazySCPD.setter
+    def lazySCPD(self, lazy):
+        self.__lazySCPD = bool(lazy)
+        self.__deviceSCPD = self.__createSCPD(self.__deviceSCPD)
+
+    @property
+    def validateArguments(self):
+        """Property to get and set if the arguments of an action get validated before it is executed, by default they
+        are.
+
+        The arguments can only be validated if the SCPD of the service type has been loaded. A missing or unknown
+        argument or a value which does not fit to the data type of the argument raises a ValueError in
+        :meth:`~simpletr64.DeviceTR64.execute` without sending the action to the device.
+
+        :rtype: bool
+
+        .. seealso::
+
+            :meth:`~simpletr64.DeviceTR64.getActionSignature`
+        """
+        return self.__validateArguments
+
+    @validateArguments.setter
+    def validateArguments(self, validate):
+        self.__validateArguments = bool(validate)
+
+    @property
+    def typedResults(self):
+        """Property to get and set if the results of an action get converted to Python types, by default they are not.
+
+        The results can only be converted if the SCPD of the service type has been loaded, otherwise they stay
+        strings. Integers become int, booleans bool and dates datetime.datetime, see
+        :class:`~simpletr64.ActionSignature`.
+
+        Example:
+
+        ::
+
+            device = DeviceTR64(...)
+            device.typedResults = True
+            device.loadDeviceDefinitions("http://fritz.box:49000/tr64desc.xml")
+            device.loadSCPD()
+            device.execute("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1",
+                "GetGenericHostEntry", NewIndex=1)
+            {'NewActive': False, 'NewIPAddress': '192.168.0.23', 'NewMACAddress': '9C:20:7B:E7:FF:5F',
+                'NewInterfaceType': 'Ethernet', 'NewHostName': 'Apple-TV', 'NewAddressSource': 'DHCP',
+                'NewLeaseTimeRemaining': 0}
+
+        :rtype: bool
+
+        .. seealso::
+
+            :meth:`~simpletr64.DeviceTR64.getActionSignature`
+        """
+        return self.__typedResults
+
+    @typedResults.setter
+    def typedResults(self, typed):
+        self.__typedResults = bool(typed)
+
+    def __createSCPD(self, scpd):
+        """Internal method to create the container of the SCPD's, it loads missing SCPD's if lazySCPD is set.
+
+        :param scpd: the SCPD's to put in the container
+        :type scpd: dict[str, dict[str, dict[str, str]]]
+        :rtype: dict[str, dict[str, dict[str, str]]]
+        """
+        # the services need to be generated again
+        self.__services = None
+        # the SCPD's which failed to load lazily may be loadable now
+        self.__failedSCPD = set()
+
+        if self.__lazySCPD:
+            return _LazySCPD(self._loadMissingSCPD, scpd)
+
+        return dict(scpd)
+
+    def close(self):
+        """Close all open connections to the device.
+
+        The object can still be used afterwards, a new connection gets opened with the next request. Instead of calling
+        this method the object can be used as context manager.
+
+        Example:
+
+        ::
+
+            with Lan("fritz.box") as device:
+                device.setupTR64Device("fritz.box")
+                device.getAmountOfHostsConnected()
+        """
+        self._resetConnections()
+
+    def _resetConnections(self):
+        """Internal method to close all open connections, called when the pool settings change."""
+        with self.__sessionLock:
+            if self.__session is not None:
+                self.__session.close()
+                self.__session = None
+
+    def _getSession(self):
+        """Internal method to get the http session which holds the connection pool to the device.
+
+        :return: the session of this device
+        :rtype: requests.Session
+        """
+        with self.__sessionLock:
+            now = time.time()
+
+            if self.__session is None:
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.__poolSize)
+
+                self.__session = requests.Session()
+                self.__session.mount("http://", adapter)
+                self.__session.mount("https://", adapter)
+            elif self.__maxIdleTime and now - self.__sessionLastUsed > self.__maxIdleTime:
+                # the connections have been idle for too long, closing the pools forces new connections
+                self.__session.close()
+
+            self.__sessionLastUsed = now
+
+            return self.__session
+
+    def _getAuth(self):
+        """Internal method to get the authentication of this device.
+
+        The authentication is kept to avoid a challenge round trip for every request.
+
+        :return: the authentication or None if no password is set
+        :rtype: DigestAuth
+        """
+        if not self.__password:
+            return None
+
+        auth = self.__auth
+        if auth is None:
+            auth = DigestAuth(self.__username, self.__password)
+            self.__auth = auth
+
+        return auth
+
+    def _sendRequest(self, method, location, timeout, headers=None, data=None, authenticate=True, stream=False):
+        """Internal method to send a http request to the device over the shared connection pool.
+
+        :param str method: the http method, ``GET`` or ``POST``
+        :param str location: the full URL to request
+        :param float timeout: the timeout to wait for the response
+        :param headers: optional http headers
+        :type headers: dict[str, str]
+        :param str data: optional body of the request
+        :param bool authenticate: if set to false no authentication will be used even if a password is set
+        :param bool stream: if set to true the content is not downloaded before the response is returned
+        :return: the response of the device
+        :rtype: requests.Response
+        :raises requests.exceptions.ConnectionError: when the request can not be placed on the device
+        :raises requests.exceptions.ConnectTimeout: when the request time out
+        """
+        # setup proxies
+        proxies = {}
+        if self.__httpsProxy:
+            proxies["https"] = self.__httpsProxy
+
+        if self.__httpProxy:
+            proxies["http"] = self.__httpProxy
+
+        # setup authentication
+        auth = None
+        if authenticate:
+            auth = self._getAuth()
+
+        if headers is None:
+            headers = {}
+
+        if not self.__keepAlive:
+            headers["Connection"] = "close"
+
+        return self._getSession().request(method, location, data=data, headers=headers, auth=auth, proxies=proxies,
+                                          timeout=float(timeout), verify=self.__verify, stream=stream)
+
+    def _runSteps(self, steps):
+        """Internal method to run an action method which yields the requests it needs, see :func:`_actionSteps`.
+
+        Every step gets executed and its result is sent back into the generator, an exception of a step is raised
+        inside of the generator.
+
+        :param steps: the generator of the action method
+        :return: the first value the generator yields which is not a step, None if it yields none
+        """
+        value = None
+        error = None
+
+        try:
+            while True:
+                if error is None:
+                    step = steps.send(value)
+                else:
+                    step = steps.throw(error)
+
+                if not isinstance(step, _Step):
+                    return step
+
+                try:
+                    value, error = self._runStep(step), None
+                except Exception as e:
+                    value, error = None, e
+        except StopIteration:
+            return None
+        finally:
+            steps.close()
+
+    def _runStep(self, step):
+        """Internal method to execute one step of an action method.
+
+        :param _Step step: the step
+        :return: the result of the step
+        :raises ValueError: if a document could not be downloaded
+        """
+        if isinstance(step, _Execute):
+            return self.execute(step.uri, step.namespace, step.action, timeout=step.timeout, **step.arguments)
+
+        if isinstance(step, _ExecuteMany):
+            return self.executeMany(step.actions, concurrency=step.concurrency, timeout=step.timeout)
+
+        if isinstance(step, _DownloadMany):
+            return self._downloadMany(step.downloads, step.concurrency)
+
+        return self._download(step)
+
+    def _download(self, step):
+        """Internal method to download and parse a document of the device.
+
+        :param _Download step: the download step
+        :return: the result of the parse function of the step
+        :raises ValueError: if the document could not be downloaded
+        """
+        # the location contains a session id already, the document gets parsed while it is downloaded
+        request = self._sendRequest("GET", step.location, step.timeout, authenticate=False, stream=True)
+
+        try:
+            if request.status_code != 200:
+                errorStr = DeviceTR64._extractErrorString(request)
+                raise ValueError('Could not get ' + step.name + ' "' + step.location + '" : ' +
+                                 str(request.status_code) + ' - ' + request.reason + " -- " + errorStr)
+
+            return step.parse(step.location, request.iter_content(65536))
+        finally:
+            request.close()
+
+    def _downloadMany(self, downloads, concurrency=None):
+        """Internal method to download and parse documents of the device at the same time.
+
+        :param list[_Download] downloads: the download steps
+        :param int concurrency: the maximum amount of downloads at the same time, by default the
+            :meth:`~simpletr64.DeviceTR64.poolSize`
+        :return: the result of the parse function or the exception for every download, in the same order
+        :rtype: list
+        :raises ValueError: if the concurrency is not a positive number
+        """
+        if concurrency is None:
+            concurrency = self.__poolSize
+
+        if concurrency < 1:
+            raise ValueError("The concurrency needs to be at least 1.")
+
+        results = [None] * len(downloads)
+
+        if len(downloads) < 2 or concurrency == 1:
+            # no threads needed
+            for index, download in enumerate(downloads):
+                try:
+                    results[index] = self._download(download)
+                except Exception as e:
+                    results[index] = e
+
+            return results
+
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(downloads))) as executor:
+            futures = [executor.submit(self._download, download) for download in downloads]
+
+            for index, future in enumerate(futures):
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = e
+
+        return results
+
     @property
     def deviceServiceDefinitions(self):
         """Returns all known services and dedicated URI's if loaded before.
@@ -258,15 +694,243 @@ class DeviceTR64(object):
         * ``dataType``: the data type of this parameter, these are not fixed and depend on the schema and device vendor
         * ``defaultValue``: an optional default value for this parameter
 
+        If :meth:`~simpletr64.DeviceTR64.lazySCPD` is set, the SCPD of a service type which has not been loaded yet
+        gets loaded when it is accessed by its key.
+
         :return: the loaded action definitions or empty dict if not loaded
         :rtype: dict[str, dict[str, dict[str, str]]]
 
         .. seealso::
 
-            :meth:`~simpletr64.DeviceTR64.loadSCPD`, :meth:`~simpletr64.DeviceTR64.loadDeviceDefinitions`
+            :meth:`~simpletr64.DeviceTR64.loadSCPD`, :meth:`~simpletr64.DeviceTR64.loadDeviceDefinitions`,
+            :meth:`~simpletr64.DeviceTR64.getSCPD`
         """
         return self.__deviceSCPD
 
+    @property
+    def services(self):
+        """Returns the services of the device with their actions as attributes.
+
+        The services get generated out of the device definitions and the loaded SCPD's, every action of the device can
+        be called without a wrapper of the actions module. The control URL, namespace, SOAP template and signature of
+        an action get bound once, a call is only an attribute lookup and the request to the device.
+
+        Example:
+
+        ::
+
+            device = DeviceTR64(...)
+            device.loadDeviceDefinitions("http://fritz.box:49000/tr64desc.xml")
+            device.loadSCPD()
+            device.services.Hosts.GetGenericHostEntry(NewIndex=1)
+            {'NewActive': '0', 'NewIPAddress': '192.168.0.23', 'NewMACAddress': '9C:20:7B:E7:FF:5F',
+                'NewInterfaceType': 'Ethernet', 'NewHostName': 'Apple-TV', 'NewAddressSource': 'DHCP',
+                'NewLeaseTimeRemaining': '0'}
+
+        The services are generated again after device definitions or SCPD's have been loaded, keep the result of this
+        property only as long as no definitions get loaded.
+
+        :rtype: ServiceProxies
+
+        .. seealso::
+
+            :class:`~simpletr64.ServiceProxies`, :meth:`~simpletr64.DeviceTR64.loadSCPD`,
+            :meth:`~simpletr64.DeviceTR64.lazySCPD`
+        """
+        services = self.__services
+
+        if services is None:
+            services = ServiceProxies(self)
+            self.__services = services
+
+        return services
+
+    def getSCPD(self, serviceType, timeout=3):
+        """Returns the action definitions of a service type, the SCPD gets loaded if it has not been loaded before.
+
+        With a :meth:`~simpletr64.DeviceTR64.definitionCache` the SCPD is taken out of the cache if possible, a
+        downloaded SCPD gets stored in it.
+
+        :param str serviceType: the service type to get the action definitions for
+        :param float timeout: the timeout for downloading
+        :return: the action definitions of the service type, structured as in :meth:`~simpletr64.DeviceTR64.deviceSCPD`
+        :rtype: dict[str, dict[str, dict[str, str]]]
+        :raises ValueError: if the given serviceType is not known or when the definition can not be loaded.
+        :raises requests.exceptions.ConnectionError: when the scpd can not be downloaded
+        :raises requests.exceptions.ConnectTimeout: when download time out
+
+        .. seealso::
+
+            :meth:`~simpletr64.DeviceTR64.loadSCPD`, :meth:`~simpletr64.DeviceTR64.lazySCPD`
+        """
+        actions = self.__deviceSCPD.get(serviceType)
+
+        if actions is None:
+            actions = self._takeCachedSCPD(serviceType)
+
+        if actions is None:
+            self._loadSCPD(serviceType, float(timeout))
+            actions = self._getLoadedSCPD(serviceType)
+            self._storeInCache()
+
+        return actions
+
+    def _getLoadedSCPD(self, serviceType):
+        """Internal method to get the action definitions of a service type after its SCPD has been loaded.
+
+        :param str serviceType: the service type
+        :rtype: dict[str, dict[str, dict[str, str]]]
+        :raises ValueError: if the SCPD of the service type was empty
+        """
+        actions = self.__deviceSCPD.get(serviceType)
+
+        if actions is None:
+            raise ValueError("The SCPD of '" + serviceType + "' is empty.")
+
+        return actions
+
+    def _loadMissingSCPD(self, serviceType):
+        """Internal method to load the SCPD of a service type when it gets accessed and lazySCPD is set.
+
+        :param str serviceType: the service type which has been accessed
+        :return: the action definitions of the service type
+        :rtype: dict[str, dict[str, dict[str, str]]]
+        :raises KeyError: if the service type is not known
+        """
+        if serviceType not in self.__deviceServiceDefinitions.keys():
+            raise KeyError(serviceType)
+
+        return self.getSCPD(serviceType)
+
+    def _takeCachedSCPD(self, serviceType):
+        """Internal method to take the SCPD of a service type out of the definition cache.
+
+        If the cache contains the SCPD of this service type all SCPD's which have not been loaded yet are taken out of
+        it.
+
+        :param str serviceType: the service type
+        :return: the action definitions of the service type or None if it is not in the cache
+        :rtype: dict[str, dict[str, dict[str, str]]]
+        """
+        cachedSCPD = self._loadCachedSCPD()
+        if serviceType not in cachedSCPD.keys():
+            return None
+
+        for cachedServiceType in cachedSCPD.keys():
+            self.__deviceSCPD.setdefault(cachedServiceType, cachedSCPD[cachedServiceType])
+
+        return self.__deviceSCPD[serviceType]
+
+    def getActionSignature(self, namespace, action):
+        """Returns the compiled signature of an action out of the loaded SCPD.
+
+        The signature gets compiled once per action and loaded SCPD. If :meth:`~simpletr64.DeviceTR64.lazySCPD` is set a
+        missing SCPD gets loaded, if this fails the service type is remembered and its actions are not validated
+        until the SCPD's get loaded again or lazySCPD gets set again.
+
+        :param str namespace: the namespace/service type of the action
+        :param str action: the name of the action
+        :return: the signature or None if the SCPD of the service type has not been loaded
+        :rtype: ActionSignature
+        :raises ValueError: if the SCPD of the service type has been loaded but does not define the action
+
+        .. seealso::
+
+            :meth:`~simpletr64.DeviceTR64.validateArguments`, :meth:`~simpletr64.DeviceTR64.typedResults`
+        """
+        actions = self.__deviceSCPD.get(namespace)
+
+        if actions is None:
+            if not self.__lazySCPD or namespace in self.__failedSCPD:
+                return None
+
+            try:
+                actions = self.__deviceSCPD[namespace]
+            except (KeyError, ValueError, requests.exceptions.RequestException):
+                # do not try to load it again with every action
+                self.__failedSCPD.add(namespace)
+                return None
+
+        compiled = self.__signatures.get(namespace)
+
+        # compile again if the SCPD has been loaded again
+        if compiled is None or compiled[0] is not actions:
+            compiled = (actions, {})
+            self.__signatures[namespace] = compiled
+
+        signature = compiled[1].get(action)
+
+        if signature is None:
+            if action not in actions.keys():
+                raise ValueError('Action "' + action + '" is not defined for service type: ' + namespace)
+
+            signature = ActionSignature.createFromSCPD(action, actions[action])
+            compiled[1][action] = signature
+
+        return signature
+
+    def _isActionSupported(self, namespace, action):
+        """Internal method to check if an optional action should be tried on the device.
+
+        :param str namespace: the namespace/service type of the action
+        :param str action: the name of the action
+        :return: False if the loaded SCPD of the service type does not define the action or the device has answered
+            before that it does not support it, otherwise True
+        :rtype: bool
+        """
+        if (namespace, action) in self.__unsupportedActions:
+            return False
+
+        # a lazy SCPD does not get loaded by this check
+        if namespace not in self.__deviceSCPD.keys():
+            return True
+
+        actions = self.__deviceSCPD[namespace]
+        return actions is None or action in actions.keys()
+
+    def _setActionUnsupported(self, namespace, action):
+        """Internal method to remember that the device does not support an action, it will not be tried again until
+        the device definitions get loaded again.
+
+        :param str namespace: the namespace/service type of the action
+        :param str action: the name of the action
+        """
+        self.__unsupportedActions.add((namespace, action))
+
+    @staticmethod
+    def _isUnsupportedActionError(error):
+        """Internal method to check if the device failed an action because it does not support it.
+
+        :param Exception error: the exception the execution of the action has raised
+        :return: True if the device answered with the UPnP error "Invalid Action" or "Optional Action Not
+            Implemented"
+        :rtype: bool
+        """
+        return getattr(error, "upnpErrorCode", None) in (401, 602)
+
+    def _prepareAction(self, namespace, action, arguments):
+        """Internal method to validate the arguments of an action before it gets executed.
+
+        :param str namespace: the namespace/service type of the action
+        :param str action: the name of the action
+        :param dict arguments: the arguments of the action
+        :return: the signature which is needed to convert the results or None if they will not be converted
+        :rtype: ActionSignature
+        :raises ValueError: if the arguments are not valid
+        """
+        if not self.__validateArguments and not self.__typedResults:
+            return None
+
+        signature = self.getActionSignature(namespace, action)
+
+        if signature is not None and self.__validateArguments:
+            signature.validate(arguments)
+
+        if not self.__typedResults:
+            return None
+
+        return signature
+
     def getSCDPURL(self, serviceType, default=None):
         """Returns the SCDP (Service Control Protocol Document) URL for a given service type.
 
@@ -372,9 +1036,11 @@ class DeviceTR64(object):
             are given as dict where the key is the parameter name and the value the value of the parameter.
         :type kwargs: dict[str, str]
         :return: returns the results of the action, if any. The results are structured as dict where the key is the
-            name of the result argument and the value is the value of the result.
+            name of the result argument and the value is the value of the result. The values are converted by their
+            data type if :meth:`~simpletr64.DeviceTR64.typedResults` is set.
         :rtype: dict[str,str]
-        :raises ValueError: if parameters are not set correctly
+        :raises ValueError: if parameters are not set correctly, if the SCPD of the namespace has been loaded the
+            arguments are validated before the action gets sent
         :raises requests.exceptions.ConnectionError: when the action can not be placed on the device
         :raises requests.exceptions.ConnectTimeout: when download time out
 
@@ -389,29 +1055,222 @@ class DeviceTR64(object):
                 'NewInterfaceType': 'Ethernet', 'NewHostName': 'Apple-TV', 'NewAddressSource': 'DHCP',
                 'NewLeaseTimeRemaining': '0'}
 
-        .. seealso::
+        .. seealso::
+
+            `Additional short explanation of the UPnP protocol <http://www.upnp-hacks.org/upnp.html>`_
+
+            :class:`~simpletr64.Discover`, :meth:`~simpletr64.DeviceTR64.loadDeviceDefinitions`,
+            :meth:`~simpletr64.DeviceTR64.loadSCPD`
+        """
+
+        if not uri:
+            raise ValueError("No action URI has been defined.")
+
+        if not namespace:
+            raise ValueError("No namespace has been defined.")
+
+        if not action:
+            raise ValueError("No action has been defined.")
+
+        signature = self._prepareAction(namespace, action, kwargs)
+
+        # build the URL
+        location = self.__protocol + "://" + self.__hostname + ":" + str(self.port) + uri
+
+        return self._executeAction(location, namespace, action, DeviceTR64._getSOAPTemplate(namespace, action),
+                                   signature, timeout, kwargs)
+
+    def _executeAction(self, location, namespace, action, template, signature, timeout, arguments):
+        """Internal method to execute an action which has been prepared already.
+
+        :param str location: the full URL of the control URI
+        :param str namespace: the namespace of the action
+        :param str action: the name of the action
+        :param template: the SOAP template of the action, see :meth:`~simpletr64.DeviceTR64._getSOAPTemplate`
+        :type template: tuple(dict[str, str], str, str)
+        :param signature: the signature to convert the results with or None to not convert them
+        :type signature: ActionSignature
+        :param float timeout: the timeout to wait for the action to be executed
+        :param arguments: the arguments of the action
+        :type arguments: dict[str, str]
+        :return: the results of the action
+        :rtype: dict[str,str]
+        """
+        # build the SOAP request
+        header, body = DeviceTR64._renderSOAPRequest(template, arguments)
+
+        # Post http request
+        request = self._sendRequest("POST", location, timeout, headers=header, data=body)
+
+        if request.status_code != 200:
+            errorStr = DeviceTR64._extractErrorString(request)
+            error = ValueError('Could not execute "' + action + str(arguments) + '": ' + str(request.status_code) +
+                               ' - ' + request.reason + " -- " + errorStr)
+            error.upnpErrorCode = DeviceTR64._parseErrorCode(request.content)
+            raise error
+
+        results = DeviceTR64._parseSOAPResponse(namespace, action, request.content)
+
+        if signature is not None:
+            signature.convertResults(results)
+
+        return results
+
+    def executeMany(self, actions, concurrency=None, timeout=2, deadline=None):
+        """Executes a list of actions at the same time over the shared connection pool.
+
+        Every action is given as tuple of control URI, namespace, action name and optional arguments, the same
+        parameters as for :meth:`~simpletr64.DeviceTR64.execute`. A failing action does not abort the others, instead
+        of its results the exception which has been raised is returned at its position.
+
+        :param actions: the actions to execute, a list of tuples ``(uri, namespace, action, kwargs)``, kwargs can be
+            omitted
+        :type actions: list[tuple]
+        :param int concurrency: the maximum amount of actions which are executed at the same time, by default the
+            :meth:`~simpletr64.DeviceTR64.poolSize`. A concurrency higher than the pool size opens connections which
+            will not be kept alive.
+        :param float timeout: the timeout to wait for each action to be executed
+        :param float deadline: optional time in seconds the whole batch has to be finished in, actions which could not
+            be executed in time return a :class:`requests.exceptions.Timeout`
+        :return: the results of each action or the exception it raised, in the same order as the given actions
+        :rtype: list[dict[str,str] or Exception]
+        :raises ValueError: if the concurrency is not a positive number
+
+        Example:
+
+        ::
+
+            device = DeviceTR64(...)
+            device.executeMany([("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1", "GetGenericHostEntry",
+                                 {"NewIndex": index}) for index in range(200)], concurrency=8)
+
+        .. seealso::
+
+            :meth:`~simpletr64.DeviceTR64.execute`
+        """
+        if concurrency is None:
+            concurrency = self.__poolSize
+
+        if concurrency < 1:
+            raise ValueError("The concurrency needs to be at least 1.")
+
+        actions = list(actions)
+
+        endTime = None
+        if deadline is not None:
+            endTime = time.time() + float(deadline)
+
+        def executeOne(item):
+            actionTimeout = float(timeout)
+
+            if endTime is not None:
+                remaining = endTime - time.time()
+                if remaining <= 0:
+                    raise requests.exceptions.Timeout('Deadline exceeded before "' + item[2] + '" could be executed.')
+
+                actionTimeout = min(actionTimeout, remaining)
+
+            arguments = {}
+            if len(item) > 3 and item[3]:
+                arguments = item[3]
+
+            return self.execute(item[0], item[1], item[2], timeout=actionTimeout, **arguments)
+
+        results = [None] * len(actions)
+
+        with ThreadPoolExecutor(max_workers=min(concurrency, max(len(actions), 1))) as executor:
+            futures = [executor.submit(executeOne, item) for item in actions]
+
+            for index, future in enumerate(futures):
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = e
+
+        return results
+
+    @staticmethod
+    def _buildSOAPRequest(namespace, action, arguments):
+        """Internal method to build the http headers and the SOAP envelope of an action.
+
+        The constant parts of the envelope and the headers are rendered once per namespace and action and kept in
+        :attr:`_soapTemplates`, only the escaped argument values get spliced in per call.
+
+        :param str namespace: the namespace of the action
+        :param str action: the name of the action
+        :param arguments: the arguments of the action
+        :type arguments: dict[str, str]
+        :return: the http headers and the body of the request
+        :rtype: tuple(dict[str, str], str)
+        """
+        return DeviceTR64._renderSOAPRequest(DeviceTR64._getSOAPTemplate(namespace, action), arguments)
+
+    @staticmethod
+    def _getSOAPTemplate(namespace, action):
+        """Internal method to get the rendered constant parts of a SOAP request out of :attr:`_soapTemplates`.
+
+        :param str namespace: the namespace of the action
+        :param str action: the name of the action
+        :return: the http headers, the envelope up to the arguments and the envelope after the arguments
+        :rtype: tuple(dict[str, str], str, str)
+        """
+        template = DeviceTR64._soapTemplates.get((namespace, action))
 
-            `Additional short explanation of the UPnP protocol <http://www.upnp-hacks.org/upnp.html>`_
+        if template is None:
+            template = DeviceTR64._compileSOAPTemplate(namespace, action)
+            DeviceTR64._soapTemplates[(namespace, action)] = template
 
-            :class:`~simpletr64.Discover`, :meth:`~simpletr64.DeviceTR64.loadDeviceDefinitions`,
-            :meth:`~simpletr64.DeviceTR64.loadSCPD`
+        return template
+
+    @staticmethod
+    def _renderSOAPRequest(template, arguments):
+        """Internal method to splice the arguments of an action into its SOAP template.
+
+        :param template: the SOAP template of the action
+        :type template: tuple(dict[str, str], str, str)
+        :param arguments: the arguments of the action
+        :type arguments: dict[str, str]
+        :return: the http headers and the body of the request
+        :rtype: tuple(dict[str, str], str)
         """
+        header, prefix, suffix = template
 
-        if not uri:
-            raise ValueError("No action URI has been defined.")
+        # the headers get modified per request, so hand out a copy
+        if not arguments:
+            return header.copy(), prefix + suffix
 
-        if not namespace:
-            raise ValueError("No namespace has been defined.")
+        # one piece per argument, joined once instead of copying the growing body with every argument
+        pieces = [prefix]
+        for key, value in arguments.items():
+            if value is True or value is False:
+                # UPnP booleans are 0 or 1, not True or False
+                value = "1" if value else "0"
+            elif type(value) is not str:
+                value = str(value)
 
-        if not action:
-            raise ValueError("No action has been defined.")
+            if "&" in value or "<" in value or ">" in value:
+                value = escape(value)
+            pieces.append("            <%s>%s</%s>\n" % (key, value, key))
+
+        pieces.append(suffix)
+
+        return header.copy(), "".join(pieces)
 
+    @staticmethod
+    def _compileSOAPTemplate(namespace, action):
+        """Internal method to render the constant parts of a SOAP request.
+
+        :param str namespace: the namespace of the action
+        :param str action: the name of the action
+        :return: the http headers, the envelope up to the arguments and the envelope after the arguments
+        :rtype: tuple(dict[str, str], str, str)
+        """
         # soap headers
         header = {'Content-Type': 'text/xml; charset="UTF-8"',
                   'Soapaction': '"' + namespace + "#" + action + '"'}
 
         # build SOAP body
-        body = '''<?xml version="1.0" encoding="UTF-8"?>
+        prefix = '''<?xml version="1.0" encoding="UTF-8"?>
 <s:Envelope
     s:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/"
     xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"
@@ -420,67 +1279,119 @@ class DeviceTR64(object):
     <s:Header/>
     <s:Body>\n'''
 
-        body += "        <u:" + action + ' xmlns="' + namespace + '">\n'
-
-        arguments = {}
+        prefix += "        <u:" + action + ' xmlns="' + namespace + '">\n'
 
-        for key in kwargs.keys():
-            body += "            <" + key + ">" + str(kwargs[key]) + "</" + key + ">\n"
-            arguments[key] = str(kwargs[key])
-
-        body += "        </u:" + action + ">\n"
-        body += '''</s:Body>
+        suffix = "        </u:" + action + ">\n"
+        suffix += '''</s:Body>
 </s:Envelope>'''
 
-        # setup proxies
-        proxies = {}
-        if self.__httpsProxy:
-            proxies = {"https": self.__httpsProxy}
-
-        if self.__httpProxy:
-            proxies = {"http": self.__httpProxy}
-
-        # setup authentication
-        auth = None
-        if self.__password:
-            auth = HTTPDigestAuth(self.__username, self.__password)
+        return header, prefix, suffix
 
-        # build the URL
-        location = self.__protocol + "://" + self.__hostname + ":" + str(self.port) + uri
+    @staticmethod
+    def _parseSOAPResponse(namespace, action, data):
+        """Internal method to extract the results of an action out of the SOAP response.
 
-        # Post http request
-        request = requests.post(location, data=body, headers=header, auth=auth, proxies=proxies, timeout=float(timeout),
-                               verify=self.__verify)
+        The response is parsed as a whole, SOAP responses are small and the tree gets built faster than the events of
+        a pull parser can be handled.
 
-        if request.status_code != 200:
-            errorStr = DeviceTR64._extractErrorString(request)
-            raise ValueError('Could not execute "' + action + str(arguments) + '": ' + str(request.status_code) +
-                             ' - ' + request.reason + " -- " + errorStr)
+        :param str namespace: the namespace of the action
+        :param str action: the name of the action
+        :param data: the SOAP response, see :meth:`~simpletr64.DeviceTR64._parseXML`
+        :type data: bytes or collections.Iterable[bytes]
+        :return: the results of the action
+        :rtype: dict[str,str]
+        :raises ValueError: if the response can not be parsed or does not belong to the action
+        """
+        # we need to remove XML namespace for the action node
+        namespaceLength = len(namespace) + 2  # add braces
 
-        # parse XML return
         try:
-            root = ET.fromstring(request.text.encode('utf-8'))
-        except Exception as e:
+            root = XMLBackend.getSOAPBackend().parse(data)
+        except XMLBackend.ParseError as e:
             raise ValueError("Can not parse results for the action: " + str(e))
 
         # iterate in the XML structure to get the action result
-        actionNode = root[0][0]
+        if len(root) == 0 or len(root[0]) == 0:
+            raise ValueError('Soap result structure is wrong, expected action "' + action + 'Response".')
 
-        # we need to remove XML namespace for the action node
-        namespaceLength = len(namespace) + 2  # add braces
+        actionNode = root[0][0]
         tag = actionNode.tag[namespaceLength:]
 
         if tag != (action + "Response"):
             raise ValueError('Soap result structure is wrong, expected action "' + action +
                              'Response" got "' + tag + '".')
 
-        # pack all the received results
-        results = {}
+        return dict((resultNode.tag, resultNode.text) for resultNode in actionNode)
+
+    @staticmethod
+    def _parseXML(data):
+        """Internal method to parse the raw content of a response, all XML documents of a device get parsed here.
 
-        for resultNode in actionNode:
-            results[resultNode.tag] = resultNode.text
+        The content is handed to the parser as it was received, the parser decodes it with the encoding declared in
+        the XML, so there is no need to decode and re-encode the content first.
 
-        return results
+        :param data: the raw content, either bytes or an iterator of bytes chunks like
+            :meth:`requests.Response.iter_content`
+        :type data: bytes or collections.Iterable[bytes]
+        :return: the root element of the document
+        :rtype: xml.etree.ElementTree.Element
+        :raises XMLBackend.ParseError: if the content is not valid XML
+
+        .. seealso::
+
+            :class:`~simpletr64.XMLBackend`
+        """
+        return XMLBackend.getBackend().parse(data)
+
+    @staticmethod
+    def _iterparseXML(data):
+        """Internal method to parse the raw content of a response incrementally.
+
+        :param data: the raw content, see :meth:`~simpletr64.DeviceTR64._parseXML`
+        :type data: bytes or collections.Iterable[bytes]
+        :return: a generator of ``(event, element)`` tuples for the start and end of every element, the text of an
+            element is only complete with the end event
+        :rtype: collections.Iterable[tuple(str, xml.etree.ElementTree.Element)]
+        :raises XMLBackend.ParseError: if the content is not valid XML
+        """
+        return XMLBackend.getBackend().iterparse(data)
+
+    @staticmethod
+    def _iterateListItems(url, data):
+        """Internal method to parse the list documents of AVM Fritz products, e.g. the host list, incrementally.
+
+        The values of every ``Item`` element below the root element are returned as results of an action would be,
+        the tag names are prefixed with ``New``. An item is returned as soon as it has been parsed.
+
+        :param str url: the URL the document has been loaded from
+        :param data: the raw content, see :meth:`~simpletr64.DeviceTR64._parseXML`
+        :type data: bytes or collections.Iterable[bytes]
+        :return: a generator of the values of every item
+        :rtype: collections.Iterable[dict[str, str]]
+        :raises ValueError: if the document is not valid XML
+        """
+        depth = 0
+
+        try:
+            for event, element in DeviceTR64._iterparseXML(data):
+                if event == "start":
+                    depth += 1
+                    continue
+
+                depth -= 1
+
+                # the items are the children of the root element
+                if depth == 1 and element.tag.lower() == "item":
+                    results = {}
+                    for child in element:
+                        results["New" + child.tag] = child.text or ""
+
+                    # the item is not needed anymore
+                    element.clear()
+
+                    yield results
+        except XMLBackend.ParseError as e:
+            raise ValueError("Could not parse list '" + url + "': " + str(e))
 
     @staticmethod
     def _extractErrorString(request):
@@ -491,6 +1402,16 @@ class DeviceTR64(object):
         :return: an extracted error text or empty str
         :rtype: str
         """
+        return DeviceTR64._parseErrorString(request.content)
+
+    @staticmethod
+    def _parseErrorString(data):
+        """Extract error string from the content of a failed UPnP call.
+
+        :param bytes data: the content of the failed request
+        :return: an extracted error text or empty str
+        :rtype: str
+        """
         errorStr = ""
 
         tag = None
@@ -498,13 +1419,13 @@ class DeviceTR64(object):
         # noinspection PyBroadException
         try:
             # parse XML return
-            root = ET.fromstring(request.text.encode('utf-8'))
+            root = DeviceTR64._parseXML(data)
             tag = root[0][0]
         except:
             # return an empty string as we can not parse the structure
             return errorStr
 
-        for element in tag.getiterator():
+        for element in tag.iter():
             tagName = element.tag.lower()
 
             if tagName.endswith("string"):
@@ -514,6 +1435,26 @@ class DeviceTR64(object):
 
         return errorStr
 
+    @staticmethod
+    def _parseErrorCode(data):
+        """Extract the UPnP error code from the content of a failed UPnP call.
+
+        :param bytes data: the content of the failed request
+        :return: the error code or None if there is none
+        :rtype: int
+        """
+        # noinspection PyBroadException
+        try:
+            root = DeviceTR64._parseXML(data)
+
+            for element in root[0][0].iter():
+                if element.tag.lower().endswith("errorcode"):
+                    return int(element.text)
+        except:
+            pass
+
+        return None
+
     def setupTR64Device(self, deviceType):
         """Setup actions for known devices.
 
@@ -535,6 +1476,7 @@ class DeviceTR64(object):
 
         self.__deviceServiceDefinitions = {}
         self.__deviceXMLInitialized = False
+        self.__unsupportedActions = set()
 
         # Fritz.box setup
         self.deviceServiceDefinitions["urn:dslforum-org:service:DeviceConfig:1"] = {
@@ -611,41 +1553,38 @@ class DeviceTR64(object):
             :meth:`~simpletr64.DeviceTR64.getEventSubURL`
         """
 
-        # setup proxies
-        proxies = {}
-        if self.__httpsProxy:
-            proxies = {"https": self.__httpsProxy}
-
-        if self.__httpProxy:
-            proxies = {"http": self.__httpProxy}
-
         # some devices response differently without a User-Agent
         headers = {"User-Agent": "Mozilla/5.0; SimpleTR64-1"}
 
-        # setup authentication
-        auth = None
-        if self.__password:
-            auth = HTTPDigestAuth(self.__username, self.__password)
+        # only get the content if it has changed since it has been loaded the last time
+        conditions = self._getDeviceDefinitionsConditions(urlOfXMLDefinition)
+        conditions.update(headers)
 
         # get the content
-        request = requests.get(urlOfXMLDefinition, proxies=proxies, headers=headers, timeout=float(timeout),
-                               auth=auth, verify=self.__verify)
+        request = self._sendRequest("GET", urlOfXMLDefinition, timeout, headers=conditions)
+
+        if request.status_code == 304:
+            # not modified, keep what has been parsed before or take it out of the cache
+            if self._keepValidatedDeviceDefinitions(urlOfXMLDefinition):
+                return
+
+            # the cache entry is gone in the meantime
+            request = self._sendRequest("GET", urlOfXMLDefinition, timeout, headers=headers)
 
         if request.status_code != 200:
             errorStr = DeviceTR64._extractErrorString(request)
             raise ValueError('Could not get CPE definitions "' + urlOfXMLDefinition + '" : ' +
                              str(request.status_code) + ' - ' + request.reason + " -- " + errorStr)
 
-        # parse XML return
-        xml = request.text.encode('utf-8')
-
-        return self._loadDeviceDefinitions(urlOfXMLDefinition, xml)
+        return self._loadDeviceDefinitions(urlOfXMLDefinition, request.content, request.headers)
 
-    def _loadDeviceDefinitions(self, urlOfXMLDefinition, xml):
+    def _loadDeviceDefinitions(self, urlOfXMLDefinition, xml, responseHeaders=None):
         """Internal call to parse the XML of the device definition.
 
         :param urlOfXMLDefinition: the URL to the XML device defintions
         :param xml: the XML content to parse
+        :param responseHeaders: the http headers the XML was sent with, to remember the ETag and Last-Modified
+        :type responseHeaders: dict[str, str]
         """
 
         # extract the base path of the given XML to make sure any relative URL later will be created correctly
@@ -653,20 +1592,34 @@ class DeviceTR64(object):
         baseURIPath = url.path.rpartition('/')[0] + "/"
 
         try:
-            root = ET.fromstring(xml)
+            root = DeviceTR64._parseXML(xml)
         except Exception as e:
             raise ValueError("Can not parse CPE definitions '" + urlOfXMLDefinition + "': " + str(e))
 
+        if self.__deviceInformations.get("rootURL") != urlOfXMLDefinition:
+            # the validated SCPD's belong to an other device
+            self.__scpdValidated = {}
+
         self.__deviceServiceDefinitions = {}
-        self.__deviceSCPD = {}
+        self.__deviceSCPD = self.__createSCPD({})
         self.__deviceInformations = {'rootURL': urlOfXMLDefinition}
         self.__deviceUnknownKeys = {}
         self.__deviceXMLInitialized = False
+        self.__deviceXMLValidators = DeviceTR64._getValidators(responseHeaders)
+        self.__unsupportedActions = set()
+
+        if not isinstance(xml, bytes):
+            xml = xml.encode("utf-8")
+
+        # remember the version of the definitions, cached SCPD's are only valid for the same root XML
+        self.__deviceXMLDigest = hashlib.sha1(xml).hexdigest()
 
         # iterate through all the informations
         self._iterateToFindSCPDElements(root, baseURIPath)
         self.__deviceXMLInitialized = True
 
+        self._storeDeviceDefinitionsInCache()
+
     def _iterateToFindSCPDElements(self, element, baseURIPath):
         """Internal method to iterate through device definition XML tree.
 
@@ -674,7 +1627,7 @@ class DeviceTR64(object):
         :type element: xml.etree.ElementTree.Element
         :param str baseURIPath: the base URL
         """
-        for child in element.getchildren():
+        for child in element:
             tagName = child.tag.lower()
             if tagName.endswith('servicelist'):
                 self._processServiceList(child,baseURIPath)
@@ -732,7 +1685,7 @@ class DeviceTR64(object):
         """
 
         # iterate through all children in serviceList XML tag
-        for service in serviceList.getchildren():
+        for service in serviceList:
 
             # has to be a service
             if not service.tag.lower().endswith("service"):
@@ -791,7 +1744,7 @@ class DeviceTR64(object):
             if eventURL is not None:
                 self.__deviceServiceDefinitions[serviceType]["eventSubURL"] = eventURL
 
-    def loadSCPD(self, serviceType=None, timeout=3, ignoreFailures=False):
+    def loadSCPD(self, serviceType=None, timeout=3, ignoreFailures=False, concurrency=1):
         """Load action definition(s) (Service Control Protocol Document).
 
         If the device definitions have been loaded via loadDeviceDefinitions() this method loads actions definitions.
@@ -805,10 +1758,22 @@ class DeviceTR64(object):
         :param float timeout: the timeout for downloading
         :param bool ignoreFailures: if set to true and serviceType is None any failure in the iteration of loading
             all SCPD will be ignored.
-        :raises ValueType: if the given serviceType is not known or when the definition can not be loaded.
+        :param int concurrency: the amount of SCPD's which are downloaded at the same time if serviceType is None,
+            by default they are loaded one after the other. With a concurrency higher than one all SCPD's are loaded
+            even if one fails, the failure of the first service type is raised afterwards.
+        :raises ValueType: if the given serviceType is not known or when the definition can not be loaded or if the
+            concurrency is not a positive number.
         :raises requests.exceptions.ConnectionError: when the scpd can not be downloaded
         :raises requests.exceptions.ConnectTimeout: when download time out
 
+        Example:
+
+        ::
+
+            device = DeviceTR64(...)
+            device.loadDeviceDefinitions("http://fritz.box:49000/tr64desc.xml")
+            device.loadSCPD(ignoreFailures=True, concurrency=8)
+
         .. seealso::
 
             :meth:`~simpletr64.DeviceTR64.loadDeviceDefinitions`, :meth:`~simpletr64.DeviceTR64.deviceSCPD`,
@@ -817,12 +1782,25 @@ class DeviceTR64(object):
 
         if serviceType is not None:
             self._loadSCPD(serviceType, float(timeout))
-        else:
-            self.__deviceSCPD = {}
-            for serviceType in self.__deviceServiceDefinitions.keys():
-                # remove any previous error
-                self.__deviceServiceDefinitions[serviceType].pop("error", None)
+            return
+
+        if concurrency < 1:
+            raise ValueError("The concurrency needs to be at least 1.")
+
+        cachedSCPD = self._loadCachedSCPD()
+        self._resetSCPD(cachedSCPD)
+
+        serviceTypes = []
+        for serviceType in self.__deviceServiceDefinitions.keys():
+            # remove any previous error
+            self.__deviceServiceDefinitions[serviceType].pop("error", None)
 
+            # not taken from the cache
+            if serviceType not in cachedSCPD.keys():
+                serviceTypes.append(serviceType)
+
+        if concurrency == 1 or len(serviceTypes) < 2:
+            for serviceType in serviceTypes:
                 try:
                     self._loadSCPD(serviceType, float(timeout))
                 except ValueError as e:
@@ -832,60 +1810,334 @@ class DeviceTR64(object):
                     else:
                         # add a message in the structure
                         self.__deviceServiceDefinitions[serviceType]["error"] = str(e)
+        else:
+            failures = []
+
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(serviceTypes))) as executor:
+                futures = [executor.submit(self._loadSCPD, serviceType, float(timeout))
+                           for serviceType in serviceTypes]
+
+                for serviceType, future in zip(serviceTypes, futures):
+                    try:
+                        future.result()
+                    except ValueError as e:
+                        if ignoreFailures:
+                            # add a message in the structure
+                            self.__deviceServiceDefinitions[serviceType]["error"] = str(e)
+                        else:
+                            failures.append(e)
+                    except Exception as e:
+                        failures.append(e)
+
+            if failures:
+                # we not ignoring this so rethrow the exception of the first service type which failed
+                raise failures[0]
+
+        # service types which keep failing do not write the cache again with every call
+        if self._hasNewSCPD(serviceTypes):
+            self._storeInCache()
+
+    def _resetSCPD(self, scpd):
+        """Internal method to replace all loaded SCPD's, the services get generated again with the next access.
+
+        :param scpd: the SCPD's which replace the loaded ones
+        :type scpd: dict[str, dict[str, dict[str, str]]]
+        """
+        self.__deviceSCPD = self.__createSCPD(scpd)
 
-    def _loadSCPD(self, serviceType, timeout):
-        """Internal method to load the action definitions.
+    def _getCacheKey(self):
+        """Internal method to get the key of this device in the definition cache.
 
-        :param str serviceType: the service type to load
-        :param int timeout: the timeout for downloading
+        :return: the key or None if no cache is set or the device definitions are not loaded
+        :rtype: str
         """
+        if self.__definitionCache is None or not self.__deviceXMLInitialized or self.__deviceXMLDigest is None:
+            return None
 
-        if serviceType not in self.__deviceServiceDefinitions.keys():
-            raise ValueError("Can not load SCPD, no service type defined for: " + serviceType)
+        return DefinitionCache.createKey(self.__deviceInformations, self.__deviceUnknownKeys)
 
-        if "scpdURL" not in self.__deviceServiceDefinitions[serviceType].keys():
-            raise ValueError("No SCPD URL defined for: " + serviceType)
+    def _loadCachedSCPD(self):
+        """Internal method to get the SCPD's of this device out of the definition cache.
 
-        # remove actions for given service type
-        self.__deviceSCPD.pop(serviceType, None)
+        :return: the cached SCPD's per service type, empty if there is no valid cache entry
+        :rtype: dict[str, dict[str, dict[str, str]]]
+        """
+        key = self._getCacheKey()
+        if key is None:
+            return {}
 
-        uri = self.__deviceServiceDefinitions[serviceType]["scpdURL"]
+        entry = self.__definitionCache.load(key)
 
-        # setup proxies
-        proxies = {}
-        if self.__httpsProxy:
-            proxies = {"https": self.__httpsProxy}
+        # the root XML has changed, the SCPD's might have changed as well
+        if entry is None or entry.get("deviceXMLDigest") != self.__deviceXMLDigest:
+            return {}
 
-        if self.__httpProxy:
-            proxies = {"http": self.__httpProxy}
+        scpd = entry.get("deviceSCPD", {})
 
-        # setup authentication
-        auth = None
-        if self.__password:
-            auth = HTTPDigestAuth(self.__username, self.__password)
+        # only service types which are still announced
+        return dict((serviceType, scpd[serviceType]) for serviceType in scpd.keys()
+                    if serviceType in self.__deviceServiceDefinitions.keys())
 
-        # build the URL
-        location = self.__protocol + "://" + self.__hostname + ":" + str(self.port) + uri
+    def _loadCachedDeviceDefinitions(self, urlOfXMLDefinition):
+        """Internal method to get the device definitions of a root XML out of the definition cache.
+
+        :param str urlOfXMLDefinition: the URL to the root XML
+        :return: the cached device definitions with the validators of the root XML, None if there is no valid cache
+            entry or the device has not sent validators for the root XML
+        :rtype: dict
+        """
+        if self.__definitionCache is None:
+            return None
+
+        urlEntry = self.__definitionCache.load(DefinitionCache.createURLKey(urlOfXMLDefinition))
+        if urlEntry is None or not urlEntry.get("deviceXMLValidators") or not urlEntry.get("deviceKey"):
+            return None
+
+        entry = self.__definitionCache.load(urlEntry["deviceKey"])
+
+        # the entry of the device has been replaced by an other root XML
+        if entry is None or entry.get("deviceXMLDigest") != urlEntry.get("deviceXMLDigest") or \
+                "deviceServiceDefinitions" not in entry.keys() or \
+                entry.get("deviceInformations", {}).get("rootURL") != urlOfXMLDefinition:
+            return None
+
+        entry["deviceXMLValidators"] = urlEntry["deviceXMLValidators"]
+        entry.setdefault("deviceUnknownKeys", {})
+
+        return entry
+
+    @staticmethod
+    def _getValidators(responseHeaders):
+        """Internal method to get the validators of a document out of the http headers it was sent with.
+
+        :param responseHeaders: the http headers of the response
+        :type responseHeaders: dict[str, str]
+        :return: the ETag and Last-Modified header if sent, otherwise None
+        :rtype: dict[str, str]
+        """
+        if responseHeaders is None:
+            return None
+
+        validators = {}
+
+        if responseHeaders.get("ETag"):
+            validators["If-None-Match"] = responseHeaders.get("ETag")
+
+        if responseHeaders.get("Last-Modified"):
+            validators["If-Modified-Since"] = responseHeaders.get("Last-Modified")
+
+        return validators or None
+
+    def _getDeviceDefinitionsConditions(self, urlOfXMLDefinition):
+        """Internal method to get the headers for a conditional request of the root XML.
+
+        :param str urlOfXMLDefinition: the URL to the root XML
+        :return: the http headers, empty if the root XML has not been loaded from this URL before
+        :rtype: dict[str, str]
+        """
+        if not self.__deviceXMLInitialized or self.__deviceInformations.get("rootURL") != urlOfXMLDefinition:
+            cachedDefinitions = self._loadCachedDeviceDefinitions(urlOfXMLDefinition)
+
+            if cachedDefinitions is None:
+                return {}
+
+            return dict(cachedDefinitions["deviceXMLValidators"])
+
+        if self.__deviceXMLValidators is None:
+            return {}
+
+        return dict(self.__deviceXMLValidators)
+
+    def _keepValidatedDeviceDefinitions(self, urlOfXMLDefinition):
+        """Internal method to keep the device definitions after the device answered the root XML has not been modified.
+
+        The definitions which have been loaded from this URL before are kept, otherwise they are taken out of the
+        definition cache.
+
+        :param str urlOfXMLDefinition: the URL to the root XML
+        :return: if the device definitions have been kept or taken out of the cache
+        :rtype: bool
+        """
+        if self.__deviceXMLInitialized and self.__deviceInformations.get("rootURL") == urlOfXMLDefinition:
+            return True
+
+        cachedDefinitions = self._loadCachedDeviceDefinitions(urlOfXMLDefinition)
+        if cachedDefinitions is None:
+            return False
+
+        # the validated SCPD's belong to an other device
+        self.__scpdValidated = {}
+
+        self.__deviceServiceDefinitions = cachedDefinitions["deviceServiceDefinitions"]
+        self.__deviceSCPD = self.__createSCPD({})
+        self.__deviceInformations = cachedDefinitions["deviceInformations"]
+        self.__deviceUnknownKeys = cachedDefinitions["deviceUnknownKeys"]
+        self.__deviceXMLDigest = cachedDefinitions["deviceXMLDigest"]
+        self.__deviceXMLValidators = cachedDefinitions["deviceXMLValidators"]
+        self.__unsupportedActions = set()
+        self.__deviceXMLInitialized = True
+
+        return True
+
+    def _getSCPDConditions(self, serviceType):
+        """Internal method to get the headers for a conditional request of the SCPD of a service type.
+
+        :param str serviceType: the service type
+        :return: the http headers, empty if the SCPD has not been loaded before
+        :rtype: dict[str, str]
+        """
+        validated = self.__scpdValidated.get(serviceType)
+
+        if validated is None or validated["scpdURL"] != self.__deviceServiceDefinitions[serviceType]["scpdURL"]:
+            return {}
+
+        return dict(validated["validators"])
+
+    def _keepValidatedSCPD(self, serviceType):
+        """Internal method to keep the SCPD of a service type after the device answered it has not been modified.
+
+        :param str serviceType: the service type
+        :return: if the parsed SCPD has been kept
+        :rtype: bool
+        """
+        validated = self.__scpdValidated.get(serviceType)
+        if validated is None:
+            return False
+
+        self.__deviceSCPD[serviceType] = validated["actions"]
+
+        return True
+
+    def _storeInCache(self):
+        """Internal method to store the device definitions and the loaded SCPD's in the definition cache.
+
+        The digest of the root XML, the device service definitions without errors, the device informations, the
+        unknown keys and the SCPD's of the service types which have been loaded successfully are stored. SCPD's of
+        the same root XML which are in the cache already but have not been loaded are kept.
+        """
+        key = self._getCacheKey()
+        if key is None:
+            return
+
+        scpd = self._loadCachedSCPD()
+        scpd.update((serviceType, actions) for serviceType, actions in self.__deviceSCPD.items() if actions is not None)
+
+        # errors of a single call are not part of the definitions
+        serviceDefinitions = dict((serviceType, dict((name, value) for name, value in definition.items()
+                                                     if name != "error"))
+                                  for serviceType, definition in self.__deviceServiceDefinitions.items())
+
+        self.__definitionCache.store(key, {
+            "deviceXMLDigest": self.__deviceXMLDigest,
+            "deviceServiceDefinitions": serviceDefinitions,
+            "deviceInformations": self.__deviceInformations,
+            "deviceUnknownKeys": self.__deviceUnknownKeys,
+            "deviceSCPD": scpd
+        })
+
+    def _storeDeviceDefinitionsInCache(self):
+        """Internal method to store the device definitions in the definition cache after the root XML was parsed.
+
+        The entry of the device is only written if the root XML has changed, the entry of the URL only if the device
+        has sent other validators for the root XML.
+        """
+        key = self._getCacheKey()
+        if key is None:
+            return
+
+        entry = self.__definitionCache.load(key)
+        if entry is None or entry.get("deviceXMLDigest") != self.__deviceXMLDigest or \
+                "deviceServiceDefinitions" not in entry.keys():
+            self._storeInCache()
+
+        # without validators the root XML can not be validated, it has to be downloaded anyway
+        if self.__deviceXMLValidators is None:
+            return
+
+        urlKey = DefinitionCache.createURLKey(self.__deviceInformations["rootURL"])
+        urlEntry = {
+            "deviceKey": key,
+            "deviceXMLDigest": self.__deviceXMLDigest,
+            "deviceXMLValidators": self.__deviceXMLValidators
+        }
+
+        if self.__definitionCache.load(urlKey) != urlEntry:
+            self.__definitionCache.store(urlKey, urlEntry)
+
+    def _hasNewSCPD(self, serviceTypes):
+        """Internal method to check if SCPD's have been loaded which are not in the definition cache yet.
+
+        :param list[str] serviceTypes: the service types which have not been taken out of the cache
+        :return: if the cache needs to be written
+        :rtype: bool
+        """
+        return any(serviceType in self.__deviceSCPD for serviceType in serviceTypes)
+
+    def _loadSCPD(self, serviceType, timeout):
+        """Internal method to load the action definitions.
+
+        :param str serviceType: the service type to load
+        :param int timeout: the timeout for downloading
+        """
+        location = self._getSCPDLocation(serviceType)
 
         # some devices response differently without a User-Agent
         headers = {"User-Agent": "Mozilla/5.0; SimpleTR64-2"}
 
+        # only get the content if it has changed since it has been loaded the last time
+        headers.update(self._getSCPDConditions(serviceType))
+
         # http request
-        request = requests.get(location, auth=auth, proxies=proxies, headers=headers, timeout=timeout,
-                               verify=self.__verify)
+        request = self._sendRequest("GET", location, timeout, headers=headers)
+
+        if request.status_code == 304 and self._keepValidatedSCPD(serviceType):
+            return
 
         if request.status_code != 200:
             errorStr = DeviceTR64._extractErrorString(request)
             raise ValueError('Could not load SCPD for "' + serviceType + '" from ' + location + ': ' +
                              str(request.status_code) + ' - ' + request.reason + " -- " + errorStr)
 
-        data = request.text.encode('utf-8')
+        self._processSCPD(serviceType, location, request.content, request.headers)
+
+    def _getSCPDLocation(self, serviceType):
+        """Internal method to get the full URL of the SCPD of a service type, any loaded actions get removed.
+
+        :param str serviceType: the service type to load
+        :return: the URL to the SCPD
+        :rtype: str
+        :raises ValueError: if the service type is not known or has no SCPD
+        """
+
+        if serviceType not in self.__deviceServiceDefinitions.keys():
+            raise ValueError("Can not load SCPD, no service type defined for: " + serviceType)
+
+        if "scpdURL" not in self.__deviceServiceDefinitions[serviceType].keys():
+            raise ValueError("No SCPD URL defined for: " + serviceType)
+
+        # remove actions for given service type
+        self.__deviceSCPD.pop(serviceType, None)
+
+        uri = self.__deviceServiceDefinitions[serviceType]["scpdURL"]
+
+        # build the URL
+        return self.__protocol + "://" + self.__hostname + ":" + str(self.port) + uri
+
+    def _processSCPD(self, serviceType, location, data, responseHeaders=None):
+        """Internal method to parse the action definitions of a service type.
+
+        :param str serviceType: the service type which has been loaded
+        :param str location: the URL where the SCPD has been loaded from
+        :param bytes data: the content of the SCPD
+        :param responseHeaders: the http headers the SCPD was sent with, to remember the ETag and Last-Modified
+        :type responseHeaders: dict[str, str]
+        """
         if len(data) == 0:
             return
 
         # parse XML return
         try:
-            root = ET.fromstring(data)
+            root = DeviceTR64._parseXML(data)
         except Exception as e:
             raise ValueError("Can not parse SCPD content for '" + serviceType + "' from '" + location + "': " + str(e))
 
@@ -894,7 +2146,7 @@ class DeviceTR64(object):
         variableParameterDict = {}
 
         # iterate through the full XML tree
-        for element in root.getchildren():
+        for element in root:
             tagName = element.tag.lower()
 
             # go deeper for action lists
@@ -921,6 +2173,14 @@ class DeviceTR64(object):
                     argument["defaultValue"] = variableTypes[name]["defaultValue"]
 
         self.__deviceSCPD[serviceType] = actions
+        self.__services = None
+
+        validators = DeviceTR64._getValidators(responseHeaders)
+        if validators is not None:
+            self.__scpdValidated[serviceType] = {"scpdURL": self.__deviceServiceDefinitions[serviceType]["scpdURL"],
+                                                 "validators": validators, "actions": actions}
+        else:
+            self.__scpdValidated.pop(serviceType, None)
 
     def _parseSCPDActions(self, actionListElement, actions, variableParameterDict):
         """Internal method to parse the SCPD definitions.
@@ -932,12 +2192,12 @@ class DeviceTR64(object):
         """
 
         # go through all action elements in this list
-        for actionElement in actionListElement.getchildren():
+        for actionElement in actionListElement:
 
             action = {}
 
             # go through all elements in this action
-            for inActionElement in actionElement.getchildren():
+            for inActionElement in actionElement:
                 tagName = inActionElement.tag.lower()
 
                 if tagName.endswith("name"):
@@ -945,12 +2205,12 @@ class DeviceTR64(object):
                     action["name"] = inActionElement.text
                 elif tagName.endswith("argumentlist"):
                     # parse the arguments of this action
-                    for argumentElement in inActionElement.getchildren():
+                    for argumentElement in inActionElement:
 
                         argument = {}
 
                         # go through the argument definition
-                        for inArgumentElement in argumentElement.getchildren():
+                        for inArgumentElement in argumentElement:
                             tagName = inArgumentElement.tag.lower()
 
                             if tagName.endswith("name"):
@@ -1008,12 +2268,12 @@ class DeviceTR64(object):
         """
 
         # iterate through all variables
-        for variableElement in variableListElement.getchildren():
+        for variableElement in variableListElement:
 
             variable = {}
 
             # iterate through the variable definition
-            for inVariableElement in variableElement.getchildren():
+            for inVariableElement in variableElement:
                 tagName = inVariableElement.tag.lower()
 
                 if tagName.endswith("name"):
@@ -1033,3 +2293,94 @@ class DeviceTR64(object):
                 raise ValueError("Variable has been defined multiple times: " + variable["name"])
 
             variableTypes[variable["name"]] = variable
+
+
+class _LazySCPD(dict):
+    """The SCPD's of a device which loads the SCPD of a service type when it gets accessed the first time."""
+
+    def __init__(self, loader, scpd):
+        """Initialize the SCPD's.
+
+        :param loader: function which loads the SCPD of a service type and returns its action definitions
+        :param scpd: the SCPD's which have been loaded already
+        :type scpd: dict[str, dict[str, dict[str, str]]]
+        """
+        dict.__init__(self, scpd)
+        self.__loader = loader
+
+    def __missing__(self, serviceType):
+        return self.__loader(serviceType)
+
+
+def _actionSteps(method):
+    """Internal decorator for the methods of the action classes which are written as generators.
+
+    Such a method yields a :class:`_Execute`, :class:`_ExecuteMany`, :class:`_Download` or :class:`_DownloadMany` step
+    for every request it needs and gets the result of the step back, the first value it yields which is no step is its
+    result. The device runs the steps, :class:`~simpletr64.DeviceTR64` blocks until they are done and
+    :class:`~simpletr64.AsyncDeviceTR64` returns a coroutine, so the same method serves both.
+    """
+    @functools.wraps(method)
+    def run(self, *args, **kwargs):
+        return self._runSteps(method(self, *args, **kwargs))
+
+    return run
+
+
+class _Step(object):
+    """Internal base class of the requests an action method yields, see :func:`_actionSteps`."""
+    __slots__ = ()
+
+
+class _Execute(_Step):
+    """Internal step to execute one action, results in the results of the action."""
+    __slots__ = ("uri", "namespace", "action", "timeout", "arguments")
+
+    def __init__(self, uri, namespace, action, timeout, **kwargs):
+        self.uri = uri
+        self.namespace = namespace
+        self.action = action
+        self.timeout = timeout
+        self.arguments = kwargs
+
+
+class _ExecuteMany(_Step):
+    """Internal step to execute actions at the same time, results in the list of results or exceptions."""
+    __slots__ = ("actions", "concurrency", "timeout")
+
+    def __init__(self, actions, concurrency, timeout):
+        self.actions = actions
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+
+class _Download(_Step):
+    """Internal step to download and parse a document of the device, results in the result of the parse function."""
+    __slots__ = ("location", "timeout", "name", "parse")
+
+    def __init__(self, location, timeout, name, parse):
+        """Initialize the step.
+
+        :param str location: the URL of the document, it has to contain a session id
+        :param float timeout: the timeout for downloading
+        :param str name: the name of the document for the error message
+        :param parse: the function which gets the location and the content as bytes or an iterable of bytes
+        """
+        self.location = location
+        self.timeout = timeout
+        self.name = name
+        self.parse = parse
+
+
+class _DownloadMany(_Step):
+    """Internal step to run downloads at the same time, results in the list of parse results or exceptions."""
+    __slots__ = ("downloads", "concurrency")
+
+    def __init__(self, downloads, concurrency):
+        """Initialize the step.
+
+        :param list[_Download] downloads: the downloads
+        :param int concurrency: the maximum amount of downloads at the same time, None for the pool size
+        """
+        self.downloads = downloads
+        self.concurrency = concurrency
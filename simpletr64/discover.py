@@ -3,21 +3,29 @@ from simpletr64.devicetr64 import DeviceTR64
 
 try:
     # noinspection PyCompatibility
-    from httplib import HTTPResponse
+    from urlparse import urlparse
 except ImportError:
     # noinspection PyCompatibility,PyUnresolvedReferences
-    from http.client import HTTPResponse
+    from urllib.parse import urlparse
 
 try:
     # noinspection PyCompatibility
-    from urlparse import urlparse
+    import selectors
 except ImportError:
-    # noinspection PyCompatibility,PyUnresolvedReferences
-    from urllib.parse import urlparse
+    selectors = None
 
+try:
+    # noinspection PyCompatibility,PyUnresolvedReferences
+    _stringTypes = basestring
+except NameError:
+    _stringTypes = str
+
+import codecs
+import errno
+import random
+import select
 import socket
-import xml.etree.ElementTree as ET
-from io import BytesIO
+import time
 
 import requests
 
@@ -31,24 +39,45 @@ class Discover:
         raise ValueError("This class can not be instantiated.")
 
     @staticmethod
-    def discover(service="ssdp:all", timeout=1, retries=2, ipAddress="239.255.255.250", port=1900):
+    def discover(service="ssdp:all", timeout=1, retries=2, ipAddress="239.255.255.250", port=1900,
+                 expectedDevices=None, bufferSize=65536, statistics=None, interfaces=None, ipv6Interfaces=None,
+                 ipv6Addresses=("ff02::c", "ff05::c")):
         """Discovers UPnP devices in the local network.
 
         Try to discover all devices in the local network which do support UPnP. The discovery process can fail
         for various reasons and it is recommended to do at least two discoveries, which you can specify with the
         ``retries`` parameter.
 
+        All requests are sent on one non blocking socket per interface, a retry is sent after each ``timeout`` while
+        the responses of the previous requests are still received. The discovery takes ``retries * timeout`` seconds,
+        unless ``expectedDevices`` is given, then it returns as soon as that many hosts have responded.
+
+        By default the requests are sent over the interface of the default route. With ``interfaces`` and
+        ``ipv6Interfaces`` all of the given interfaces are searched at the same time, every response tells the
+        interface it has been received on, see :meth:`~simpletr64.DiscoveryResponse.interface`. Responses with the same
+        location on different interfaces are different devices.
+
         The default ``service`` parameter tries to address all devices also if you know which kind of service type
         you are looking for you should set it as some devices do not respond or respond differently otherwise.
 
         :param service: the service type or list of service types of devices you look for
         :type service: str or list[str]
-        :param float timeout: the socket timeout for each try
+        :param float timeout: the time between the retries, also the maximal time a device waits before it responds
         :param int retries: how often should be a discovery request send
         :param str ipAddress: the multicast ip address to use
         :param int port: the port to use
+        :param int expectedDevices: return as soon as responses of this amount of different hosts have been received
+        :param int bufferSize: the size of the buffer the responses are received in, a larger response gets truncated
+        :param DiscoveryStatistics statistics: counts the received, truncated, invalid and duplicated responses
+        :param list[str] interfaces: the IPv4 addresses of the local interfaces to search on, by default the interface
+            of the default route, an empty list for none
+        :param ipv6Interfaces: the names or indexes of the local interfaces to search on with IPv6, by default none
+        :type ipv6Interfaces: list[str or int]
+        :param ipv6Addresses: the IPv6 multicast addresses to search with, link-local and site-local by default
+        :type ipv6Addresses: list[str]
         :return: a list of DiscoveryResponse objects or empty if no device was found
         :rtype: list[DiscoveryResponse]
+        :raises ValueError: if an IPv6 interface is not known
 
         Example:
           ::
@@ -62,53 +91,119 @@ class Discover:
 
             :class:`~simpletr64.DiscoveryResponse`, :meth:`~simpletr64.Discover.discoverParticularHost`
         """
+        targets = Discover._createTargets(service, timeout, ipAddress, port, interfaces, ipv6Interfaces,
+                                          ipv6Addresses)
 
-        socket.setdefaulttimeout(timeout)
+        session = _DiscoverySession(targets, bufferSize, statistics)
 
-        messages = []
+        return session.run(timeout, retries, expectedDevices)
+
+    @staticmethod
+    def _createTargets(service, timeout, ipAddress, port, interfaces, ipv6Interfaces, ipv6Addresses):
+        """Internal method to create the search requests of a discovery per interface.
 
-        if isinstance(service, str):
+        :param service: the service type or list of service types to search for
+        :type service: str or list[str]
+        :param float timeout: the time between the retries
+        :param str ipAddress: the IPv4 multicast ip address
+        :param int port: the port
+        :param list[str] interfaces: the IPv4 addresses of the interfaces, None for the default interface
+        :param ipv6Interfaces: the names or indexes of the IPv6 interfaces
+        :type ipv6Interfaces: list[str or int]
+        :param list[str] ipv6Addresses: the IPv6 multicast addresses
+        :return: per interface the interface, its address family and the requests with their destination
+        :rtype: list[tuple(str, int, list[tuple(bytes, tuple)])]
+        :raises ValueError: if an IPv6 interface is not known
+        """
+        if isinstance(service, _stringTypes):
             services = [service]
-        elif isinstance(service, list):
+        else:
             services = service
 
-        for service in services:
-            message = 'M-SEARCH * HTTP/1.1\r\nMX: 5\r\nMAN: "ssdp:discover"\r\nHOST: ' + \
-                      ipAddress + ':' + str(port) + '\r\n'
-            message += "ST: " + service + "\r\n\r\n"
-            messages.append(message)
+        targets = []
 
-        responses = {}
+        searchRequests = [(Discover._createSearchRequest(service, timeout, ipAddress, port), (ipAddress, port))
+                          for service in services]
 
-        for _ in range(retries):
+        for interface in ([None] if interfaces is None else interfaces):
+            targets.append((interface, socket.AF_INET, searchRequests))
 
-            # setup the socket
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+        for interface in (ipv6Interfaces or []):
+            index = _getInterfaceIndex(interface)
 
-            # noinspection PyAssignmentToLoopOrWithParameter
-            for _ in range(2):
+            searchRequests = [(Discover._createSearchRequest(service, timeout, address, port),
+                               (address, port, 0, index)) for address in ipv6Addresses for service in services]
 
-                # send the messages with different service types
-                for message in messages:
-                    # send message more often to make sure all devices will get it
-                    sock.sendto(message.encode('utf-8'), (ipAddress, port))
+            targets.append((interface, socket.AF_INET6, searchRequests))
 
-            while True:
-                try:
-                    # read the message until timeout
-                    data = sock.recv(1024)
-                except socket.timeout:
-                    break
-                else:
-                    # no time out, read the response data and create response object
-                    response = DiscoveryResponse(data)
-                    # filter duplicated responses
-                    responses[response.location] = response
+        return targets
+
+    @staticmethod
+    def stream(service="ssdp:all", timeout=1, retries=2, ipAddress="239.255.255.250", port=1900,
+               expectedDevices=None, statistics=None, interfaces=None, ipv6Interfaces=None,
+               ipv6Addresses=("ff02::c", "ff05::c")):
+        """Discovers UPnP devices in the local network and returns each response as soon as it arrives.
+
+        Takes the same parameters as :meth:`~simpletr64.Discover.discover` but returns an asynchronous iterator, the
+        discovery starts with the first iteration. This needs Python 3.5 or newer.
+
+        :param service: the service type or list of service types of devices you look for
+        :type service: str or list[str]
+        :param float timeout: the time between the retries, also the maximal time a device waits before it responds
+        :param int retries: how often should be a discovery request send
+        :param str ipAddress: the multicast ip address to use
+        :param int port: the port to use
+        :param int expectedDevices: end as soon as responses of this amount of different hosts have been received
+        :param DiscoveryStatistics statistics: counts the received, invalid and duplicated responses
+        :param list[str] interfaces: the IPv4 addresses of the local interfaces to search on, by default the interface
+            of the default route, an empty list for none
+        :param ipv6Interfaces: the names or indexes of the local interfaces to search on with IPv6, by default none
+        :type ipv6Interfaces: list[str or int]
+        :param ipv6Addresses: the IPv6 multicast addresses to search with, link-local and site-local by default
+        :type ipv6Addresses: list[str]
+        :return: the responses as they arrive, without duplicates
+        :rtype: DiscoveryStream
+        :raises ValueError: if an IPv6 interface is not known
+
+        Example:
+          ::
+
+            async for result in Discover.stream():
+                print("Host: " + result.locationHost + " Device definitions: " + result.location)
+
+        .. seealso::
+
+            :class:`~simpletr64.DiscoveryStream`
+        """
+        # the module needs Python 3.5
+        from simpletr64.asyncdiscover import DiscoveryStream
+
+        return DiscoveryStream(service, timeout, retries, ipAddress, port, expectedDevices, statistics, interfaces,
+                               ipv6Interfaces, ipv6Addresses)
+
+    @staticmethod
+    def _createSearchRequest(service, timeout, ipAddress, port):
+        """Internal method to create a M-SEARCH request for a service type.
+
+        :param str service: the service type to search for
+        :param float timeout: the time to wait for responses, devices delay their response by up to MX seconds
+        :param str ipAddress: the multicast ip address
+        :param int port: the port
+        :return: the request
+        :rtype: bytes
+        """
+        # the devices should have responded before the next retry, UPnP allows 1 to 5 seconds
+        maximalDelay = min(5, max(1, int(timeout)))
+
+        # IPv6 addresses need brackets in the HOST header
+        if ":" in ipAddress:
+            ipAddress = "[" + ipAddress + "]"
+
+        message = 'M-SEARCH * HTTP/1.1\r\nMX: ' + str(maximalDelay) + '\r\nMAN: "ssdp:discover"\r\nHOST: ' + \
+                  ipAddress + ':' + str(port) + '\r\n'
+        message += "ST: " + service + "\r\n\r\n"
 
-        # return a list of all responses
-        return list(responses.values())
+        return message.encode('utf-8')
 
     @staticmethod
     def discoverParticularHost(host, service="ssdp:all", deviceDefinitionURL=None, timeout=1, retries=2,
@@ -206,12 +301,12 @@ class Discover:
 
         # parse xml
         try:
-            root = ET.fromstring(request.text.encode('utf-8'))
+            root = DeviceTR64._parseXML(request.content)
         except Exception as e:
             raise ValueError("Could not parse CPE definitions for '" + bestPick.location + "': " + str(e))
 
         # find the first deviceType in the document tree
-        for element in root.getiterator():
+        for element in root.iter():
             # check if element tag name ends on deviceType, skip XML namespace
             if element.tag.lower().endswith("devicetype"):
 
@@ -304,82 +399,261 @@ class Discover:
         return 1
 
 
-class DiscoveryResponse(HTTPResponse):
+class _DiscoverySession(object):
+    """Internal class which sends the search requests of one discovery and collects the responses.
+
+    The requests and responses go over one non blocking socket per interface, all of them are polled with
+    :mod:`selectors`. The sockets own their timeout and no other socket of the process is affected.
+
+    All responses are received into one buffer which is allocated with the session, the responses are parsed out of
+    it without a copy of the datagram.
+
+    :type __targets: list[tuple(str, int, list[tuple(bytes, tuple)])]
+    :type __buffer: bytearray
+    :type __view: memoryview
+    :type __statistics: DiscoveryStatistics
+    :type __responses: dict[tuple(str, str), DiscoveryResponse]
+    :type __hosts: set[tuple(str, str)]
+    """
+
+    def __init__(self, targets, bufferSize=65536, statistics=None):
+        """Initialize the session.
+
+        :param targets: per interface the interface, its address family and the search requests to send with every
+            retry with their destination, see :meth:`~simpletr64.Discover._createTargets`
+        :type targets: list[tuple(str, int, list[tuple(bytes, tuple)])]
+        :param int bufferSize: the size of the receive buffer
+        :param DiscoveryStatistics statistics: the statistics to count the responses in, optional
+        :rtype: _DiscoverySession
+        :raises ValueError: if the buffer size is not a positive number
+        """
+        if bufferSize < 1:
+            raise ValueError("The buffer size needs to be at least 1.")
+
+        self.__targets = targets
+        self.__buffer = bytearray(bufferSize)
+        self.__view = memoryview(self.__buffer)
+        self.__statistics = statistics if statistics is not None else DiscoveryStatistics()
+        self.__responses = {}
+        self.__hosts = set()
+
+    def run(self, timeout, retries, expectedDevices=None):
+        """Send the requests and collect the responses until the time is up or the expected devices have responded.
+
+        :param float timeout: the time between the retries
+        :param int retries: how often the requests are sent
+        :param int expectedDevices: the amount of hosts after which the discovery ends early
+        :return: the responses, one per location and interface
+        :rtype: list[DiscoveryResponse]
+        """
+        sockets = []
+        selector = None
+
+        try:
+            for interface, family, searchRequests in self.__targets:
+                sockets.append((_createSocket(family, interface), interface, searchRequests))
+
+            if selectors is not None:
+                selector = selectors.DefaultSelector()
+                for sock, interface, searchRequests in sockets:
+                    selector.register(sock, selectors.EVENT_READ, interface)
+
+            interfaces = dict((sock, interface) for sock, interface, searchRequests in sockets)
+
+            start = _monotonic()
+            deadline = start + timeout * max(1, retries)
+            sendTimes = _createSchedule(start, timeout, retries)
+
+            while True:
+                now = _monotonic()
+
+                while sendTimes and sendTimes[0] <= now:
+                    sendTimes.pop(0)
+
+                    # all interfaces at the same time
+                    for sock, interface, searchRequests in sockets:
+                        self.__send(sock, searchRequests)
+
+                if expectedDevices is not None and len(self.__hosts) >= expectedDevices:
+                    break
+
+                if now >= deadline:
+                    break
+
+                wait = deadline - now
+                if sendTimes:
+                    wait = min(wait, sendTimes[0] - now)
+
+                if selector is not None:
+                    for key, events in selector.select(wait):
+                        self.__receive(key.fileobj, key.data)
+                else:
+                    for sock in select.select(list(interfaces.keys()), [], [], wait)[0]:
+                        self.__receive(sock, interfaces[sock])
+        finally:
+            if selector is not None:
+                selector.close()
+
+            for sock, interface, searchRequests in sockets:
+                sock.close()
+
+        return list(self.__responses.values())
+
+    @staticmethod
+    def __send(sock, searchRequests):
+        for message, destination in searchRequests:
+            try:
+                sock.sendto(message, destination)
+            except socket.error as e:
+                # the send buffer is full, the request is sent again anyway
+                if e.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    raise
+
+    def __receive(self, sock, interface):
+        statistics = self.__statistics
+        bufferSize = len(self.__buffer)
+
+        # read all responses which are waiting
+        while True:
+            try:
+                size = sock.recv_into(self.__buffer)
+            except socket.error as e:
+                if e.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return
+                raise
+
+            statistics.received += 1
+
+            # the rest of a larger datagram is discarded by the system
+            if size >= bufferSize:
+                statistics.truncated += 1
+
+            response = _parseResponse(self.__view[:size], interface)
+            if response is None:
+                statistics.invalid += 1
+                continue
+
+            # the same address can belong to different devices on different interfaces
+            key = (interface, response.location)
+            if key in self.__responses.keys():
+                statistics.duplicates += 1
+
+            # filter duplicated responses
+            self.__responses[key] = response
+            self.__hosts.add((interface, response.locationHost))
+
+
+class DiscoveryStatistics(object):
+    """Counts the responses of discoveries, pass the same object to every discovery to count all of them.
+
+    Example:
+
+    ::
+
+        statistics = DiscoveryStatistics()
+        Discover.discover(statistics=statistics)
+        if statistics.truncated:
+            print(str(statistics.truncated) + " responses were larger than the receive buffer")
+
+    .. seealso::
+
+        :meth:`~simpletr64.Discover.discover`, :meth:`~simpletr64.Discover.stream`
+    """
+
+    __slots__ = ("received", "truncated", "invalid", "duplicates")
+
+    def __init__(self):
+        #: the amount of datagrams which have been received
+        self.received = 0
+        #: the amount of datagrams which filled the whole receive buffer and may have been cut off
+        self.truncated = 0
+        #: the amount of datagrams which were no response with a location
+        self.invalid = 0
+        #: the amount of responses for a location which had been received already
+        self.duplicates = 0
+
+    def __repr__(self):
+        return "received: " + str(self.received) + " truncated: " + str(self.truncated) + " invalid: " + \
+               str(self.invalid) + " duplicates: " + str(self.duplicates)
+
+
+class DiscoveryResponse(object):
     """A helper class for results of discovery requests.
 
+    The response is parsed by a small parser for the HTTP headers of SSDP, the location URL gets parsed when one of
+    its parts is accessed the first time.
+
     .. seealso::
 
         :meth:`~simpletr64.Discover.discover`, :meth:`~simpletr64.Discover.discoverParticularHost`
     """
-    def __init__(self, data):
+
+    __slots__ = ("__version", "__status", "__reason", "__headers", "__location", "__usn", "__service",
+                 "__locationParts", "__interface")
+
+    def __init__(self, data, interface=None):
         """Initialize a new object.
 
-        :param data: a stream of data which contain a discovery response in the HTTP format.
-        :type data: str or list[bytes] or list[int]
+        :param data: a discovery response in the HTTP format
+        :type data: str or bytes or bytearray or memoryview
+        :param interface: the interface the response has been received on, None for the default interface
+        :type interface: str or int
         :rtype: DiscoveryResponse
+        :raises ValueError: if the data is no HTTP response
+        :raises TypeError: if the type of the data is not supported
         """
+        if isinstance(data, _stringTypes):
+            text = data
+        elif isinstance(data, (bytes, bytearray, memoryview)):
+            # HTTP headers are ISO-8859-1, every byte is a valid character
+            text = codecs.latin_1_decode(data)[0]
+        else:
+            raise TypeError("Invalid argument: " + str(type(data)))
 
-        # create a fake socket which is needed by the base class to initialize.
-        # initialize the base class
-        HTTPResponse.__init__(self, DiscoveryResponse._FakeSocket(data), 1)
-
-        # turn off any debugging in the base class
-        self.debuglevel = 0
-
-        # let the base class parse the input
-        self.begin()
+        lines = text.split("\n")
 
-        # set dedicated properties from the discovery response headers
-        self.__location = self.getheader("location")
-        self.__usn = self.getheader("usn")
-        self.__service = self.getheader("st")
+        # HTTP/1.1 200 OK
+        statusLine = lines[0].split(None, 2)
+        if len(statusLine) < 2 or not statusLine[0].startswith("HTTP/") or not statusLine[1].isdigit():
+            raise ValueError("Not a HTTP response: " + repr(lines[0][:100]))
 
-        # parse the location URL
-        urlParts = urlparse(self.location)
+        self.__version = 10 if statusLine[0] == "HTTP/1.0" else 11
+        self.__status = int(statusLine[1])
+        self.__reason = statusLine[2].strip() if len(statusLine) == 3 else ""
 
-        self.__locationProtocol = urlParts.scheme.lower()
+        headers = []
+        location = usn = service = None
 
-        self.__locationPath = urlParts.path
-        self.__locationHost = urlParts.hostname
+        for line in lines[1:]:
+            name, separator, value = line.partition(":")
 
-        # set the right port depending on if a port was given or the given protocol
-        if urlParts.port:
-            self.__locationPort = urlParts.port
-        else:
-            if self.__locationProtocol == "https":
-                self.__locationPort = 443
-            else:
-                self.__locationPort = 80
-
-    class _FakeSocket:
-        """An internal dummy socket class which emulates some interfaces."""
-        def __init__(self, data):
-            self._file = BytesIO(DiscoveryResponse._FakeSocket.getBytes(data))
-
-        # noinspection PyUnusedLocal
-        def makefile(self, *args, **kwargs):
-            """Emulate a socket interface.
-            :param args: ignore
-            :param kwargs: ignore
-            """
-            return self._file
-
-        @staticmethod
-        def getBytes(obj):
-            """Converts a given object to a list of bytes.
-
-            :param obj: object to convert
-            :type obj: str or list[bytes] or list[int]
-            :raises TypeError: if type of given object do not match
-            """
-            if isinstance(obj, str):
-                return obj.encode('utf-8')
-            elif isinstance(obj, bytes):
-                return obj
-            elif isinstance(obj, int):
-                return bytes([obj])
-            else:
-                raise TypeError("Invalid argument: " + str(type(obj)))
+            if not separator:
+                if not line.strip():
+                    # end of the headers
+                    break
+                continue
+
+            name = name.strip()
+            value = value.strip()
+            headers.append((name, value))
+
+            key = name.lower()
+            if key == "location":
+                if location is None:
+                    location = value
+            elif key == "usn":
+                if usn is None:
+                    usn = value
+            elif key == "st":
+                if service is None:
+                    service = value
+
+        self.__headers = headers
+        self.__location = location
+        self.__usn = usn
+        self.__service = service
+        self.__locationParts = None
+        self.__interface = interface
 
     @staticmethod
     def create(location, service="uuid:none", usn="none"):
@@ -394,6 +668,64 @@ class DiscoveryResponse(HTTPResponse):
         return DiscoveryResponse("HTTP/1.1 200 OK\r\nLOCATION: " + location + "\r\nST: " + service +
                                  "\r\nUSN: " + usn + "\r\n\r\n")
 
+    def __getLocationParts(self):
+        """Internal method to parse the location URL once.
+
+        :return: protocol, host, port and path of the location
+        :rtype: tuple(str, str, int, str)
+        """
+        if self.__locationParts is None:
+            urlParts = urlparse(self.__location)
+
+            protocol = urlParts.scheme.lower()
+
+            # set the right port depending on if a port was given or the given protocol
+            port = urlParts.port
+            if not port:
+                if protocol == "https":
+                    port = 443
+                else:
+                    port = 80
+
+            self.__locationParts = (protocol, urlParts.hostname, port, urlParts.path)
+
+        return self.__locationParts
+
+    @property
+    def version(self):
+        """Return the HTTP version of the response, 10 for HTTP/1.0 and 11 for HTTP/1.1.
+
+        :rtype: int
+        """
+        return self.__version
+
+    @property
+    def status(self):
+        """Return the HTTP status code of the response.
+
+        :rtype: int
+        """
+        return self.__status
+
+    @property
+    def reason(self):
+        """Return the reason phrase of the HTTP status.
+
+        :rtype: str
+        """
+        return self.__reason
+
+    @property
+    def interface(self):
+        """Return the interface the response has been received on.
+
+        This is the IPv4 address or the IPv6 interface name or index as given to
+        :meth:`~simpletr64.Discover.discover`, or None for the interface of the default route.
+
+        :rtype: str or int
+        """
+        return self.__interface
+
     @property
     def location(self):
         """Return the location of the discovery response which points to the device definitions.
@@ -439,7 +771,7 @@ class DiscoveryResponse(HTTPResponse):
 
         .. seealso: location
         """
-        return self.__locationProtocol
+        return self.__getLocationParts()[0]
 
     @property
     def locationPath(self):
@@ -452,7 +784,7 @@ class DiscoveryResponse(HTTPResponse):
 
         .. seealso: location
         """
-        return self.__locationPath
+        return self.__getLocationParts()[3]
 
     @property
     def locationHost(self):
@@ -465,7 +797,7 @@ class DiscoveryResponse(HTTPResponse):
 
         .. seealso: location
         """
-        return self.__locationHost
+        return self.__getLocationParts()[1]
 
     @property
     def locationPort(self):
@@ -479,20 +811,142 @@ class DiscoveryResponse(HTTPResponse):
 
         .. seealso: location
         """
-        return self.__locationPort
+        return self.__getLocationParts()[2]
+
+    def getheader(self, name, default=None):
+        """Return the value of a header, the name is case insensitive.
+
+        :param str name: the name of the header
+        :param default: the value if the response has no such header
+        :return: the value, the values joined with ", " if the header appears more than once
+        :rtype: str
+        """
+        name = name.lower()
+        values = [value for headerName, value in self.__headers if headerName.lower() == name]
+
+        if not values:
+            return default
+
+        return ", ".join(values)
 
-    # we override this method only to make sure it appears in the documentation
     def getheaders(self):
         """Return all headers from the response
 
         This gives the ability to access all HTTP headers of a discovery response.
 
-        :return: dict[str, str]
+        :return: the headers as ``(name, value)`` in the order of the response
+        :rtype: list[tuple(str, str)]
         """
-        return HTTPResponse.getheaders(self)
+        return list(self.__headers)
 
     def __str__(self):
         return "LOC: " + self.location + " SRV: " + self.service
 
     def __repr__(self):
         return str(self)
+
+
+# time which can not go backwards if the clock of the system gets set
+_monotonic = getattr(time, "monotonic", time.time)
+
+
+def _createSocket(family=socket.AF_INET, interface=None):
+    """Internal function to create the non blocking socket the search requests are sent and received with.
+
+    :param int family: the address family, socket.AF_INET or socket.AF_INET6
+    :param interface: the IPv4 address of the interface to send from or the name or index of the IPv6 interface,
+        None for the interface of the default route
+    :type interface: str or int
+    :rtype: socket.socket
+    """
+    sock = socket.socket(family, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+
+    try:
+        if family == socket.AF_INET6:
+            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_HOPS, 2)
+
+            if interface is not None:
+                sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_IF, _getInterfaceIndex(interface))
+        else:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+
+            if interface is not None:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+                # the responses come back to the address of the interface
+                sock.bind((interface, 0))
+
+        sock.setblocking(False)
+    except:
+        sock.close()
+        raise
+
+    return sock
+
+
+def _getInterfaceIndex(interface):
+    """Internal function to get the index of a network interface.
+
+    :param interface: the name or index of the interface
+    :type interface: str or int
+    :rtype: int
+    :raises ValueError: if the interface is not known
+    """
+    if isinstance(interface, int):
+        return interface
+
+    if interface.isdigit():
+        return int(interface)
+
+    try:
+        return socket.if_nametoindex(interface)
+    except (AttributeError, socket.error):
+        raise ValueError("Unknown network interface: " + interface)
+
+
+def _createSchedule(start, timeout, retries):
+    """Internal function to create the times the search requests are sent at.
+
+    Every retry sends the requests twice to make sure all devices get them, the second time with a random delay so
+    that many collectors do not send at the same time.
+
+    :param float start: the time of the first request
+    :param float timeout: the time between the retries
+    :param int retries: the amount of retries
+    :rtype: list[float]
+    """
+    sendTimes = []
+
+    for retry in range(retries):
+        retryStart = start + retry * timeout
+        sendTimes.append(retryStart)
+        sendTimes.append(retryStart + random.uniform(0.1, 0.3) * timeout)
+
+    return sendTimes
+
+
+def _parseResponse(data, interface=None):
+    """Internal function to parse a datagram which has been received as response to a search request.
+
+    :param bytes data: the datagram
+    :param interface: the interface the datagram has been received on
+    :type interface: str or int
+    :return: the response or None if the datagram is no valid response with a valid location
+    :rtype: DiscoveryResponse
+    """
+    try:
+        response = DiscoveryResponse(data, interface)
+    except ValueError:
+        # not a valid response, other devices on the network keep sending
+        return None
+
+    if response.location is None:
+        return None
+
+    try:
+        # the location gets parsed here, e.g. a port out of range makes the response invalid
+        response.locationPort
+    except ValueError:
+        return None
+
+    return response
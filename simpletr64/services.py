@@ -0,0 +1,267 @@
+import re
+
+
+class ServiceProxies(object):
+    """The services of a device as attributes, generated out of the device definitions and the loaded SCPD's.
+
+    A service is accessible by the name in its service type, ``urn:dslforum-org:service:Hosts:1`` becomes ``Hosts``.
+    If a device announces several services of the same type, the number of the service type gets appended,
+    ``WLANConfiguration1``, ``WLANConfiguration2`` and so on, the name without a number is the first of them. A "-"
+    in a name becomes "_", the original name and the full service type can be used as key instead.
+
+    Example:
+
+    ::
+
+        device = DeviceTR64(...)
+        device.loadDeviceDefinitions("http://fritz.box:49000/tr64desc.xml")
+        device.loadSCPD()
+        device.services.Hosts.GetGenericHostEntry(NewIndex=1)
+        device.services["urn:dslforum-org:service:Hosts:1"]["X_AVM-DE_GetHostListPath"]()
+
+    :type __device: DeviceTR64
+    :type __serviceTypes: dict[str, str]
+    """
+
+    def __init__(self, device):
+        """Initialize the services of a device.
+
+        :param DeviceTR64 device: the device with loaded device definitions
+        :rtype: ServiceProxies
+        """
+        self.__device = device
+        self.__serviceTypes = {}
+
+        numbered = []
+        for serviceType in device.deviceServiceDefinitions.keys():
+            match = _serviceTypePattern.match(serviceType)
+
+            if match is None:
+                name, number = serviceType.rpartition(":")[2], 0
+            else:
+                name, number = match.group(1), int(match.group(2))
+
+            numbered.append((name, number, serviceType))
+
+        # the lowest number gets the name without a number
+        for name, number, serviceType in sorted(numbered, reverse=True):
+            for key in (name, name + str(number)):
+                self.__serviceTypes[key] = serviceType
+                self.__serviceTypes[_attributeName(key)] = serviceType
+
+            self.__serviceTypes[serviceType] = serviceType
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        try:
+            service = self[name]
+        except KeyError:
+            raise AttributeError("Device has no service: " + name)
+
+        # the next access is a plain attribute lookup
+        setattr(self, name, service)
+        return service
+
+    def __getitem__(self, name):
+        """Return a service by its name or service type.
+
+        :param str name: the name or the service type
+        :rtype: ServiceProxy
+        :raises KeyError: if the device has no such service
+        """
+        serviceType = self.__serviceTypes[name]
+        return ServiceProxy(self.__device, serviceType, self.__device.getControlURL(serviceType))
+
+    def __contains__(self, name):
+        return name in self.__serviceTypes.keys()
+
+    def __dir__(self):
+        return sorted(set([name for name in self.__serviceTypes.keys() if _isAttributeName(name)]))
+
+    @property
+    def serviceTypes(self):
+        """Return the service types of the device by their names.
+
+        :rtype: dict[str, str]
+        """
+        return self.__serviceTypes
+
+
+class ServiceProxy(object):
+    """A service of a device with its actions as attributes, see :class:`~simpletr64.ServiceProxies`.
+
+    Actions which contain a "-" are accessible with a "_" instead or by their name as key.
+
+    :type __device: DeviceTR64
+    :type __serviceType: str
+    :type __controlURL: str
+    :type __location: str
+    :type __actions: dict[str, dict[str, dict[str, str]]]
+    """
+
+    def __init__(self, device, serviceType, controlURL):
+        """Initialize a service.
+
+        :param DeviceTR64 device: the device this service belongs to
+        :param str serviceType: the service type
+        :param str controlURL: the control URI of the service
+        :rtype: ServiceProxy
+        """
+        self.__device = device
+        self.__serviceType = serviceType
+        self.__controlURL = controlURL
+        self.__location = device.protocol + "://" + device.host + ":" + str(device.port) + controlURL
+        self.__actions = None
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        try:
+            action = self[name]
+        except KeyError:
+            raise AttributeError("Service " + self.__serviceType + " has no action: " + name)
+
+        # the next access is a plain attribute lookup
+        setattr(self, name, action)
+        return action
+
+    def __getitem__(self, name):
+        """Return an action by its name.
+
+        :param str name: the name of the action
+        :rtype: ActionProxy
+        :raises KeyError: if the service has no such action or the SCPD of the service has not been loaded
+        """
+        actions = self.__getActions()
+
+        if name not in actions.keys():
+            for action in actions.keys():
+                if _attributeName(action) == name:
+                    name = action
+                    break
+            else:
+                raise KeyError(name)
+
+        return ActionProxy(self.__device, self.__location, self.__serviceType, name,
+                           self.__device.getActionSignature(self.__serviceType, name))
+
+    def __dir__(self):
+        try:
+            return sorted(_attributeName(action) for action in self.__getActions().keys())
+        except KeyError:
+            return []
+
+    def __getActions(self):
+        if self.__actions is None:
+            try:
+                # loads the SCPD if the device loads them lazily
+                self.__actions = self.__device.deviceSCPD[self.__serviceType]
+            except KeyError:
+                raise KeyError("The SCPD of " + self.__serviceType + " has not been loaded.")
+
+        return self.__actions
+
+    @property
+    def serviceType(self):
+        """Return the service type of this service.
+
+        :rtype: str
+        """
+        return self.__serviceType
+
+    @property
+    def controlURL(self):
+        """Return the control URI of this service.
+
+        :rtype: str
+        """
+        return self.__controlURL
+
+    @property
+    def actions(self):
+        """Return the names of all actions of this service.
+
+        :rtype: list[str]
+        :raises KeyError: if the SCPD of the service has not been loaded
+        """
+        return sorted(self.__getActions().keys())
+
+
+class ActionProxy(object):
+    """An action of a service which can be called, see :class:`~simpletr64.ServiceProxies`.
+
+    The URL, the namespace, the SOAP template and the signature are bound when the proxy gets created, a call only
+    sends the action. The arguments are validated and the results are converted like in
+    :meth:`~simpletr64.DeviceTR64.execute`.
+
+    :type __device: DeviceTR64
+    :type __location: str
+    :type __namespace: str
+    :type __name: str
+    :type __signature: ActionSignature
+    :type __template: tuple(dict[str, str], str, str)
+    """
+
+    def __init__(self, device, location, namespace, name, signature):
+        """Initialize an action.
+
+        :param DeviceTR64 device: the device to execute the action on
+        :param str location: the full URL of the control URI
+        :param str namespace: the namespace/service type of the action
+        :param str name: the name of the action
+        :param ActionSignature signature: the signature of the action
+        :rtype: ActionProxy
+        """
+        self.__device = device
+        self.__location = location
+        self.__namespace = namespace
+        self.__name = name
+        self.__signature = signature
+        self.__template = device._getSOAPTemplate(namespace, name)
+
+    def __call__(self, timeout=2, **kwargs):
+        """Execute the action.
+
+        :param float timeout: the timeout to wait for the action to be executed
+        :param kwargs: the arguments of the action
+        :return: the results of the action, a coroutine with :class:`~simpletr64.AsyncDeviceTR64`
+        :rtype: dict[str, str]
+        :raises ValueError: if the arguments are not valid or the action fails
+        """
+        device = self.__device
+
+        if device.validateArguments:
+            self.__signature.validate(kwargs)
+
+        return device._executeAction(self.__location, self.__namespace, self.__name, self.__template,
+                                     self.__signature if device.typedResults else None, timeout, kwargs)
+
+    @property
+    def name(self):
+        """Return the name of the action.
+
+        :rtype: str
+        """
+        return self.__name
+
+    @property
+    def signature(self):
+        """Return the signature of the action.
+
+        :rtype: ActionSignature
+        """
+        return self.__signature
+
+
+_serviceTypePattern = re.compile(r"^urn:.*:service:(.+):(\d+)$")
+
+
+def _attributeName(name):
+    return name.replace("-", "_")
+
+
+def _isAttributeName(name):
+    return re.match(r"^[A-Za-z_][A-Za-z0-9_]*$", name) is not None
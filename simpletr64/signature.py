@@ -0,0 +1,226 @@
+import datetime
+import re
+
+try:
+    # noinspection PyCompatibility
+    from datetime import timezone
+except ImportError:
+    timezone = None
+
+
+class ActionSignature(object):
+    """The compiled signature of an action, the arguments it takes and the results it returns with their data types.
+
+    Signatures are compiled out of the SCPD of a service type, see :meth:`~simpletr64.DeviceTR64.getActionSignature`.
+    They are used by :meth:`~simpletr64.DeviceTR64.execute` to validate the arguments of an action before it gets
+    sent to the device and to convert the results into Python types.
+
+    The results are converted by data type:
+
+    * ``ui1, ui2, ui4, ui8, i1, i2, i4, i8, int``: int
+    * ``r4, r8, number, float, fixed.14.4``: float
+    * ``boolean``: bool
+    * ``date, dateTime, dateTime.tz``: datetime.datetime, with timezone if the device sends one
+    * everything else stays a str
+
+    :type __name: str
+    :type __inArguments: list[tuple(str, str)]
+    :type __outArguments: list[tuple(str, str)]
+    :type __validators: dict[str, function]
+    :type __converters: list[tuple(str, function)]
+    """
+
+    def __init__(self, name, inArguments, outArguments):
+        """Initialize and compile a signature.
+
+        :param str name: the name of the action
+        :param inArguments: the arguments of the action as ``(name, dataType)`` in the order of the SCPD
+        :type inArguments: list[tuple(str, str)]
+        :param outArguments: the results of the action as ``(name, dataType)`` in the order of the SCPD
+        :type outArguments: list[tuple(str, str)]
+        :rtype: ActionSignature
+        """
+        self.__name = name
+        self.__inArguments = list(inArguments)
+        self.__outArguments = list(outArguments)
+
+        self.__validators = dict((argumentName, _validators.get(dataType, _validateAny))
+                                 for argumentName, dataType in self.__inArguments)
+
+        # strings stay as they are, only the other results need to be converted
+        self.__converters = [(argumentName, _converters[dataType]) for argumentName, dataType in self.__outArguments
+                             if dataType in _converters.keys()]
+
+    @staticmethod
+    def createFromSCPD(name, definition):
+        """Compile the signature of an action out of its definition in the SCPD.
+
+        :param str name: the name of the action
+        :param definition: the definition of the action as in :meth:`~simpletr64.DeviceTR64.deviceSCPD`
+        :type definition: dict[str, dict[str, dict[str, str]]]
+        :return: the compiled signature
+        :rtype: ActionSignature
+        """
+        inArguments = [(argumentName, argument.get("dataType"))
+                       for argumentName, argument in definition.get("inParameter", {}).items()]
+        outArguments = [(argumentName, argument.get("dataType"))
+                        for argumentName, argument in definition.get("outParameter", {}).items()]
+
+        return ActionSignature(name, inArguments, outArguments)
+
+    @property
+    def name(self):
+        """Return the name of the action.
+
+        :rtype: str
+        """
+        return self.__name
+
+    @property
+    def inArguments(self):
+        """Return the arguments of the action as ``(name, dataType)`` in the order of the SCPD.
+
+        :rtype: list[tuple(str, str)]
+        """
+        return self.__inArguments
+
+    @property
+    def outArguments(self):
+        """Return the results of the action as ``(name, dataType)`` in the order of the SCPD.
+
+        :rtype: list[tuple(str, str)]
+        """
+        return self.__outArguments
+
+    def validate(self, arguments):
+        """Validate the arguments for this action.
+
+        :param arguments: the arguments as they would be given to :meth:`~simpletr64.DeviceTR64.execute`
+        :type arguments: dict[str, object]
+        :raises ValueError: if an argument is missing, not known or its value does not fit to its data type
+        """
+        for argumentName in arguments.keys():
+            if argumentName not in self.__validators.keys():
+                raise ValueError('Action "' + self.__name + '" has no argument "' + argumentName + '".')
+
+        for argumentName, dataType in self.__inArguments:
+            if argumentName not in arguments.keys():
+                raise ValueError('Action "' + self.__name + '" needs the argument "' + argumentName + '".')
+
+            if not self.__validators[argumentName](arguments[argumentName], dataType):
+                raise ValueError('Argument "' + argumentName + '" of action "' + self.__name + '" is not of type ' +
+                                 str(dataType) + ": " + repr(arguments[argumentName]))
+
+    def convertResults(self, results):
+        """Convert the results of this action into Python types by their data type.
+
+        Empty results of other types than string become None.
+
+        :param results: the results as returned by :meth:`~simpletr64.DeviceTR64.execute`
+        :type results: dict[str, str]
+        :return: the same dict with converted values
+        :rtype: dict[str, object]
+        :raises ValueError: if a result can not be converted to its data type
+        """
+        for argumentName, converter in self.__converters:
+            value = results.get(argumentName)
+
+            if value is None:
+                continue
+
+            value = value.strip()
+            if not value:
+                results[argumentName] = None
+                continue
+
+            try:
+                results[argumentName] = converter(value)
+            except (ValueError, KeyError, OverflowError):
+                raise ValueError('Result "' + argumentName + '" of action "' + self.__name +
+                                 '" can not be converted: ' + repr(value))
+
+        return results
+
+
+_integerRanges = {
+    "ui1": (0, 2 ** 8 - 1), "ui2": (0, 2 ** 16 - 1), "ui4": (0, 2 ** 32 - 1), "ui8": (0, 2 ** 64 - 1),
+    "i1": (-2 ** 7, 2 ** 7 - 1), "i2": (-2 ** 15, 2 ** 15 - 1), "i4": (-2 ** 31, 2 ** 31 - 1),
+    "i8": (-2 ** 63, 2 ** 63 - 1), "int": (-2 ** 31, 2 ** 31 - 1)
+}
+
+_floatTypes = ("r4", "r8", "number", "float", "fixed.14.4")
+
+_booleanValues = {"1": True, "true": True, "yes": True, "0": False, "false": False, "no": False}
+
+_dateTimePattern = re.compile(r"^(\d{4})-(\d{2})-(\d{2})(?:T(\d{2}):(\d{2}):(\d{2})(?:\.\d+)?)?"
+                              r"(Z|[+-]\d{2}:?\d{2})?$")
+
+
+def _validateAny(value, dataType):
+    return True
+
+
+def _validateInteger(value, dataType):
+    if isinstance(value, float):
+        return False
+
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return False
+
+    minimum, maximum = _integerRanges[dataType]
+    return minimum <= value <= maximum
+
+
+def _validateFloat(value, dataType):
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+
+    return True
+
+
+def _validateBoolean(value, dataType):
+    if isinstance(value, bool):
+        return True
+
+    return str(value).strip().lower() in _booleanValues.keys()
+
+
+def _convertBoolean(value):
+    return _booleanValues[value.lower()]
+
+
+def _convertDateTime(value):
+    match = _dateTimePattern.match(value)
+
+    if match is None:
+        raise ValueError("Not a date: " + value)
+
+    fields = [int(field) if field else 0 for field in match.groups()[:6]]
+    result = datetime.datetime(*fields)
+
+    zone = match.group(7)
+    if zone and timezone is not None:
+        if zone == "Z":
+            return result.replace(tzinfo=timezone.utc)
+
+        offset = datetime.timedelta(hours=int(zone[1:3]), minutes=int(zone[-2:]))
+        if zone[0] == "-":
+            offset = -offset
+
+        result = result.replace(tzinfo=timezone(offset))
+
+    return result
+
+
+_validators = dict([(dataType, _validateInteger) for dataType in _integerRanges.keys()] +
+                   [(dataType, _validateFloat) for dataType in _floatTypes] +
+                   [("boolean", _validateBoolean)])
+
+_converters = dict([(dataType, int) for dataType in _integerRanges.keys()] +
+                   [(dataType, float) for dataType in _floatTypes] +
+                   [("boolean", _convertBoolean)] +
+                   [(dataType, _convertDateTime) for dataType in ("date", "dateTime", "dateTime.tz")])
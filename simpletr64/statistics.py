@@ -0,0 +1,475 @@
+import array
+import itertools
+import time
+
+try:
+    # noinspection PyUnresolvedReferences
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class CounterTracker(object):
+    """Turns successive samples of a monotonic counter into deltas and rates.
+
+    The byte and packet counters of devices, as returned by :meth:`~simpletr64.actions.Wan.getByteStatistic`,
+    :meth:`~simpletr64.actions.Lan.getEthernetStatistic` or :meth:`~simpletr64.actions.Wifi.getPacketStatistic`, are
+    totals which are mostly 32 bit wide. On a gigabit line such a counter wraps around every 34 seconds. A tracker
+    keeps the last sample of one counter and decides for every new sample which is lower than the last one if the
+    counter has wrapped around or if it has been reset by a reboot of the device:
+
+    * if the uptime of the device is given, see :meth:`~simpletr64.actions.SystemInfo.uptime`, a decreasing uptime
+      is a reboot and everything else a wrap around
+    * without uptime a wrap around is assumed, unless the rate it would lead to is higher than the maximum rate
+
+    A counter which wraps around more than once between two samples can not be detected, the samples need to be taken
+    more often than the counter wraps around at the maximal rate.
+
+    A tracker has no instance dictionary and only keeps numbers of the last sample, a collector can keep one tracker
+    per counter and device.
+
+    Example:
+
+    ::
+
+        tracker = CounterTracker(width=32, maximumRate=125000000)
+
+        while True:
+            sent, received = wan.getByteStatistic()
+            rate = tracker.update(received, uptime=system.getSystemInfo().uptime)
+            # rate is None for the first sample and after a reboot
+            time.sleep(5)
+    """
+
+    __slots__ = ("__modulus", "__maximumRate", "__value", "__timestamp", "__uptime", "__delta", "__rate", "__total",
+                 "__wraps", "__resets")
+
+    def __init__(self, width=32, maximumRate=None):
+        """Initialize a tracker without any sample.
+
+        :param int width: the width of the counter in bits, 64 for the 64 bit counters of
+            :meth:`~simpletr64.actions.Wan.getStatistic`
+        :param float maximumRate: the highest rate per second the counter can increase with, for example the line
+            speed in bytes per second. Used to decide between a wrap around and a reset if no uptime is given, by
+            default every decrease without a lower uptime is a wrap around
+        :rtype: CounterTracker
+        :raises ValueError: if the width is not a positive number
+        """
+        if width < 1:
+            raise ValueError("The width of a counter needs to be at least 1 bit.")
+
+        self.__modulus = 2 ** width
+        self.__maximumRate = maximumRate
+        self.__wraps = 0
+        self.__resets = 0
+        self.__total = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the last sample, the next sample starts the tracking again. The counts and total are kept."""
+        self.__value = None
+        self.__timestamp = None
+        self.__uptime = None
+        self.__delta = None
+        self.__rate = None
+
+    def update(self, value, timestamp=None, uptime=None):
+        """Add the next sample of the counter.
+
+        :param int value: the current value of the counter
+        :param float timestamp: the time the value has been taken in seconds, by default now as seconds since the
+            epoch, :meth:`~simpletr64.actions.WanStatistic.timestamp` for example
+        :param int uptime: the uptime of the device in seconds when the value has been taken, optional
+        :return: the rate per second since the last sample or None for the first sample, after a reset of the counter
+            or if no time has passed
+        :rtype: float
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        lastValue = self.__value
+        lastTimestamp = self.__timestamp
+        lastUptime = self.__uptime
+
+        self.__value = value
+        self.__timestamp = timestamp
+        self.__uptime = uptime
+
+        if lastValue is None:
+            self.__delta = None
+            self.__rate = None
+            return None
+
+        elapsed = timestamp - lastTimestamp
+
+        if uptime is not None and lastUptime is not None:
+            if uptime < lastUptime:
+                delta = None
+            elif value >= lastValue:
+                delta = value - lastValue
+            else:
+                delta = value + self.__modulus - lastValue
+        elif value >= lastValue:
+            delta = value - lastValue
+        else:
+            # lower value but no reboot known, a wrap around unless the rate is not possible
+            delta = value + self.__modulus - lastValue
+
+            if self.__maximumRate is not None and elapsed > 0 and delta > self.__maximumRate * elapsed:
+                delta = None
+
+        if delta is None:
+            # the counter started again at 0
+            self.__resets += 1
+            self.__total += value
+            self.__delta = None
+            self.__rate = None
+            return None
+
+        if value < lastValue:
+            self.__wraps += 1
+
+        self.__delta = delta
+        self.__total += delta
+
+        if elapsed > 0:
+            self.__rate = delta / float(elapsed)
+        else:
+            self.__rate = None
+
+        return self.__rate
+
+    @property
+    def value(self):
+        """Return the last value of the counter.
+
+        :return: the last value or None if there is no sample
+        :rtype: int
+        """
+        return self.__value
+
+    @property
+    def timestamp(self):
+        """Return the time of the last sample.
+
+        :return: the time of the last sample or None if there is no sample
+        :rtype: float
+        """
+        return self.__timestamp
+
+    @property
+    def delta(self):
+        """Return the increase of the counter between the last two samples.
+
+        :return: the increase or None for the first sample and after a reset of the counter
+        :rtype: int
+        """
+        return self.__delta
+
+    @property
+    def rate(self):
+        """Return the rate per second between the last two samples.
+
+        :return: the rate or None for the first sample, after a reset of the counter or if no time has passed
+        :rtype: float
+        """
+        return self.__rate
+
+    @property
+    def total(self):
+        """Return the sum of all increases since the first sample, after a reset the value counts as increase.
+
+        :return: the sum of all increases
+        :rtype: int
+        """
+        return self.__total
+
+    @property
+    def wraps(self):
+        """Return how often the counter has wrapped around.
+
+        :return: the amount of wrap arounds
+        :rtype: int
+        """
+        return self.__wraps
+
+    @property
+    def resets(self):
+        """Return how often the counter has been reset, by a reboot of the device for example.
+
+        :return: the amount of resets
+        :rtype: int
+        """
+        return self.__resets
+
+
+class RingBuffer(object):
+    """A fixed size time series of one metric, the oldest sample gets overwritten when the buffer is full.
+
+    The samples are kept in two preallocated arrays of the standard library, timestamps and values, instead of lists of
+    Python objects. A buffer for 24 hours of a metric which is polled every 5 seconds needs less than 300 KB. If
+    `NumPy <https://numpy.org/>`_ is installed the aggregations are computed by it, otherwise by the builtin
+    functions.
+
+    All aggregations take an optional start time, only the samples since then are taken into account. The timestamps of
+    the samples need to increase, the window is found by a binary search.
+
+    Example:
+
+    ::
+
+        buffer = RingBuffer(24 * 60 * 60 // 5)
+        tracker = CounterTracker()
+
+        # every 5 seconds
+        rate = tracker.update(lan.getEthernetStatistic().bytesReceived)
+        if rate is not None:
+            buffer.append(rate, tracker.timestamp)
+
+        # the dashboard
+        buffer.average(since=time.time() - 3600)
+        buffer.percentile(95, since=time.time() - 3600)
+
+    :type __values: array.array
+    :type __timestamps: array.array
+    """
+
+    def __init__(self, capacity, typecode="d", useNumPy=None):
+        """Initialize an empty buffer, the memory for all samples is allocated at once.
+
+        :param int capacity: the maximal amount of samples
+        :param str typecode: the type of the values as in :mod:`array`, by default double precision floats
+        :param bool useNumPy: if NumPy should be used, by default if it is installed
+        :rtype: RingBuffer
+        :raises ValueError: if the capacity is not a positive number or NumPy should be used but is not installed
+        """
+        if capacity < 1:
+            raise ValueError("The capacity needs to be at least 1.")
+
+        if useNumPy is None:
+            useNumPy = numpy is not None
+        elif useNumPy and numpy is None:
+            raise ValueError("NumPy is not installed.")
+
+        self.__capacity = capacity
+        self.__useNumPy = useNumPy
+        self.__values = array.array(typecode, [0]) * capacity
+        self.__timestamps = array.array("d", [0.0]) * capacity
+        self.__next = 0
+        self.__length = 0
+
+    def __len__(self):
+        return self.__length
+
+    @property
+    def capacity(self):
+        """Return the maximal amount of samples.
+
+        :rtype: int
+        """
+        return self.__capacity
+
+    @property
+    def useNumPy(self):
+        """Return if the aggregations are computed by NumPy.
+
+        :rtype: bool
+        """
+        return self.__useNumPy
+
+    def append(self, value, timestamp=None):
+        """Add a sample, if the buffer is full the oldest sample gets overwritten.
+
+        :param value: the value of the sample
+        :type value: float or int
+        :param float timestamp: the time of the sample in seconds, by default now as seconds since the epoch
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        position = self.__next
+        self.__values[position] = value
+        self.__timestamps[position] = timestamp
+
+        position += 1
+        self.__next = 0 if position == self.__capacity else position
+
+        if self.__length < self.__capacity:
+            self.__length += 1
+
+    def clear(self):
+        """Remove all samples, the memory stays allocated."""
+        self.__next = 0
+        self.__length = 0
+
+    def segments(self, since=None):
+        """Return the samples as views on the buffer without copying them.
+
+        The samples are stored in a ring, in chronological order they consist of at most two contiguous parts. Each
+        part is returned as tuple of timestamps and values, as :class:`memoryview` or as ``numpy.ndarray`` if NumPy is
+        used. The views are only valid until the next sample is appended.
+
+        :param float since: only the samples since this time, by default all
+        :return: the parts of the samples in chronological order
+        :rtype: list[tuple(memoryview, memoryview)]
+        """
+        return [(self.__view(self.__timestamps, start, end), self.__view(self.__values, start, end))
+                for start, end in self.__getRanges(since)]
+
+    def timestamps(self, since=None):
+        """Return a copy of the timestamps in chronological order.
+
+        :param float since: only the samples since this time, by default all
+        :return: the timestamps
+        :rtype: array.array or numpy.ndarray
+        """
+        return self.__copy(self.__timestamps, since)
+
+    def values(self, since=None):
+        """Return a copy of the values in chronological order.
+
+        :param float since: only the samples since this time, by default all
+        :return: the values
+        :rtype: array.array or numpy.ndarray
+        """
+        return self.__copy(self.__values, since)
+
+    def minimum(self, since=None):
+        """Return the lowest value.
+
+        :param float since: only the samples since this time, by default all
+        :return: the lowest value or None if there are no samples
+        :rtype: float or int
+        """
+        parts = self.__getValueParts(since)
+        if not parts:
+            return None
+
+        if self.__useNumPy:
+            return min(part.min() for part in parts).item()
+
+        return min(min(part) for part in parts)
+
+    def maximum(self, since=None):
+        """Return the highest value.
+
+        :param float since: only the samples since this time, by default all
+        :return: the highest value or None if there are no samples
+        :rtype: float or int
+        """
+        parts = self.__getValueParts(since)
+        if not parts:
+            return None
+
+        if self.__useNumPy:
+            return max(part.max() for part in parts).item()
+
+        return max(max(part) for part in parts)
+
+    def average(self, since=None):
+        """Return the average of the values.
+
+        :param float since: only the samples since this time, by default all
+        :return: the average or None if there are no samples
+        :rtype: float
+        """
+        parts = self.__getValueParts(since)
+        if not parts:
+            return None
+
+        amount = sum(len(part) for part in parts)
+
+        if self.__useNumPy:
+            return float(sum(part.sum(dtype=numpy.float64) for part in parts)) / amount
+
+        return sum(sum(part) for part in parts) / float(amount)
+
+    def percentile(self, percent, since=None):
+        """Return a percentile of the values, interpolated linear between the two closest values.
+
+        :param float percent: the percentile between 0 and 100, 50 is the median
+        :param float since: only the samples since this time, by default all
+        :return: the percentile or None if there are no samples
+        :rtype: float
+        :raises ValueError: if the percentile is not between 0 and 100
+        """
+        if not 0 <= percent <= 100:
+            raise ValueError("The percentile needs to be between 0 and 100.")
+
+        parts = self.__getValueParts(since)
+        if not parts:
+            return None
+
+        if self.__useNumPy:
+            return float(numpy.percentile(numpy.concatenate(parts), percent))
+
+        values = sorted(itertools.chain(*parts))
+
+        position = (len(values) - 1) * percent / 100.0
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+
+        return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+    def __getValueParts(self, since):
+        return [self.__view(self.__values, start, end) for start, end in self.__getRanges(since)]
+
+    def __getRanges(self, since):
+        """Internal method to get the positions of the samples since a time in the arrays in chronological order.
+
+        :param float since: the start time or None for all samples
+        :return: the ranges as tuples of start and end position
+        :rtype: list[tuple(int, int)]
+        """
+        capacity = self.__capacity
+        length = self.__length
+        first = self.__next - length
+        if first < 0:
+            first += capacity
+
+        skip = 0
+        if since is not None:
+            timestamps = self.__timestamps
+            upper = length
+
+            # the samples are sorted by time, search the first one since the start time
+            while skip < upper:
+                middle = (skip + upper) // 2
+                if timestamps[(first + middle) % capacity] < since:
+                    skip = middle + 1
+                else:
+                    upper = middle
+
+        if skip == length:
+            return []
+
+        start = (first + skip) % capacity
+        end = start + length - skip
+
+        if end <= capacity:
+            return [(start, end)]
+
+        return [(start, capacity), (0, end - capacity)]
+
+    def __view(self, values, start, end):
+        if self.__useNumPy:
+            return numpy.frombuffer(values, dtype=values.typecode)[start:end]
+
+        try:
+            return memoryview(values)[start:end]
+        except TypeError:
+            # arrays do not support memoryview in Python 2, a slice gets copied
+            return values[start:end]
+
+    def __copy(self, values, since):
+        ranges = self.__getRanges(since)
+
+        if self.__useNumPy:
+            parts = [numpy.frombuffer(values, dtype=values.typecode)[start:end] for start, end in ranges]
+            return numpy.concatenate(parts) if parts else numpy.empty(0, dtype=values.typecode)
+
+        result = array.array(values.typecode)
+        for start, end in ranges:
+            result.extend(values[start:end])
+
+        return result
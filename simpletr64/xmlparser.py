@@ -0,0 +1,209 @@
+import abc
+import threading
+import xml.etree.ElementTree as ElementTree
+from io import BytesIO
+
+try:
+    # noinspection PyUnresolvedReferences
+    from lxml import etree as lxmlTree
+except ImportError:
+    lxmlTree = None
+
+# abstract base class which works with Python 2 and 3
+_AbstractBase = abc.ABCMeta("_AbstractBase", (object,), {})
+
+
+class XMLBackend(_AbstractBase):
+    """The parser for all XML documents of a device, SOAP responses, device descriptions and SCPD's.
+
+    The backend is chosen automatically, `lxml <https://lxml.de/>`_ gets used if it is installed, otherwise the
+    ElementTree module of the standard library. Both return elements with the ElementTree API, so the rest of the
+    library does not need to know which one is in use.
+
+    SOAP responses are parsed with ElementTree unless a backend has been chosen explicitly. lxml is slower for
+    responses with long text like the log of GetDeviceLog, 1380 against 1070 us for 167 KB, as it has to convert the
+    text into a Python string. For small responses lxml saves about 10 us, which is lost in the round trip of an
+    action. Device descriptions and SCPD's get parsed faster by lxml, e.g. 90 against 136 us for a tr64desc.xml.
+
+    .. seealso::
+
+        :meth:`~simpletr64.XMLBackend.setBackend`
+    """
+
+    #: the name of the backend
+    name = None
+
+    #: the exception(s) raised by any of the backends if a document is not valid XML
+    ParseError = (ElementTree.ParseError,) if lxmlTree is None else (ElementTree.ParseError, lxmlTree.XMLSyntaxError)
+
+    __backend = None
+    __soapBackend = None
+
+    @staticmethod
+    def getBackend():
+        """Return the backend which is in use for device descriptions and SCPD's.
+
+        :return: the backend
+        :rtype: XMLBackend
+        """
+        return XMLBackend.__backend
+
+    @staticmethod
+    def getSOAPBackend():
+        """Return the backend which is in use for SOAP responses.
+
+        :return: the backend
+        :rtype: XMLBackend
+        """
+        return XMLBackend.__soapBackend
+
+    @staticmethod
+    def setBackend(name=None):
+        """Choose the XML backend to use, mostly for testing and benchmarking.
+
+        :param str name: ``lxml`` or ``etree`` to use this backend for all documents, or None to choose lxml if
+            installed, otherwise etree, and etree for SOAP responses
+        :raises ValueError: if the backend is not known or not installed
+        """
+        if name is None:
+            XMLBackend.__backend = EtreeBackend() if lxmlTree is None else LxmlBackend()
+            XMLBackend.__soapBackend = EtreeBackend()
+        elif name == "lxml":
+            if lxmlTree is None:
+                raise ValueError("The XML backend lxml is not installed.")
+
+            XMLBackend.__backend = XMLBackend.__soapBackend = LxmlBackend()
+        elif name == "etree":
+            XMLBackend.__backend = XMLBackend.__soapBackend = EtreeBackend()
+        else:
+            raise ValueError("Unknown XML backend: " + str(name))
+
+    @abc.abstractmethod
+    def parse(self, data):
+        """Parse a complete document.
+
+        :param data: the raw content, either bytes or an iterator of bytes chunks
+        :type data: bytes or collections.Iterable[bytes]
+        :return: the root element of the document
+        :rtype: xml.etree.ElementTree.Element
+        :raises ParseError: if the content is not valid XML
+        """
+
+    @abc.abstractmethod
+    def iterparse(self, data):
+        """Parse a document incrementally.
+
+        :param data: the raw content, either bytes or an iterator of bytes chunks
+        :type data: bytes or collections.Iterable[bytes]
+        :return: a generator of ``(event, element)`` tuples for the start and end of every element, the text of an
+            element is only complete with the end event
+        :rtype: collections.Iterable[tuple(str, xml.etree.ElementTree.Element)]
+        :raises ParseError: if the content is not valid XML
+        """
+
+
+class EtreeBackend(XMLBackend):
+    """XML backend with the ElementTree module of the standard library."""
+
+    name = "etree"
+
+    def parse(self, data):
+        if isinstance(data, (bytes, type(u""))):
+            return ElementTree.fromstring(data)
+
+        parser = ElementTree.XMLParser()
+        for chunk in data:
+            parser.feed(chunk)
+
+        return parser.close()
+
+    def iterparse(self, data):
+        if isinstance(data, bytes):
+            data = [data]
+
+        if not hasattr(ElementTree, "XMLPullParser"):
+            # Python 2 has no pull parser, parse the complete content
+            for item in ElementTree.iterparse(BytesIO(b"".join(data)), events=("start", "end")):
+                yield item
+            return
+
+        parser = ElementTree.XMLPullParser(events=("start", "end"))
+
+        for chunk in data:
+            parser.feed(chunk)
+
+            for item in parser.read_events():
+                yield item
+
+        parser.close()
+
+        for item in parser.read_events():
+            yield item
+
+
+class LxmlBackend(XMLBackend):
+    """XML backend with lxml, entities are not resolved and large text nodes are allowed.
+
+    :type __local: threading.local
+    """
+
+    name = "lxml"
+
+    __options = {"huge_tree": True, "resolve_entities": False, "remove_comments": True, "remove_pis": True}
+
+    def __init__(self):
+        # lxml parsers must not be shared between threads
+        self.__local = threading.local()
+
+    def __getParser(self):
+        parser = getattr(self.__local, "parser", None)
+
+        if parser is None:
+            parser = lxmlTree.XMLParser(**LxmlBackend.__options)
+            self.__local.parser = parser
+
+        return parser
+
+    def parse(self, data):
+        if isinstance(data, type(u"")):
+            # lxml refuses text with an encoding declaration
+            data = data.encode("utf-8")
+
+        if isinstance(data, bytes):
+            try:
+                return lxmlTree.fromstring(data, self.__getParser())
+            except lxmlTree.XMLSyntaxError:
+                # some devices send documents which libxml2 refuses but expat accepts
+                return ElementTree.fromstring(data)
+
+        parser = lxmlTree.XMLParser(**LxmlBackend.__options)
+        chunks = []
+
+        try:
+            for chunk in data:
+                chunks.append(chunk)
+                parser.feed(chunk)
+
+            return parser.close()
+        except lxmlTree.XMLSyntaxError:
+            return ElementTree.fromstring(b"".join(chunks) + b"".join(data))
+
+    def iterparse(self, data):
+        if isinstance(data, bytes):
+            data = [data]
+
+        parser = lxmlTree.XMLPullParser(events=("start", "end"), **LxmlBackend.__options)
+
+        for chunk in data:
+            parser.feed(chunk)
+
+            for item in parser.read_events():
+                yield item
+
+        parser.close()
+
+        for item in parser.read_events():
+            yield item
+
+
+XMLBackend.setBackend()
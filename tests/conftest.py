@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the tests import their helpers (defaults, mockserver) as top level modules, also when run from the root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,307 @@
+import hashlib
+import os
+import socket
+import threading
+import time
+import uuid
+
+try:
+    # noinspection PyCompatibility
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn, UDPServer, BaseRequestHandler
+except ImportError:
+    # noinspection PyCompatibility,PyUnresolvedReferences
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    # noinspection PyCompatibility,PyUnresolvedReferences
+    from socketserver import ThreadingMixIn, UDPServer, BaseRequestHandler
+
+
+class MockTR64Server(ThreadingMixIn, HTTPServer):
+    """A small local TR64 device which answers SOAP actions and serves XML documents.
+
+    Every SOAP action is answered with a ``<action>Response`` element which contains the results registered with
+    :meth:`setResults`, or the arguments of the request if nothing was registered. Results can be a function of the
+    arguments and the control URL which raises KeyError for an invalid index, actions registered with
+    :meth:`removeAction` are answered with a SOAP fault. Documents registered with :meth:`setDocument` are served for
+    GET requests with an ETag, conditional requests are answered with 304.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency=0):
+        HTTPServer.__init__(self, ("127.0.0.1", 0), _MockTR64Handler)
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self.documents = {}
+        self.results = {}
+        self.removedActions = set()
+        self.username = None
+        self.password = None
+        self.nonce = uuid.uuid4().hex
+        self.challenges = 0
+        self.validators = True
+        self.notModified = 0
+        self.__thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def url(self, path):
+        return "http://127.0.0.1:" + str(self.port) + path
+
+    def setDocument(self, path, content):
+        self.documents[path] = content
+
+    def loadFixtures(self):
+        """Serve all recorded documents in tests/data, like a Fritz Box with /tr64desc.xml as root XML."""
+        directory = os.path.join(os.path.dirname(__file__), "data")
+
+        for name in os.listdir(directory):
+            with open(os.path.join(directory, name), "rb") as f:
+                self.setDocument("/" + name, f.read())
+
+        return self
+
+    def setResults(self, action, results):
+        self.results[action] = results
+
+    def removeAction(self, action):
+        """Answer an action with a SOAP fault like a device which does not support it."""
+        self.removedActions.add(action)
+
+    def setCredentials(self, username, password):
+        """Require digest authentication for all requests."""
+        self.username = username
+        self.password = password
+
+    def renewNonce(self):
+        """Make the current nonce stale, the next request gets challenged again."""
+        self.nonce = uuid.uuid4().hex
+
+    def get_request(self):
+        self.connections += 1
+        return HTTPServer.get_request(self)
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.serve_forever)
+        self.__thread.daemon = True
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _MockTR64Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # buffer the response so headers and body leave in one segment, like the devices do
+    wbufsize = -1
+
+    # noinspection PyShadowingBuiltins
+    def log_message(self, format, *args):
+        pass
+
+    def end_headers(self):
+        # confirm a requested close, otherwise the client may reuse the connection while it gets closed
+        if self.headers.get("Connection", "").lower() == "close":
+            self.send_header("Connection", "close")
+
+        BaseHTTPRequestHandler.end_headers(self)
+
+    def _send(self, status, body, contentType='text/xml; charset="utf-8"'):
+        if not isinstance(body, bytes):
+            body = body.encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", contentType)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        """Check the digest authentication of the request and send a challenge if it is not valid."""
+        server = self.server
+        if server.password is None:
+            return True
+
+        header = self.headers.get("Authorization", "")
+        fields = {}
+        for part in header[len("Digest "):].split(","):
+            if "=" in part:
+                key, value = part.strip().split("=", 1)
+                fields[key] = value.strip('"')
+
+        if header.startswith("Digest ") and fields.get("nonce") == server.nonce:
+            def md5(value):
+                return hashlib.md5(value.encode("utf-8")).hexdigest()
+
+            ha1 = md5(server.username + ":" + fields["realm"] + ":" + server.password)
+            ha2 = md5(self.command + ":" + fields["uri"])
+            expected = md5(ha1 + ":" + server.nonce + ":" + fields["nc"] + ":" + fields["cnonce"] + ":auth:" + ha2)
+
+            if fields["response"] == expected and fields["uri"] == self.path:
+                return True
+
+        server.challenges += 1
+
+        self.send_response(401)
+        self.send_header("WWW-Authenticate", 'Digest realm="MockTR64", nonce="' + server.nonce + '", qop="auth"')
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return False
+
+    def do_GET(self):
+        self.server.requests += 1
+        time.sleep(self.server.latency)
+
+        if not self._authorized():
+            return
+
+        if self.path not in self.server.documents:
+            self._send(404, "")
+            return
+
+        document = self.server.documents[self.path]
+        if not isinstance(document, bytes):
+            document = document.encode("utf-8")
+
+        etag = '"' + hashlib.md5(document).hexdigest() + '"'
+
+        if self.server.validators and self.headers.get("If-None-Match") == etag:
+            self.server.notModified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", 'text/xml; charset="utf-8"')
+        self.send_header("Content-Length", str(len(document)))
+        if self.server.validators:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", "Tue, 06 Jun 2017 10:00:00 GMT")
+        self.end_headers()
+        self.wfile.write(document)
+
+    def do_POST(self):
+        self.server.requests += 1
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+        time.sleep(self.server.latency)
+
+        if not self._authorized():
+            return
+
+        namespace, action = self.headers["Soapaction"].strip('"').split("#")
+
+        if action in self.server.removedActions:
+            self._sendFault(401, "Invalid Action")
+            return
+
+        arguments = {}
+
+        # echo the arguments of the request
+        actionBody = body.split("<u:" + action, 1)[1].split(">", 1)[1].split("</u:" + action + ">", 1)[0]
+        for line in actionBody.split("\n"):
+            line = line.strip()
+            if line:
+                name = line[1:line.index(">")]
+                arguments[name] = line[len(name) + 2:-len(name) - 3]
+
+        results = self.server.results.get(action)
+        if results is None:
+            results = arguments
+        elif callable(results):
+            try:
+                results = results(arguments, self.path)
+            except KeyError:
+                self._sendFault(713, "SpecifiedArrayIndexInvalid")
+                return
+
+        response = '<?xml version="1.0"?>\n' \
+                   '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" ' \
+                   's:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">\n<s:Body>\n' \
+                   '<u:' + action + 'Response xmlns:u="' + namespace + '">\n'
+
+        for name in results.keys():
+            response += "<" + name + ">" + str(results[name]) + "</" + name + ">\n"
+
+        response += '</u:' + action + 'Response>\n</s:Body>\n</s:Envelope>'
+
+        self._send(200, response)
+
+    def _sendFault(self, errorCode, errorDescription):
+        self._send(500, '<?xml version="1.0"?>\n'
+                        '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" '
+                        's:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">\n<s:Body>\n<s:Fault>\n'
+                        '<faultcode>s:Client</faultcode>\n<faultstring>UPnPError</faultstring>\n<detail>\n'
+                        '<UPnPError xmlns="urn:schemas-upnp-org:control-1-0">\n'
+                        '<errorCode>' + str(errorCode) + '</errorCode>\n'
+                        '<errorDescription>' + errorDescription + '</errorDescription>\n'
+                        '</UPnPError>\n</detail>\n</s:Fault>\n</s:Body>\n</s:Envelope>')
+
+
+def loadSSDPResponses():
+    """Return the recorded SSDP responses in tests/data/ssdp_responses.txt as datagrams."""
+    with open(os.path.join(os.path.dirname(__file__), "data", "ssdp_responses.txt"), "rb") as f:
+        content = f.read()
+
+    return [response.strip(b"\n").replace(b"\n", b"\r\n") + b"\r\n\r\n" for response in content.split(b"\n--\n")]
+
+
+class MockSSDPServer(UDPServer):
+    """A local network of UPnP devices which answer M-SEARCH requests on a unicast UDP port.
+
+    Every device registered with :meth:`addDevice` answers each search request after its delay, the requests are
+    counted in ``searches``. An IPv6 address like ``::1`` makes it an IPv6 server.
+    """
+
+    def __init__(self, address="127.0.0.1"):
+        if ":" in address:
+            self.address_family = socket.AF_INET6
+
+        UDPServer.__init__(self, (address, 0), _MockSSDPHandler)
+        self.port = self.server_address[1]
+        self.devices = []
+        self.searches = 0
+
+    def addDevice(self, location, service="urn:dslforum-org:device:InternetGatewayDevice:1", delay=0, headers=None):
+        """Add a device which answers with its location after the delay in seconds."""
+        response = "HTTP/1.1 200 OK\r\nCACHE-CONTROL: max-age=1800\r\nEXT:\r\nLOCATION: " + location + \
+                   "\r\nSERVER: Mock UPnP/1.0\r\nST: " + service + "\r\nUSN: uuid:" + str(uuid.uuid4()) + "::" + \
+                   service + "\r\n"
+
+        for name, value in (headers or []):
+            response += name + ": " + value + "\r\n"
+
+        self.devices.append((delay, (response + "\r\n").encode("utf-8")))
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.serve_forever)
+        self.__thread.daemon = True
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _MockSSDPHandler(BaseRequestHandler):
+
+    def handle(self):
+        data, sock = self.request
+
+        if not data.startswith(b"M-SEARCH"):
+            return
+
+        self.server.searches += 1
+
+        for delay, response in self.server.devices:
+            timer = threading.Timer(delay, sock.sendto, (response, self.client_address))
+            timer.daemon = True
+            timer.start()
@@ -0,0 +1,419 @@
+import asyncio
+import shutil
+import tempfile
+import time
+import unittest
+
+from mockserver import MockTR64Server, MockSSDPServer
+from simpletr64.asyncdevicetr64 import AsyncDeviceTR64
+from simpletr64.cache import DefinitionCache
+from simpletr64.discover import Discover, DiscoveryStatistics
+from simpletr64.actions.asyncactions import AsyncLan, AsyncWan, AsyncWifi, AsyncFritz
+
+
+class TestAsync(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockTR64Server().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_execute(self):
+        async def run():
+            async with AsyncDeviceTR64("127.0.0.1", port=self.server.port) as box:
+                return await asyncio.gather(*[box.execute("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1",
+                                                          "GetGenericHostEntry", NewIndex=index)
+                                              for index in range(20)])
+
+        results = asyncio.run(run())
+
+        self.assertEqual([result["NewIndex"] for result in results], [str(index) for index in range(20)])
+        self.assertEqual(self.server.requests, 20)
+        self.assertTrue(self.server.connections <= 10)
+
+    def test_actions(self):
+        self.server.setResults("GetHostNumberOfEntries", {"NewHostNumberOfEntries": 42})
+        self.server.setResults("GetGenericHostEntry", {"NewIPAddress": "192.168.178.20", "NewAddressSource": "DHCP",
+                                                       "NewLeaseTimeRemaining": 0, "NewMACAddress": "38:C9:86:26:7E:38",
+                                                       "NewInterfaceType": "Ethernet", "NewActive": 1,
+                                                       "NewHostName": "host"})
+
+        async def run():
+            async with AsyncLan("127.0.0.1", port=self.server.port) as lan:
+                lan.setupTR64Device("fritz.box")
+                amount = await lan.getAmountOfHostsConnected()
+                details = await lan.getHostDetailsByIndex(3)
+                return amount, details
+
+        amount, details = asyncio.run(run())
+
+        self.assertEqual(amount, 42)
+        self.assertEqual(details.ipaddress, "192.168.178.20")
+        self.assertTrue(details.active)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_syncContextManager(self):
+        lan = AsyncLan("127.0.0.1", port=self.server.port)
+
+        with self.assertRaises(TypeError):
+            with lan:
+                pass
+
+    def test_callList(self):
+        self.server.setDocument("/calllist.lua?sid=1", "<root><Call><Id>15</Id><Type>1</Type></Call></root>")
+        self.server.setResults("GetCallList", {"NewCallListURL": self.server.url("/calllist.lua?sid=1")})
+
+        async def run():
+            async with AsyncFritz("127.0.0.1", port=self.server.port) as fritz:
+                fritz.setupTR64Device("fritz.box")
+                calls = await fritz.getCallList()
+
+                with self.assertRaises(ValueError):
+                    self.server.setResults("GetCallList", {"NewCallListURL": self.server.url("/missing.lua")})
+                    await fritz.getCallList()
+
+                return calls
+
+        calls = asyncio.run(run())
+
+        self.assertEqual(calls, [{"Id": "15", "Type": "1"}])
+
+    def test_digestAuth(self):
+        self.server.setCredentials("admin", "secret")
+
+        async def run():
+            async with AsyncDeviceTR64("127.0.0.1", port=self.server.port) as box:
+                box.username = "admin"
+                box.password = "secret"
+
+                for index in range(5):
+                    await box.execute("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1",
+                                      "GetHostNumberOfEntries")
+
+                box.password = "wrong"
+                with self.assertRaises(ValueError):
+                    await box.execute("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1",
+                                      "GetHostNumberOfEntries")
+
+        asyncio.run(run())
+
+        self.assertEqual(self.server.challenges, 3)
+        self.assertEqual(self.server.requests, 8)
+
+    def test_executeMany(self):
+        async def run():
+            async with AsyncDeviceTR64("127.0.0.1", port=self.server.port) as box:
+                actions = [("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1", "GetGenericHostEntry",
+                            {"NewIndex": index}) for index in range(30)]
+                actions.append(("", "urn:dslforum-org:service:Hosts:1", "GetHostNumberOfEntries"))
+
+                return await box.executeMany(actions, concurrency=3)
+
+        results = asyncio.run(run())
+
+        self.assertEqual([result["NewIndex"] for result in results[:30]], [str(index) for index in range(30)])
+        self.assertTrue(isinstance(results[30], ValueError))
+        self.assertTrue(self.server.connections <= 3)
+
+    def test_loadSCPD(self):
+        self.server.loadFixtures()
+        directory = tempfile.mkdtemp()
+
+        async def run():
+            async with AsyncDeviceTR64("127.0.0.1", port=self.server.port) as box:
+                box.definitionCache = DefinitionCache(directory)
+                await box.loadDeviceDefinitions(self.server.url("/tr64desc.xml"))
+
+                # the services are generated again with the loaded SCPD's
+                services = box.services
+                await box.loadSCPD()
+                self.assertFalse(box.services is services)
+
+                return box.deviceSCPD
+
+        try:
+            scpd = asyncio.run(run())
+            self.assertEqual(len(scpd), 7)
+            self.assertEqual(self.server.requests, 8)
+
+            self.assertEqual(asyncio.run(run()), scpd)
+            self.assertEqual(self.server.requests, 9)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_conditionalRequests(self):
+        self.server.loadFixtures()
+
+        async def run():
+            async with AsyncDeviceTR64("127.0.0.1", port=self.server.port) as box:
+                for index in range(2):
+                    await box.loadDeviceDefinitions(self.server.url("/tr64desc.xml"))
+                    await box.loadSCPD()
+                return box.deviceSCPD
+
+        self.assertEqual(len(asyncio.run(run())), 7)
+        self.assertEqual(self.server.requests, 16)
+        self.assertEqual(self.server.notModified, 8)
+
+    def test_getSCPD(self):
+        self.server.loadFixtures()
+
+        async def run():
+            async with AsyncDeviceTR64("127.0.0.1", port=self.server.port) as box:
+                await box.loadDeviceDefinitions(self.server.url("/tr64desc.xml"))
+                actions = await box.getSCPD("urn:dslforum-org:service:Hosts:1")
+                self.assertTrue(await box.getSCPD("urn:dslforum-org:service:Hosts:1") is actions)
+                return actions
+
+        self.assertTrue("GetGenericHostEntry" in asyncio.run(run()))
+        self.assertEqual(self.server.requests, 2)
+
+    def test_getSCPDCache(self):
+        self.server.loadFixtures()
+        directory = tempfile.mkdtemp()
+
+        async def run():
+            async with AsyncDeviceTR64("127.0.0.1", port=self.server.port) as box:
+                box.definitionCache = DefinitionCache(directory)
+                box.lazySCPD = True
+                await box.loadDeviceDefinitions(self.server.url("/tr64desc.xml"))
+
+                if "urn:dslforum-org:service:Hosts:1" not in box.deviceSCPD.keys():
+                    await box.getSCPD("urn:dslforum-org:service:Hosts:1")
+
+                return box.deviceSCPD["urn:dslforum-org:service:Hosts:1"]
+
+        try:
+            actions = asyncio.run(run())
+            self.assertEqual(self.server.requests, 2)
+
+            # the definitions and the SCPD come out of the cache
+            self.assertEqual(asyncio.run(run()), actions)
+            self.assertEqual(self.server.requests, 3)
+            self.assertEqual(self.server.notModified, 1)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_allHosts(self):
+        items = "".join(["<Item><IPAddress>192.168.178." + str(index) + "</IPAddress><HostName>host</HostName>"
+                         "<Active>0</Active></Item>" for index in range(20)])
+        self.server.setDocument("/devicehostlist.lua?sid=1", "<List>" + items + "</List>")
+        self.server.setResults("X_AVM-DE_GetHostListPath", {"NewX_AVM-DE_HostListPath": "/devicehostlist.lua?sid=1"})
+
+        async def run():
+            async with AsyncLan("127.0.0.1", port=self.server.port) as lan:
+                lan.setupTR64Device("fritz.box")
+                return await lan.getAllHosts()
+
+        hosts = asyncio.run(run())
+
+        self.assertEqual(len(hosts), 20)
+        self.assertEqual(hosts[19].ipaddress, "192.168.178.19")
+        self.assertFalse(hosts[19].active)
+
+    def test_allHostsBrokenHostList(self):
+        self.server.setResults("X_AVM-DE_GetHostListPath", {"NewX_AVM-DE_HostListPath": "/devicehostlist.lua?sid=1"})
+
+        async def run():
+            async with AsyncLan("127.0.0.1", port=self.server.port) as lan:
+                lan.setupTR64Device("fritz.box")
+                return await lan.getAllHosts()
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run())
+
+        self.assertEqual(self.server.requests, 2)
+
+    def test_iterHosts(self):
+        table = {"amount": 30}
+
+        def amountOfHosts(arguments, path):
+            amount = table["amount"]
+
+            # the table shrinks after the scan has been started
+            table["amount"] = 20
+            return {"NewHostNumberOfEntries": amount}
+
+        def hostEntry(arguments, path):
+            index = int(arguments["NewIndex"])
+            if index >= table["amount"] or index == table.get("broken"):
+                raise KeyError(index)
+
+            return {"NewIPAddress": "192.168.178." + str(index), "NewAddressSource": "DHCP", "NewLeaseTimeRemaining": 0,
+                    "NewMACAddress": "38:C9:86:26:7E:%02X" % index, "NewInterfaceType": "Ethernet", "NewActive": 1,
+                    "NewHostName": "host" + str(index)}
+
+        self.server.setResults("GetHostNumberOfEntries", amountOfHosts)
+        self.server.setResults("GetGenericHostEntry", hostEntry)
+
+        async def run():
+            async with AsyncLan("127.0.0.1", port=self.server.port) as lan:
+                lan.setupTR64Device("fritz.box")
+
+                hosts = []
+                async for host in lan.iterHosts(concurrency=4):
+                    hosts.append(host.ipaddress)
+
+                # stop early
+                requests = self.server.requests
+                async with lan.iterHosts(concurrency=4) as iterator:
+                    await iterator.__anext__()
+                self.assertTrue(self.server.requests - requests <= 1 + 4 + 4)
+
+                # a host which can not be loaded while the table has not shrunk
+                table["broken"] = 5
+                with self.assertRaises(ValueError):
+                    async for host in lan.iterHosts(concurrency=4):
+                        pass
+
+                return hosts
+
+        hosts = asyncio.run(run())
+
+        self.assertEqual(sorted(hosts), sorted("192.168.178." + str(index) for index in range(20)))
+
+    def test_allAssociatedDevicesBrokenDeviceList(self):
+        self.server.setResults("X_AVM-DE_GetWLANDeviceListPath", lambda arguments, path: {
+            "NewX_AVM-DE_WLANDeviceListPath": "/wlandevicelist" + path[-1] + ".lua?sid=1"})
+
+        async def run():
+            async with AsyncWifi("127.0.0.1", port=self.server.port) as wifi:
+                wifi.setupTR64Device("fritz.box")
+                return await wifi.getAllAssociatedDevices()
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run())
+
+    def test_allAssociatedDevices(self):
+        self.server.removeAction("X_AVM-DE_GetWLANDeviceListPath")
+        self.server.setResults("GetTotalAssociations", {"NewTotalAssociations": 2})
+        self.server.setResults("GetGenericAssociatedDeviceInfo", lambda arguments, path: {
+            "NewAssociatedDeviceMACAddress": "38:C9:86:26:" + path[-1] + ":0" + arguments["NewAssociatedDeviceIndex"],
+            "NewAssociatedDeviceIPAddress": "192.168.178.20", "NewAssociatedDeviceAuthState": 1})
+
+        async def run():
+            async with AsyncWifi("127.0.0.1", port=self.server.port) as wifi:
+                wifi.setupTR64Device("fritz.box")
+                return await wifi.getAllAssociatedDevices()
+
+        devices = asyncio.run(run())
+
+        self.assertEqual(len(devices), 6)
+        self.assertEqual(devices["38:C9:86:26:2:01"].wifiInterfaceId, 2)
+
+    def test_wanStatistic(self):
+        self.server.removeAction("GetAddonInfos")
+        self.server.setResults("GetTotalBytesSent", {"NewTotalBytesSent": 1000})
+        self.server.setResults("GetTotalBytesReceived", {"NewTotalBytesReceived": 2000})
+
+        async def run():
+            async with AsyncWan("127.0.0.1", port=self.server.port) as wan:
+                wan.setupTR64Device("fritz.box")
+                await wan.getStatistic()
+                return await wan.getStatistic()
+
+        statistic = asyncio.run(run())
+
+        self.assertEqual((statistic.bytesSent, statistic.bytesReceived), (1000, 2000))
+        # GetAddonInfos is only tried once
+        self.assertEqual(self.server.requests, 5)
+
+    def test_discoveryStream(self):
+        ssdp = MockSSDPServer().start()
+        ssdp.addDevice("http://192.168.178.1:49000/tr64desc.xml")
+        ssdp.addDevice("http://192.168.178.20:8080/description.xml", delay=0.3)
+
+        async def run():
+            arrivals = []
+            start = asyncio.get_event_loop().time()
+
+            async with Discover.stream(timeout=1, retries=2, ipAddress="127.0.0.1", port=ssdp.port) as responses:
+                async for response in responses:
+                    arrivals.append((response.location, asyncio.get_event_loop().time() - start))
+
+                    if len(arrivals) == 2:
+                        break
+
+            return arrivals, responses
+
+        try:
+            arrivals, responses = asyncio.run(run())
+        finally:
+            ssdp.stop()
+
+        self.assertEqual([location for location, arrival in arrivals],
+                         ["http://192.168.178.1:49000/tr64desc.xml", "http://192.168.178.20:8080/description.xml"])
+        # the first response is there long before the discovery ends
+        self.assertTrue(arrivals[0][1] < 0.25)
+        self.assertEqual(len(responses.responses), 2)
+
+    def test_discoveryStreamExpectedDevices(self):
+        ssdp = MockSSDPServer().start()
+        ssdp.addDevice("http://192.168.178.1:49000/tr64desc.xml")
+        ssdp.addDevice("http://192.168.178.1:49000/igddesc.xml")
+
+        async def run():
+            return [response.location async for response in Discover.stream(timeout=2, retries=2,
+                                                                             ipAddress="127.0.0.1", port=ssdp.port,
+                                                                             expectedDevices=1)]
+
+        try:
+            start = time.time()
+            locations = asyncio.run(run())
+        finally:
+            ssdp.stop()
+
+        self.assertTrue(time.time() - start < 1)
+        self.assertTrue(len(locations) >= 1)
+
+    def test_discoveryStreamInvalidLocation(self):
+        ssdp = MockSSDPServer().start()
+        ssdp.addDevice("http://1.2.3.4:99999/x.xml")
+        ssdp.addDevice("http://192.168.178.1:49000/tr64desc.xml", delay=0.05)
+        statistics = DiscoveryStatistics()
+
+        async def run():
+            return [response.location async for response in Discover.stream(timeout=0.2, retries=1,
+                                                                             ipAddress="127.0.0.1", port=ssdp.port,
+                                                                             statistics=statistics)]
+
+        try:
+            locations = asyncio.run(run())
+        finally:
+            ssdp.stop()
+
+        self.assertEqual(locations, ["http://192.168.178.1:49000/tr64desc.xml"])
+        self.assertEqual(statistics.invalid, 2)
+
+    def test_discoveryStreamSetupFailure(self):
+        async def run():
+            # the second interface does not exist, the endpoint of the first one gets closed again
+            stream = Discover.stream(timeout=0.2, retries=1, ipAddress="127.0.0.1",
+                                     interfaces=["127.0.0.1", "192.0.2.77"])
+
+            with self.assertRaises(OSError):
+                await stream.__anext__()
+
+            # the iteration ends instead of waiting forever
+            with self.assertRaises(StopAsyncIteration):
+                await asyncio.wait_for(stream.__anext__(), 1)
+
+        asyncio.run(run())
+
+    def test_discoveryStreamInterfaces(self):
+        ssdp = MockSSDPServer().start()
+        ssdp.addDevice("http://192.168.178.1:49000/tr64desc.xml")
+
+        async def run():
+            return [(response.interface, response.location)
+                    async for response in Discover.stream(timeout=0.2, retries=1, ipAddress="127.0.0.1",
+                                                          port=ssdp.port, interfaces=["127.0.0.1", "127.0.0.2"])]
+
+        try:
+            results = asyncio.run(run())
+        finally:
+            ssdp.stop()
+
+        self.assertEqual(sorted(results), [("127.0.0.1", "http://192.168.178.1:49000/tr64desc.xml"),
+                                           ("127.0.0.2", "http://192.168.178.1:49000/tr64desc.xml")])
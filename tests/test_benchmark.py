@@ -0,0 +1,368 @@
+import functools
+import os
+import sys
+import timeit
+import unittest
+
+import xml.etree.ElementTree as ET
+from io import BytesIO
+
+import requests
+
+try:
+    # noinspection PyCompatibility
+    from httplib import HTTPResponse
+    from urlparse import urlparse
+except ImportError:
+    # noinspection PyCompatibility,PyUnresolvedReferences
+    from http.client import HTTPResponse
+    # noinspection PyCompatibility,PyUnresolvedReferences
+    from urllib.parse import urlparse
+
+from mockserver import MockTR64Server, loadSSDPResponses
+from simpletr64.actions.lan import Lan
+from simpletr64.devicetr64 import DeviceTR64
+from simpletr64.discover import DiscoveryResponse
+from simpletr64.signature import ActionSignature
+from simpletr64.statistics import CounterTracker, RingBuffer, numpy
+from simpletr64.xmlparser import XMLBackend, lxmlTree
+
+
+def loadFixture(name):
+    with open(os.path.join(os.path.dirname(__file__), "data", name), "rb") as f:
+        return f.read()
+
+
+def report(name, value, unit):
+    sys.stderr.write("\n%-50s %12.1f %s" % (name, value, unit))
+
+
+class _FakeSocket(object):
+
+    def __init__(self, data):
+        self.__file = BytesIO(data)
+
+    def makefile(self, *args, **kwargs):
+        return self.__file
+
+
+@unittest.skipUnless(os.environ.get("SIMPLETR64_BENCHMARK"), "set SIMPLETR64_BENCHMARK=1 to run the benchmarks")
+class TestBenchmark(unittest.TestCase):
+    """Benchmarks against a local mock device, they only report numbers and are not part of the default test run.
+
+    Run them with ``SIMPLETR64_BENCHMARK=1 python -m pytest -s test_benchmark.py``, the behaviour they measure is
+    tested in the test module of each feature.
+    """
+
+    def setUp(self):
+        self.server = MockTR64Server().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_actionsPerSecond(self):
+        amount = 200
+        uri = "/upnp/control/hosts"
+        namespace = "urn:dslforum-org:service:Hosts:1"
+        location = self.server.url(uri)
+        header = {'Content-Type': 'text/xml; charset="UTF-8"',
+                  'Soapaction': '"' + namespace + '#GetHostNumberOfEntries"'}
+
+        box = DeviceTR64("127.0.0.1", port=self.server.port)
+        body = '<s:Envelope><s:Body>\n<u:GetHostNumberOfEntries xmlns="' + namespace + '">\n' \
+               '</u:GetHostNumberOfEntries>\n</s:Body></s:Envelope>'
+
+        def oneShot():
+            requests.post(location, data=body, headers=header, timeout=2)
+
+        def pooled():
+            box.execute(uri, namespace, "GetHostNumberOfEntries")
+
+        oneShotTime = timeit.timeit(oneShot, number=amount)
+        pooledTime = timeit.timeit(pooled, number=amount)
+        box.close()
+
+        report("one-shot requests.post", amount / oneShotTime, "actions/s")
+        report("DeviceTR64.execute with connection pool", amount / pooledTime, "actions/s")
+
+    def test_authenticatedRoundTrips(self):
+        amount = 100
+        uri = "/upnp/control/hosts"
+        namespace = "urn:dslforum-org:service:Hosts:1"
+        self.server.setCredentials("admin", "secret")
+
+        box = DeviceTR64("127.0.0.1", port=self.server.port)
+        box.username = "admin"
+        box.password = "secret"
+
+        def pooled():
+            box.execute(uri, namespace, "GetHostNumberOfEntries")
+
+        pooledTime = timeit.timeit(pooled, number=amount)
+        box.close()
+
+        report("authenticated DeviceTR64.execute", amount / pooledTime, "actions/s")
+        report("authenticated round trips per action", self.server.requests / float(amount), "requests")
+
+    def test_executeMany(self):
+        self.server.latency = 0.005
+        uri = "/upnp/control/hosts"
+        namespace = "urn:dslforum-org:service:Hosts:1"
+        actions = [(uri, namespace, "GetGenericHostEntry", {"NewIndex": index}) for index in range(200)]
+
+        box = DeviceTR64("127.0.0.1", port=self.server.port)
+
+        def serial():
+            for action in actions:
+                box.execute(action[0], action[1], action[2], **action[3])
+
+        def batch():
+            box.executeMany(actions, concurrency=8)
+
+        serialTime = timeit.timeit(serial, number=1)
+        batchTime = timeit.timeit(batch, number=1)
+        box.close()
+
+        report("200 GetGenericHostEntry serial", serialTime * 1000, "ms")
+        report("200 GetGenericHostEntry executeMany(8)", batchTime * 1000, "ms")
+
+    def test_loadSCPD(self):
+        self.server.loadFixtures()
+        self.server.latency = 0.02
+
+        def load(concurrency):
+            with DeviceTR64("127.0.0.1", port=self.server.port) as box:
+                box.loadDeviceDefinitions(self.server.url("/tr64desc.xml"))
+                box.loadSCPD(concurrency=concurrency)
+
+        serialTime = timeit.timeit(functools.partial(load, 1), number=1)
+        concurrentTime = timeit.timeit(functools.partial(load, 8), number=1)
+
+        report("loadSCPD 7 services, 20ms latency, serial", serialTime * 1000, "ms")
+        report("loadSCPD 7 services, 20ms latency, concurrency 8", concurrentTime * 1000, "ms")
+
+    def test_lazySCPD(self):
+        self.server.loadFixtures()
+        self.server.latency = 0.02
+
+        def eager():
+            with DeviceTR64("127.0.0.1", port=self.server.port) as box:
+                box.loadDeviceDefinitions(self.server.url("/tr64desc.xml"))
+                box.loadSCPD()
+                box.deviceSCPD["urn:dslforum-org:service:Hosts:1"]
+                box.deviceSCPD["urn:dslforum-org:service:DeviceInfo:1"]
+
+        def lazy():
+            with DeviceTR64("127.0.0.1", port=self.server.port) as box:
+                box.lazySCPD = True
+                box.loadDeviceDefinitions(self.server.url("/tr64desc.xml"))
+                box.deviceSCPD["urn:dslforum-org:service:Hosts:1"]
+                box.deviceSCPD["urn:dslforum-org:service:DeviceInfo:1"]
+
+        eagerTime = timeit.timeit(eager, number=1)
+        lazyTime = timeit.timeit(lazy, number=1)
+
+        report("2 of 7 services, 20ms latency, loadSCPD", eagerTime * 1000, "ms")
+        report("2 of 7 services, 20ms latency, lazySCPD", lazyTime * 1000, "ms")
+
+    def test_allHosts(self):
+        amount = 250
+        self.server.latency = 0.005
+        items = "".join(["<Item><Index>" + str(index + 1) + "</Index><IPAddress>192.168.178." + str(index) +
+                         "</IPAddress><AddressSource>DHCP</AddressSource><LeaseTimeRemaining>0</LeaseTimeRemaining>"
+                         "<MACAddress>38:C9:86:26:7E:38</MACAddress><InterfaceType>Ethernet</InterfaceType>"
+                         "<Active>1</Active><HostName>host</HostName></Item>" for index in range(amount)])
+        self.server.setDocument("/devicehostlist.lua?sid=1", "<List>" + items + "</List>")
+        self.server.setResults("X_AVM-DE_GetHostListPath", {"NewX_AVM-DE_HostListPath": "/devicehostlist.lua?sid=1"})
+        self.server.setResults("GetHostNumberOfEntries", {"NewHostNumberOfEntries": amount})
+        self.server.setResults("GetGenericHostEntry", {"NewIPAddress": "192.168.178.20", "NewAddressSource": "DHCP",
+                                                       "NewLeaseTimeRemaining": 0, "NewMACAddress": "38:C9:86:26:7E:38",
+                                                       "NewInterfaceType": "Ethernet", "NewActive": 1,
+                                                       "NewHostName": "host"})
+
+        box = Lan("127.0.0.1", port=self.server.port)
+        box.setupTR64Device("fritz.box")
+
+        def serial():
+            for index in range(box.getAmountOfHostsConnected()):
+                box.getHostDetailsByIndex(index)
+
+        bulkTime = timeit.timeit(box.getAllHosts, number=1)
+        self.server.removeAction("X_AVM-DE_GetHostListPath")
+        serialTime = timeit.timeit(serial, number=1)
+        concurrentTime = timeit.timeit(functools.partial(box.getAllHosts, concurrency=8), number=1)
+
+        start = timeit.default_timer()
+        iterator = box.iterHosts(concurrency=8)
+        next(iterator)
+        firstHostTime = timeit.default_timer() - start
+        list(iterator)
+        iterTime = timeit.default_timer() - start
+        box.close()
+
+        report("250 hosts, 5ms latency, getHostDetailsByIndex", serialTime * 1000, "ms")
+        report("250 hosts, 5ms latency, getAllHosts per index (8)", concurrentTime * 1000, "ms")
+        report("250 hosts, 5ms latency, getAllHosts host list", bulkTime * 1000, "ms")
+        report("250 hosts, 5ms latency, iterHosts(8) first host", firstHostTime * 1000, "ms")
+        report("250 hosts, 5ms latency, iterHosts(8) all hosts", iterTime * 1000, "ms")
+
+    def test_envelopeBuild(self):
+        amount = 100000
+        namespace = "urn:dslforum-org:service:Hosts:1"
+
+        def concatenated(namespace, action, arguments):
+            # the envelope as it was built before the templates
+            header = {'Content-Type': 'text/xml; charset="UTF-8"',
+                      'Soapaction': '"' + namespace + "#" + action + '"'}
+            body = '<?xml version="1.0" encoding="UTF-8"?>\n<s:Envelope\n' \
+                   '    s:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/"\n' \
+                   '    xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"\n' \
+                   '    xmlns:xsd="http://www.w3.org/2001/XMLSchema"\n' \
+                   '    xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\n    <s:Header/>\n    <s:Body>\n'
+            body += "        <u:" + action + ' xmlns="' + namespace + '">\n'
+            for key in arguments.keys():
+                body += "            <" + key + ">" + str(arguments[key]) + "</" + key + ">\n"
+            body += "        </u:" + action + ">\n"
+            body += '</s:Body>\n</s:Envelope>'
+            return header, body
+
+        for action, arguments in [("GetHostNumberOfEntries", {}), ("GetGenericHostEntry", {"NewIndex": 12}),
+                                  ("SetArguments", dict(("NewArgument" + str(index), "value " + str(index))
+                                                        for index in range(8)))]:
+            concatenatedTime = timeit.timeit(functools.partial(concatenated, namespace, action, arguments),
+                                             number=amount)
+            templatedTime = timeit.timeit(functools.partial(DeviceTR64._buildSOAPRequest, namespace, action,
+                                                            arguments), number=amount)
+
+            name = "SOAP envelope with " + str(len(arguments)) + " arguments"
+            report(name + " by concatenation", concatenatedTime / amount * 1e6, "us/envelope")
+            report(name + " from template", templatedTime / amount * 1e6, "us/envelope")
+
+    def test_serviceProxies(self):
+        amount = 500
+        self.server.loadFixtures()
+
+        box = DeviceTR64("127.0.0.1", port=self.server.port)
+        box.loadDeviceDefinitions(self.server.url("/tr64desc.xml"))
+        box.loadSCPD()
+
+        def execute():
+            box.execute(box.getControlURL("urn:dslforum-org:service:Hosts:1"), "urn:dslforum-org:service:Hosts:1",
+                        "GetGenericHostEntry", NewIndex=1)
+
+        def proxy():
+            box.services.Hosts.GetGenericHostEntry(NewIndex=1)
+
+        executeTime = timeit.timeit(execute, number=amount)
+        proxyTime = timeit.timeit(proxy, number=amount)
+        box.close()
+
+        report("GetGenericHostEntry with execute", amount / executeTime, "actions/s")
+        report("GetGenericHostEntry with services proxy", amount / proxyTime, "actions/s")
+
+    def test_actionSignature(self):
+        amount = 100000
+        signature = ActionSignature("GetGenericHostEntry", [("NewIndex", "ui2")],
+                                    [("NewIPAddress", "string"), ("NewLeaseTimeRemaining", "i4"),
+                                     ("NewActive", "boolean"), ("NewHostName", "string")])
+        results = {"NewIPAddress": "192.168.178.20", "NewLeaseTimeRemaining": "0", "NewActive": "1",
+                   "NewHostName": "host"}
+
+        def compiled():
+            signature.validate({"NewIndex": 3})
+            signature.convertResults(dict(results))
+
+        report("ActionSignature validate and convert", timeit.timeit(compiled, number=amount) / amount * 1e6,
+               "us/action")
+
+    def test_counterTracker(self):
+        amount = 200000
+        tracker = CounterTracker(width=32)
+        update = tracker.update
+
+        def samples():
+            for index in range(amount):
+                update((index * 400000000) % 4294967296, index, 1000 + index)
+
+        report("CounterTracker update", timeit.timeit(samples, number=1) / amount * 1e9, "ns/sample")
+        self.assertTrue(tracker.wraps > 0)
+
+    def test_ringBuffer(self):
+        # 24 hours of a metric polled every 5 seconds
+        capacity = 24 * 60 * 60 // 5
+
+        for useNumPy in ([False, True] if numpy is not None else [False]):
+            buffer = RingBuffer(capacity, useNumPy=useNumPy)
+            name = "RingBuffer " + ("NumPy" if useNumPy else "builtin")
+
+            def fill():
+                for index in range(capacity + 1000):
+                    buffer.append(index % 1000, index * 5)
+
+            report(name + " append", timeit.timeit(fill, number=1) / (capacity + 1000) * 1e9, "ns/sample")
+
+            aggregate = functools.partial(buffer.average, since=capacity * 5 - 3600 * 6)
+            report(name + " average of 6 hours", timeit.timeit(aggregate, number=20) / 20 * 1e6, "us")
+
+            aggregate = functools.partial(buffer.percentile, 95)
+            report(name + " 95th percentile of 24 hours", timeit.timeit(aggregate, number=20) / 20 * 1e6, "us")
+
+        report("RingBuffer memory of 24 hours", (len(buffer.values()) + len(buffer.timestamps())) * 8 / 1024.0, "KB")
+
+    def test_ssdpParsing(self):
+        corpus = loadSSDPResponses() * 250
+
+        def parse():
+            for data in corpus:
+                DiscoveryResponse(data).locationHost
+
+        def parseHTTPResponse():
+            # the former parser, HTTPResponse over a file object plus urlparse
+            for data in corpus:
+                response = HTTPResponse(_FakeSocket(data))
+                response.begin()
+                urlparse(response.getheader("location")).hostname
+
+        report("SSDP response HTTPResponse", timeit.timeit(parseHTTPResponse, number=1) / len(corpus) * 1e6,
+               "us/datagram")
+        report("SSDP response DiscoveryResponse", timeit.timeit(parse, number=1) / len(corpus) * 1e6, "us/datagram")
+
+    def test_soapParsing(self):
+        fixtures = [("soap_GetGenericHostEntry.xml", "urn:dslforum-org:service:Hosts:1", "GetGenericHostEntry"),
+                    ("soap_DeviceInfo_GetInfo.xml", "urn:dslforum-org:service:DeviceInfo:1", "GetInfo"),
+                    ("soap_GetDeviceLog.xml", "urn:dslforum-org:service:DeviceInfo:1", "GetDeviceLog")]
+
+        def former(data):
+            # the response as it was parsed before, decoded to text and encoded again
+            return dict((node.tag, node.text) for node in ET.fromstring(data.decode("utf-8").encode("utf-8"))[0][0])
+
+        for name, namespace, action in fixtures:
+            data = loadFixture(name)
+            amount = max(20, 2000000 // len(data))
+
+            formerTime = timeit.timeit(functools.partial(former, data), number=amount)
+            parseTime = timeit.timeit(functools.partial(DeviceTR64._parseSOAPResponse, namespace, action, data),
+                                      number=amount)
+
+            report(name + " decoded and parsed", formerTime / amount * 1e6, "us/response")
+            report(name + " _parseSOAPResponse", parseTime / amount * 1e6, "us/response")
+
+    def test_xmlBackends(self):
+        backends = ["etree"]
+        if lxmlTree is not None:
+            backends.append("lxml")
+
+        fixtures = ["dlna_desc.xml", "tr64desc.xml", "wlanconfigSCPD.xml", "soap_GetDeviceLog.xml"]
+
+        try:
+            for name in fixtures:
+                data = loadFixture(name)
+                amount = max(20, 2000000 // len(data))
+
+                for backend in backends:
+                    XMLBackend.setBackend(backend)
+                    parseTime = timeit.timeit(functools.partial(DeviceTR64._parseXML, data), number=amount)
+
+                    report(name + " " + backend, parseTime / amount * 1e6, "us/document")
+        finally:
+            XMLBackend.setBackend()
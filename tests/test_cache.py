@@ -0,0 +1,162 @@
+import shutil
+import tempfile
+import unittest
+
+from mockserver import MockTR64Server
+from simpletr64.cache import DefinitionCache
+from simpletr64.devicetr64 import DeviceTR64
+
+
+class TestDefinitionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = MockTR64Server().loadFixtures().start()
+        self.url = self.server.url("/tr64desc.xml")
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def load(self, cache, ignoreFailures=False):
+        with DeviceTR64("127.0.0.1", port=self.server.port) as box:
+            box.definitionCache = cache
+            box.loadDeviceDefinitions(self.url)
+            box.loadSCPD(ignoreFailures=ignoreFailures)
+            return box
+
+    def test_key(self):
+        key = DefinitionCache.createKey({"UDN": "uuid:1", "modelNumber": "avm"}, {"{ns}Display": "113.06.51"})
+        self.assertEqual(key, DefinitionCache.createKey({"UDN": "uuid:1", "modelNumber": "avm"},
+                                                        {"{ns}Display": "113.06.51"}))
+        self.assertNotEqual(key, DefinitionCache.createKey({"UDN": "uuid:1", "modelNumber": "avm"},
+                                                           {"{ns}Display": "113.06.60"}))
+        self.assertEqual(DefinitionCache.createKey({"modelNumber": "avm"}, {}), None)
+
+    def test_cache(self):
+        cache = DefinitionCache(self.directory)
+
+        box = self.load(cache)
+        self.assertEqual(len(box.deviceSCPD), 7)
+        self.assertEqual(self.server.requests, 8)
+
+        # only the root XML gets validated, the definitions come out of the cache
+        cachedBox = self.load(cache)
+        self.assertEqual(self.server.requests, 9)
+        self.assertEqual(self.server.notModified, 1)
+        self.assertEqual(cachedBox.deviceSCPD, box.deviceSCPD)
+        self.assertEqual(cachedBox.deviceServiceDefinitions, box.deviceServiceDefinitions)
+        self.assertEqual(cachedBox.deviceInformations, box.deviceInformations)
+        self.assertEqual(cachedBox.deviceInformationUnknownKeys, box.deviceInformationUnknownKeys)
+
+        # a changed root XML invalidates the cached SCPD's
+        self.server.setDocument("/tr64desc.xml", self.server.documents["/tr64desc.xml"] + b"\n")
+        self.load(cache)
+        self.assertEqual(self.server.requests, 17)
+
+        self.load(cache)
+        self.assertEqual(self.server.requests, 18)
+        self.assertEqual(self.server.notModified, 2)
+
+        cache.clear()
+        self.load(cache)
+        self.assertEqual(self.server.requests, 26)
+
+    def test_noCache(self):
+        self.load(None)
+        self.load(None)
+        self.assertEqual(self.server.requests, 16)
+
+    def test_failures(self):
+        cache = DefinitionCache(self.directory)
+        del self.server.documents["/timeSCPD.xml"]
+
+        box = self.load(cache, ignoreFailures=True)
+        self.assertEqual(len(box.deviceSCPD), 6)
+
+        # the failed service type is stored without its SCPD and error
+        key = box._getCacheKey()
+        entry = cache.load(key)
+        self.assertEqual(sorted(entry.keys()), ["deviceInformations", "deviceSCPD", "deviceServiceDefinitions",
+                                                "deviceUnknownKeys", "deviceXMLDigest"])
+        self.assertEqual(len(entry["deviceSCPD"]), 6)
+        self.assertFalse("error" in entry["deviceServiceDefinitions"]["urn:dslforum-org:service:Time:1"])
+
+        stored = []
+        store = cache.store
+        cache.store = lambda key, entry: stored.append(key) or store(key, entry)
+
+        # the failed service type gets loaded again, the cache is not written again
+        box = self.load(cache, ignoreFailures=True)
+        self.assertEqual(self.server.requests, 8 + 2)
+        self.assertTrue("error" in box.deviceServiceDefinitions["urn:dslforum-org:service:Time:1"])
+        self.assertEqual(stored, [])
+
+        # until it can be loaded
+        self.server.loadFixtures()
+        box = self.load(cache, ignoreFailures=True)
+        self.assertEqual(len(box.deviceSCPD), 7)
+        self.assertEqual(stored, [key])
+        self.assertEqual(len(cache.load(key)["deviceSCPD"]), 7)
+
+    def test_lazySCPD(self):
+        cache = DefinitionCache(self.directory)
+        self.load(cache)
+
+        with DeviceTR64("127.0.0.1", port=self.server.port) as box:
+            box.definitionCache = cache
+            box.lazySCPD = True
+            box.loadDeviceDefinitions(self.url)
+
+            # the first access takes all SCPD's out of the cache
+            self.assertTrue("GetInfo" in box.deviceSCPD["urn:dslforum-org:service:DeviceInfo:1"])
+            self.assertEqual(len(box.deviceSCPD), 7)
+            self.assertEqual(self.server.requests, 9)
+
+    def test_withoutValidators(self):
+        cache = DefinitionCache(self.directory)
+        self.server.validators = False
+
+        box = self.load(cache)
+        stored = []
+        store = cache.store
+        cache.store = lambda key, entry: stored.append(key) or store(key, entry)
+
+        # the root XML gets downloaded, an unchanged one does not write the cache
+        cachedBox = self.load(cache)
+        self.assertEqual(self.server.requests, 9)
+        self.assertEqual(cachedBox.deviceSCPD, box.deviceSCPD)
+        self.assertEqual(stored, [])
+
+    def test_missingEntry(self):
+        cache = DefinitionCache(self.directory)
+        box = self.load(cache)
+
+        # the validators are known but the entry of the device is gone, the root XML gets downloaded again
+        cache.remove(box._getCacheKey())
+        cachedBox = self.load(cache)
+        self.assertEqual(self.server.notModified, 0)
+        self.assertEqual(cachedBox.deviceServiceDefinitions, box.deviceServiceDefinitions)
+        self.assertEqual(self.server.requests, 8 + 8)
+
+    def test_storeLazySCPD(self):
+        cache = DefinitionCache(self.directory)
+
+        with DeviceTR64("127.0.0.1", port=self.server.port) as box:
+            box.definitionCache = cache
+            box.lazySCPD = True
+            box.loadDeviceDefinitions(self.url)
+
+            self.assertTrue("GetInfo" in box.deviceSCPD["urn:dslforum-org:service:DeviceInfo:1"])
+            self.assertTrue("SetNTPServers" in box.getSCPD("urn:dslforum-org:service:Time:1"))
+            self.assertEqual(len(cache.load(box._getCacheKey())["deviceSCPD"]), 2)
+
+        with DeviceTR64("127.0.0.1", port=self.server.port) as box:
+            box.definitionCache = cache
+            box.lazySCPD = True
+            box.loadDeviceDefinitions(self.url)
+
+            # an other SCPD gets added to the cached ones
+            self.assertTrue("GetGenericHostEntry" in box.deviceSCPD["urn:dslforum-org:service:Hosts:1"])
+            self.assertEqual(len(cache.load(box._getCacheKey())["deviceSCPD"]), 3)
+            self.assertEqual(self.server.requests, 3 + 2)
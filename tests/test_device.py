@@ -1,6 +1,13 @@
+# -*- coding: utf-8 -*-
+import os
+import time
 import unittest
 
+import requests
+
+from mockserver import MockTR64Server
 from simpletr64.devicetr64 import DeviceTR64
+from simpletr64.signature import ActionSignature
 
 
 class TestBox(unittest.TestCase):
@@ -41,3 +48,356 @@ class TestBox(unittest.TestCase):
         box.setupTR64Device("fritz.box")
         self.assertTrue(len(box.deviceServiceDefinitions) > 0)
 
+
+    def test_connectionReuse(self):
+        server = MockTR64Server().start()
+        try:
+            box = DeviceTR64("127.0.0.1", port=server.port)
+
+            for index in range(10):
+                results = box.execute("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1",
+                                      "GetGenericHostEntry", NewIndex=index)
+                self.assertEqual(results["NewIndex"], str(index))
+
+            self.assertEqual(server.requests, 10)
+            self.assertEqual(server.connections, 1)
+        finally:
+            server.stop()
+
+    def test_noKeepAlive(self):
+        server = MockTR64Server().start()
+        try:
+            box = DeviceTR64("127.0.0.1", port=server.port)
+            box.keepAlive = False
+
+            for index in range(3):
+                box.execute("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1", "GetHostNumberOfEntries")
+
+            self.assertEqual(server.connections, 3)
+        finally:
+            server.stop()
+
+    def test_close(self):
+        server = MockTR64Server().start()
+        try:
+            with DeviceTR64("127.0.0.1", port=server.port) as box:
+                box.execute("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1", "GetHostNumberOfEntries")
+
+            # a closed device opens a new connection on the next request
+            box.execute("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1", "GetHostNumberOfEntries")
+            self.assertEqual(server.connections, 2)
+
+            box.maxIdleTime = 0.01
+            time.sleep(0.05)
+            box.execute("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1", "GetHostNumberOfEntries")
+            self.assertEqual(server.connections, 3)
+            box.close()
+        finally:
+            server.stop()
+
+    def test_digestAuthReuse(self):
+        server = MockTR64Server().start()
+        server.setCredentials("admin", "secret")
+        try:
+            box = DeviceTR64("127.0.0.1", port=server.port)
+            box.username = "admin"
+            box.password = "secret"
+
+            for index in range(5):
+                box.execute("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1", "GetHostNumberOfEntries")
+
+            # only the very first action got challenged
+            self.assertEqual(server.challenges, 1)
+            self.assertEqual(server.requests, 6)
+
+            # a stale nonce gets challenged once again
+            server.renewNonce()
+            box.execute("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1", "GetHostNumberOfEntries")
+            box.execute("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1", "GetHostNumberOfEntries")
+            self.assertEqual(server.challenges, 2)
+            self.assertEqual(server.requests, 9)
+
+            box.password = "wrong"
+            self.assertRaises(ValueError, box.execute, "/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1",
+                              "GetHostNumberOfEntries")
+            box.close()
+        finally:
+            server.stop()
+
+    def test_executeMany(self):
+        server = MockTR64Server().start()
+        try:
+            with DeviceTR64("127.0.0.1", port=server.port) as box:
+                actions = [("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1", "GetGenericHostEntry",
+                            {"NewIndex": index}) for index in range(50)]
+                actions.append(("", "urn:dslforum-org:service:Hosts:1", "GetHostNumberOfEntries"))
+
+                results = box.executeMany(actions, concurrency=4)
+
+                self.assertEqual([result["NewIndex"] for result in results[:50]], [str(index) for index in range(50)])
+                self.assertTrue(isinstance(results[50], ValueError))
+                self.assertTrue(server.connections <= 4)
+        finally:
+            server.stop()
+
+    def test_executeManyDeadline(self):
+        server = MockTR64Server(latency=0.2).start()
+        try:
+            with DeviceTR64("127.0.0.1", port=server.port) as box:
+                actions = [("/upnp/control/hosts", "urn:dslforum-org:service:Hosts:1", "GetHostNumberOfEntries")] * 6
+
+                results = box.executeMany(actions, concurrency=2, deadline=0.3)
+
+                self.assertEqual(len(results), 6)
+                self.assertTrue(isinstance(results[0], dict))
+                self.assertTrue(isinstance(results[-1], requests.exceptions.Timeout))
+        finally:
+            server.stop()
+
+    def test_soapEscaping(self):
+        server = MockTR64Server().start()
+        try:
+            with DeviceTR64("127.0.0.1", port=server.port) as box:
+                results = box.execute("/upnp/control/wlanconfig1", "urn:dslforum-org:service:WLANConfiguration:1",
+                                      "SetSSID", NewSSID="Tom & Jerry <5GHz>")
+                self.assertEqual(results["NewSSID"], "Tom & Jerry <5GHz>")
+        finally:
+            server.stop()
+
+    def test_soapTemplate(self):
+        header, body = DeviceTR64._buildSOAPRequest("urn:dslforum-org:service:Hosts:1", "GetGenericHostEntry",
+                                                    {"NewIndex": 1})
+        header["Connection"] = "close"
+        header2, body2 = DeviceTR64._buildSOAPRequest("urn:dslforum-org:service:Hosts:1", "GetGenericHostEntry",
+                                                      {"NewIndex": 2})
+
+        self.assertEqual(header2, {'Content-Type': 'text/xml; charset="UTF-8"',
+                                   'Soapaction': '"urn:dslforum-org:service:Hosts:1#GetGenericHostEntry"'})
+        self.assertTrue("<NewIndex>2</NewIndex>" in body2)
+        self.assertEqual(body.replace("<NewIndex>1</NewIndex>", "<NewIndex>2</NewIndex>"), body2)
+
+    def test_soapBoolean(self):
+        signature = ActionSignature.createFromSCPD("SetEnable", {
+            "inParameter": {"NewEnable": {"variable": "Enable", "dataType": "boolean"}}, "outParameter": {}})
+
+        for value, rendered in [(True, "1"), (False, "0"), (1, "1"), ("0", "0")]:
+            signature.validate({"NewEnable": value})
+
+            header, body = DeviceTR64._buildSOAPRequest("urn:dslforum-org:service:WLANConfiguration:1", "SetEnable",
+                                                        {"NewEnable": value})
+            self.assertTrue("<NewEnable>" + rendered + "</NewEnable>" in body)
+
+    def test_parseXML(self):
+        data = u'<?xml version="1.0" encoding="ISO-8859-1"?><root><name>Küche</name></root>'.encode("iso-8859-1")
+
+        self.assertEqual(DeviceTR64._parseXML(data).find("name").text, u"Küche")
+
+        chunks = iter([data[index:index + 7] for index in range(0, len(data), 7)])
+        self.assertEqual(DeviceTR64._parseXML(chunks).find("name").text, u"Küche")
+
+    def test_executeUnicode(self):
+        server = MockTR64Server().start()
+        try:
+            with DeviceTR64("127.0.0.1", port=server.port) as box:
+                server.setResults("GetInfo", {"NewSSID": u"Café"})
+                results = box.execute("/upnp/control/wlanconfig1", "urn:dslforum-org:service:WLANConfiguration:1",
+                                      "GetInfo")
+                self.assertEqual(results["NewSSID"], u"Café")
+        finally:
+            server.stop()
+
+    def test_parseSOAPResponse(self):
+        with open(os.path.join(os.path.dirname(__file__), "data", "soap_GetGenericHostEntry.xml"), "rb") as f:
+            data = f.read()
+
+        results = DeviceTR64._parseSOAPResponse("urn:dslforum-org:service:Hosts:1", "GetGenericHostEntry", data)
+        self.assertEqual(len(results), 7)
+        self.assertEqual(results["NewHostName"], "Apple-TV")
+
+        chunks = [data[index:index + 16] for index in range(0, len(data), 16)]
+        self.assertEqual(DeviceTR64._parseSOAPResponse("urn:dslforum-org:service:Hosts:1", "GetGenericHostEntry",
+                                                       iter(chunks)), results)
+
+        self.assertRaises(ValueError, DeviceTR64._parseSOAPResponse, "urn:dslforum-org:service:Hosts:1",
+                          "GetSpecificHostEntry", data)
+        self.assertRaises(ValueError, DeviceTR64._parseSOAPResponse, "urn:dslforum-org:service:Hosts:1",
+                          "GetGenericHostEntry", data[:200])
+        self.assertRaises(ValueError, DeviceTR64._parseSOAPResponse, "urn:dslforum-org:service:Hosts:1",
+                          "GetGenericHostEntry", iter([data[:200]]))
+
+        # large responses
+        with open(os.path.join(os.path.dirname(__file__), "data", "soap_GetDeviceLog.xml"), "rb") as f:
+            data = f.read()
+
+        results = DeviceTR64._parseSOAPResponse("urn:dslforum-org:service:DeviceInfo:1", "GetDeviceLog", data)
+        self.assertEqual(len(results["NewDeviceLog"].split("\n")), 1500)
+
+    def test_conditionalRequests(self):
+        server = MockTR64Server().loadFixtures().start()
+        try:
+            with DeviceTR64("127.0.0.1", port=server.port) as box:
+                box.loadDeviceDefinitions(server.url("/tr64desc.xml"))
+                box.loadSCPD()
+                scpd = box.deviceSCPD
+                self.assertEqual(server.requests, 8)
+
+                # nothing has changed, the device answers every request with 304
+                box.loadDeviceDefinitions(server.url("/tr64desc.xml"))
+                box.loadSCPD()
+                self.assertEqual(server.notModified, 8)
+                self.assertEqual(box.deviceSCPD, scpd)
+
+                # a changed root XML gets parsed again, the SCPD's are still the same
+                server.setDocument("/tr64desc.xml", server.documents["/tr64desc.xml"] + b"\n")
+                box.loadDeviceDefinitions(server.url("/tr64desc.xml"))
+                box.loadSCPD()
+                self.assertEqual(server.notModified, 15)
+                self.assertEqual(box.deviceSCPD, scpd)
+
+                # a changed SCPD gets parsed again
+                server.setDocument("/timeSCPD.xml", server.documents["/timeSCPD.xml"].replace(b"SetNTPServers",
+                                                                                              b"SetNTPServer"))
+                box.loadSCPD()
+                self.assertEqual(server.notModified, 21)
+                self.assertTrue("SetNTPServer" in box.deviceSCPD["urn:dslforum-org:service:Time:1"])
+        finally:
+            server.stop()
+
+    def test_loadSCPDConcurrent(self):
+        server = MockTR64Server().loadFixtures().start()
+        try:
+            with DeviceTR64("127.0.0.1", port=server.port) as box:
+                box.loadDeviceDefinitions(server.url("/tr64desc.xml"))
+                box.loadSCPD()
+                scpd = box.deviceSCPD
+
+            with DeviceTR64("127.0.0.1", port=server.port) as box:
+                box.loadDeviceDefinitions(server.url("/tr64desc.xml"))
+                box.loadSCPD(concurrency=4)
+                self.assertEqual(box.deviceSCPD, scpd)
+
+                with self.assertRaises(ValueError):
+                    box.loadSCPD(concurrency=0)
+
+                # a missing SCPD fails only its own service type
+                del server.documents["/timeSCPD.xml"]
+                box.loadSCPD(concurrency=4, ignoreFailures=True)
+                self.assertEqual(len(box.deviceSCPD), 6)
+                self.assertTrue("error" in box.deviceServiceDefinitions["urn:dslforum-org:service:Time:1"])
+                self.assertTrue("error" not in box.deviceServiceDefinitions["urn:dslforum-org:service:Hosts:1"])
+
+                with self.assertRaises(ValueError):
+                    box.loadSCPD(concurrency=4)
+                self.assertEqual(len(box.deviceSCPD), 6)
+        finally:
+            server.stop()
+
+    def test_lazySCPD(self):
+        server = MockTR64Server().loadFixtures().start()
+        try:
+            with DeviceTR64("127.0.0.1", port=server.port) as box:
+                box.lazySCPD = True
+                box.loadDeviceDefinitions(server.url("/tr64desc.xml"))
+                self.assertEqual(len(box.deviceSCPD), 0)
+
+                actions = box.deviceSCPD["urn:dslforum-org:service:Hosts:1"]
+                self.assertTrue("GetGenericHostEntry" in actions)
+                self.assertEqual(server.requests, 2)
+
+                # loaded only once
+                self.assertTrue(box.deviceSCPD["urn:dslforum-org:service:Hosts:1"] is actions)
+                self.assertTrue(box.getSCPD("urn:dslforum-org:service:Hosts:1") is actions)
+                self.assertEqual(server.requests, 2)
+                self.assertEqual(len(box.deviceSCPD), 1)
+
+                with self.assertRaises(KeyError):
+                    box.deviceSCPD["urn:dslforum-org:service:Unknown:1"]
+
+                with self.assertRaises(ValueError):
+                    box.getSCPD("urn:dslforum-org:service:Unknown:1")
+
+                box.lazySCPD = False
+                with self.assertRaises(KeyError):
+                    box.deviceSCPD["urn:dslforum-org:service:Time:1"]
+
+                self.assertTrue("SetNTPServers" in box.getSCPD("urn:dslforum-org:service:Time:1"))
+                self.assertEqual(server.requests, 3)
+        finally:
+            server.stop()
+
+    def test_lazyActionSignature(self):
+        server = MockTR64Server().loadFixtures().start()
+        server.setResults("GetGenericHostEntry", {"NewHostName": "host"})
+        del server.documents["/hostsSCPD.xml"]
+        try:
+            with DeviceTR64("127.0.0.1", port=server.port) as box:
+                namespace = "urn:dslforum-org:service:Hosts:1"
+                box.lazySCPD = True
+                box.loadDeviceDefinitions(server.url("/tr64desc.xml"))
+                requests = server.requests
+
+                # the failing SCPD gets requested only once
+                for index in range(3):
+                    results = box.execute("/upnp/control/hosts", namespace, "GetGenericHostEntry", NewIndex=index)
+                    self.assertEqual(results["NewHostName"], "host")
+                self.assertEqual(server.requests, requests + 4)
+
+                # setting lazySCPD again retries
+                server.setDocument("/hostsSCPD.xml", server.documents["/timeSCPD.xml"])
+                box.lazySCPD = True
+                with self.assertRaises(ValueError):
+                    box.getActionSignature(namespace, "GetGenericHostEntry")
+        finally:
+            server.stop()
+
+    def test_actionSignature(self):
+        server = MockTR64Server().loadFixtures().start()
+        server.setResults("GetGenericHostEntry", {"NewIPAddress": "192.168.178.20", "NewAddressSource": "DHCP",
+                                                  "NewLeaseTimeRemaining": 0, "NewMACAddress": "38:C9:86:26:7E:38",
+                                                  "NewInterfaceType": "Ethernet", "NewActive": 1,
+                                                  "NewHostName": "host"})
+        try:
+            with DeviceTR64("127.0.0.1", port=server.port) as box:
+                namespace = "urn:dslforum-org:service:Hosts:1"
+
+                # without SCPD nothing can be validated or converted
+                self.assertEqual(box.getActionSignature(namespace, "GetGenericHostEntry"), None)
+                box.typedResults = True
+                results = box.execute("/upnp/control/hosts", namespace, "GetGenericHostEntry", NewIndex=1)
+                self.assertEqual(results["NewActive"], "1")
+
+                box.loadDeviceDefinitions(server.url("/tr64desc.xml"))
+                box.loadSCPD(namespace)
+                requests = server.requests
+
+                signature = box.getActionSignature(namespace, "GetGenericHostEntry")
+                self.assertEqual(signature.inArguments, [("NewIndex", "ui2")])
+                self.assertTrue(box.getActionSignature(namespace, "GetGenericHostEntry") is signature)
+
+                with self.assertRaises(ValueError):
+                    box.getActionSignature(namespace, "GetUnknown")
+
+                # invalid arguments do not reach the device
+                for arguments in [{}, {"NewIndex": -1}, {"NewIndex": 1, "NewUnknown": 2}]:
+                    with self.assertRaises(ValueError):
+                        box.execute("/upnp/control/hosts", namespace, "GetGenericHostEntry", **arguments)
+                self.assertEqual(server.requests, requests)
+
+                results = box.execute("/upnp/control/hosts", namespace, "GetGenericHostEntry", NewIndex=1)
+                self.assertTrue(results["NewActive"] is True)
+                self.assertEqual(results["NewLeaseTimeRemaining"], 0)
+                self.assertEqual(results["NewHostName"], "host")
+
+                box.typedResults = False
+                box.validateArguments = False
+                results = box.execute("/upnp/control/hosts", namespace, "GetGenericHostEntry", NewIndex=-1)
+                self.assertEqual(results["NewActive"], "1")
+
+                # an unchanged SCPD keeps its signatures, a downloaded one gets compiled again
+                box.loadSCPD(namespace)
+                self.assertTrue(box.getActionSignature(namespace, "GetGenericHostEntry") is signature)
+                server.validators = False
+                box.loadSCPD(namespace)
+                self.assertFalse(box.getActionSignature(namespace, "GetGenericHostEntry") is signature)
+        finally:
+            server.stop()
@@ -1,12 +1,177 @@
+import socket
+import time
 import unittest
 
 import defaults
+from mockserver import MockSSDPServer, loadSSDPResponses
 from simpletr64.devicetr64 import DeviceTR64
-from simpletr64.discover import Discover
+from simpletr64.discover import Discover, DiscoveryResponse, DiscoveryStatistics
 
 
 class TestDiscover(unittest.TestCase):
 
+    def test_response(self):
+        responses = [DiscoveryResponse(data) for data in loadSSDPResponses()]
+
+        self.assertEqual(len(responses), 8)
+        self.assertTrue(all(response.status == 200 and response.location for response in responses))
+
+        response = responses[0]
+        self.assertEqual(response.location, "http://192.168.178.1:49000/tr64desc.xml")
+        self.assertEqual(response.service, "urn:dslforum-org:device:InternetGatewayDevice:1")
+        self.assertEqual(response.usn, "uuid:739f2419-bccb-40e7-8e6c-3810D5A1B2C3::"
+                                        "urn:dslforum-org:device:InternetGatewayDevice:1")
+        self.assertEqual((response.locationProtocol, response.locationHost, response.locationPort,
+                          response.locationPath), ("http", "192.168.178.1", 49000, "/tr64desc.xml"))
+        self.assertEqual(response.getheader("Cache-Control"), "max-age=1800")
+        self.assertEqual(response.getheader("EXT"), "")
+        self.assertEqual(response.getheader("X-Other", "none"), "none")
+        self.assertEqual(len(response.getheaders()), 6)
+
+        # lower case header names and an IPv6 location
+        self.assertEqual(responses[5].locationPort, 8200)
+        self.assertEqual(responses[7].locationHost, "fe80::1a2b:3cff:fe4d:5e6f")
+
+        response = DiscoveryResponse.create("https://192.168.178.1/tr64desc.xml", service="upnp:rootdevice")
+        self.assertEqual((response.locationPort, response.service, response.usn), (443, "upnp:rootdevice", "none"))
+        self.assertEqual(str(response), "LOC: https://192.168.178.1/tr64desc.xml SRV: upnp:rootdevice")
+
+        with self.assertRaises(AttributeError):
+            response.other = 1
+
+        for data in [b"", b"NOTIFY * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\n\r\n", b"HTTP/1.1 OK\r\n\r\n"]:
+            with self.assertRaises(ValueError):
+                DiscoveryResponse(data)
+
+    def test_searchTargets(self):
+        # a single service type as unicode or str, not iterated by its characters
+        for service in [u"urn:dslforum-org:device:InternetGatewayDevice:1",
+                        "urn:dslforum-org:device:InternetGatewayDevice:1"]:
+            targets = Discover._createTargets(service, 1, "239.255.255.250", 1900, None, None, ())
+            self.assertEqual(len(targets), 1)
+            self.assertEqual(len(targets[0][2]), 1)
+            self.assertTrue(b"ST: urn:dslforum-org:device:InternetGatewayDevice:1" in targets[0][2][0][0])
+
+        targets = Discover._createTargets(["upnp:rootdevice", "ssdp:all"], 1, "239.255.255.250", 1900,
+                                          ["127.0.0.1", "127.0.0.2"], None, ())
+        self.assertEqual([(target[0], len(target[2])) for target in targets], [("127.0.0.1", 2), ("127.0.0.2", 2)])
+
+        response = DiscoveryResponse(u"HTTP/1.1 200 OK\r\nLOCATION: http://192.168.178.1:49000/tr64desc.xml\r\n\r\n")
+        self.assertEqual(response.locationPort, 49000)
+
+    def test_discoverSession(self):
+        server = MockSSDPServer().start()
+        try:
+            server.addDevice("http://192.168.178.1:49000/tr64desc.xml")
+            server.addDevice("http://192.168.178.1:49000/igddesc.xml", delay=0.05)
+            server.addDevice("http://192.168.178.20:8080/description.xml", service="upnp:rootdevice", delay=0.1)
+
+            start = time.time()
+            results = Discover.discover(timeout=0.2, retries=2, ipAddress="127.0.0.1", port=server.port)
+
+            self.assertTrue(time.time() - start >= 0.4)
+            self.assertEqual(sorted(result.location for result in results),
+                             ["http://192.168.178.1:49000/igddesc.xml", "http://192.168.178.1:49000/tr64desc.xml",
+                              "http://192.168.178.20:8080/description.xml"])
+            # the retry goes over the same socket, every retry sends the request twice
+            self.assertEqual(server.searches, 4)
+            self.assertEqual(socket.getdefaulttimeout(), None)
+        finally:
+            server.stop()
+
+    def test_discoverLargeResponses(self):
+        server = MockSSDPServer().start()
+        try:
+            vendorHeaders = [("X-VENDOR-" + str(index), "x" * 100) for index in range(30)]
+            server.addDevice("http://192.168.178.1:49000/tr64desc.xml", headers=vendorHeaders)
+            server.addDevice("http://192.168.178.20:8080/description.xml")
+
+            statistics = DiscoveryStatistics()
+            results = Discover.discover(timeout=0.2, retries=1, ipAddress="127.0.0.1", port=server.port,
+                                        statistics=statistics)
+
+            self.assertEqual(len(results), 2)
+            self.assertEqual((statistics.received, statistics.truncated, statistics.duplicates), (4, 0, 2))
+
+            # the location comes before the vendor headers, a truncated response still gets parsed
+            statistics = DiscoveryStatistics()
+            results = Discover.discover(timeout=0.2, retries=1, ipAddress="127.0.0.1", port=server.port,
+                                        bufferSize=1024, statistics=statistics)
+
+            self.assertEqual(len(results), 2)
+            self.assertEqual((statistics.received, statistics.truncated, statistics.invalid), (4, 2, 0))
+        finally:
+            server.stop()
+
+    def test_discoverInvalidLocation(self):
+        server = MockSSDPServer().start()
+        try:
+            server.addDevice("http://1.2.3.4:99999/x.xml")
+            server.addDevice("http://192.168.178.1:49000/tr64desc.xml")
+
+            statistics = DiscoveryStatistics()
+            results = Discover.discover(timeout=0.2, retries=1, ipAddress="127.0.0.1", port=server.port,
+                                        statistics=statistics)
+
+            self.assertEqual([result.location for result in results], ["http://192.168.178.1:49000/tr64desc.xml"])
+            self.assertEqual((statistics.received, statistics.invalid), (4, 2))
+        finally:
+            server.stop()
+
+    def test_discoverExpectedDevices(self):
+        server = MockSSDPServer().start()
+        try:
+            server.addDevice("http://192.168.178.1:49000/tr64desc.xml")
+            server.addDevice("http://192.168.178.20:8080/description.xml", delay=0.1)
+
+            start = time.time()
+            results = Discover.discover(timeout=2, retries=3, ipAddress="127.0.0.1", port=server.port,
+                                        expectedDevices=2)
+
+            self.assertTrue(time.time() - start < 1)
+            self.assertEqual(len(results), 2)
+        finally:
+            server.stop()
+
+    def test_discoverInterfaces(self):
+        server = MockSSDPServer().start()
+        try:
+            server.addDevice("http://192.168.178.1:49000/tr64desc.xml")
+
+            statistics = DiscoveryStatistics()
+            results = Discover.discover(timeout=0.2, retries=1, ipAddress="127.0.0.1", port=server.port,
+                                        statistics=statistics, interfaces=["127.0.0.1", "127.0.0.2"])
+
+            # the same location is kept once per interface
+            self.assertEqual(sorted((result.interface, result.location) for result in results),
+                             [("127.0.0.1", "http://192.168.178.1:49000/tr64desc.xml"),
+                              ("127.0.0.2", "http://192.168.178.1:49000/tr64desc.xml")])
+            self.assertEqual(server.searches, 4)
+            self.assertEqual((statistics.received, statistics.duplicates), (4, 2))
+        finally:
+            server.stop()
+
+    def test_discoverIPv6(self):
+        try:
+            server = MockSSDPServer("::1").start()
+        except socket.error:
+            self.skipTest("IPv6 is not available")
+
+        try:
+            server.addDevice("http://[fe80::1a2b:3cff:fe4d:5e6f]:49000/tr64desc.xml")
+
+            results = Discover.discover(timeout=0.2, retries=1, port=server.port, interfaces=[],
+                                        ipv6Interfaces=["lo"], ipv6Addresses=["::1"])
+
+            self.assertEqual(len(results), 1)
+            self.assertEqual((results[0].interface, results[0].locationHost), ("lo", "fe80::1a2b:3cff:fe4d:5e6f"))
+            self.assertEqual(server.searches, 2)
+        finally:
+            server.stop()
+
+        with self.assertRaises(ValueError):
+            Discover.discover(timeout=0.2, retries=1, interfaces=[], ipv6Interfaces=["nonexistent0"])
+
     def test_discover(self):
         results = Discover.discover(retries=1)
         self.assertTrue(len(results) > 0)
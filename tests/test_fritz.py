@@ -1,6 +1,7 @@
 import unittest
 
 import defaults
+from mockserver import MockTR64Server
 from simpletr64.actions.fritz import Fritz
 
 
@@ -49,3 +50,26 @@ class TestFritz(unittest.TestCase):
         callList = box.getCallList()
 
         self.assertTrue(len(callList))
+
+    def test_CallListParsing(self):
+        server = MockTR64Server().start()
+        try:
+            calls = u"".join([u"<Call><Id>" + str(index) + "</Id><Type>1</Type><Name>K\u00fcche</Name></Call>"
+                             for index in range(500)])
+            server.setDocument("/calllist.lua?sid=1", '<?xml version="1.0" encoding="UTF-8"?><root>' +
+                               calls + '</root>')
+            server.setResults("GetCallList", {"NewCallListURL": server.url("/calllist.lua?sid=1")})
+
+            with Fritz("127.0.0.1", port=server.port) as box:
+                box.setupTR64Device("fritz.box")
+                callList = box.getCallList()
+
+                server.setResults("GetCallList", {"NewCallListURL": server.url("/missing.lua")})
+                with self.assertRaises(ValueError):
+                    box.getCallList()
+
+            self.assertEqual(len(callList), 500)
+            self.assertEqual(callList[499]["Id"], "499")
+            self.assertEqual(callList[499]["Name"], u"K\u00fcche")
+        finally:
+            server.stop()
@@ -1,6 +1,7 @@
 import unittest
 
 import defaults
+from mockserver import MockTR64Server
 from simpletr64.actions.lan import Lan
 
 
@@ -90,3 +91,155 @@ class TestLan(unittest.TestCase):
         self.assertTrue(ethernetStatistic.packetsSent >= 0)
         self.assertTrue(ethernetStatistic.packetsReceived >= 0)
         self.assertTrue(len(ethernetStatistic.raw.keys()) > 0)
+
+    def test_AllHostsFromHostList(self):
+        server = MockTR64Server().start()
+        try:
+            items = u"".join([u"<Item><Index>" + str(index + 1) + "</Index><IPAddress>192.168.178." + str(index) +
+                              "</IPAddress><AddressSource>DHCP</AddressSource><LeaseTimeRemaining>0"
+                              "</LeaseTimeRemaining><MACAddress>38:C9:86:26:7E:" + "%02X" % index +
+                              "</MACAddress><InterfaceType>Ethernet</InterfaceType><Active>1</Active>"
+                              "<HostName>K\u00fcche" + str(index) + "</HostName><X_AVM-DE_Port>1</X_AVM-DE_Port>"
+                              "</Item>" for index in range(250)])
+            server.setDocument("/devicehostlist.lua?sid=1", '<?xml version="1.0" encoding="UTF-8"?><List>' +
+                               items + '</List>')
+            server.setResults("X_AVM-DE_GetHostListPath", {"NewX_AVM-DE_HostListPath": "/devicehostlist.lua?sid=1"})
+
+            with Lan("127.0.0.1", port=server.port) as box:
+                box.setupTR64Device("fritz.box")
+                hosts = box.getAllHosts()
+
+            self.assertEqual(len(hosts), 250)
+            self.assertEqual(hosts[249].ipaddress, "192.168.178.249")
+            self.assertEqual(hosts[249].hostname, u"K\u00fcche249")
+            self.assertTrue(hosts[249].active)
+            self.assertEqual(hosts[249].raw["NewX_AVM-DE_Port"], "1")
+            self.assertEqual(server.requests, 2)
+        finally:
+            server.stop()
+
+    def test_AllHostsBrokenHostList(self):
+        server = MockTR64Server().start()
+        try:
+            # the device supports the action but the list can not be downloaded
+            server.setResults("X_AVM-DE_GetHostListPath", {"NewX_AVM-DE_HostListPath": "/devicehostlist.lua?sid=1"})
+
+            with Lan("127.0.0.1", port=server.port) as box:
+                box.setupTR64Device("fritz.box")
+                with self.assertRaises(ValueError):
+                    box.getAllHosts()
+
+            # no fallback to the single hosts
+            self.assertEqual(server.requests, 2)
+        finally:
+            server.stop()
+
+    def test_AllHostsWithoutHostList(self):
+        server = MockTR64Server().start()
+        try:
+            def hostEntry(arguments, path):
+                index = int(arguments["NewIndex"])
+                if index >= 30:
+                    raise KeyError(index)
+
+                return {"NewIPAddress": "192.168.178." + str(index), "NewAddressSource": "DHCP",
+                        "NewLeaseTimeRemaining": 0, "NewMACAddress": "38:C9:86:26:7E:%02X" % index,
+                        "NewInterfaceType": "Ethernet", "NewActive": 1, "NewHostName": "host" + str(index)}
+
+            server.removeAction("X_AVM-DE_GetHostListPath")
+            server.setResults("GetHostNumberOfEntries", {"NewHostNumberOfEntries": 30})
+            server.setResults("GetGenericHostEntry", hostEntry)
+
+            with Lan("127.0.0.1", port=server.port) as box:
+                box.setupTR64Device("fritz.box")
+                hosts = box.getAllHosts(concurrency=4)
+
+            self.assertEqual([host.ipaddress for host in hosts], ["192.168.178." + str(index) for index in range(30)])
+            self.assertEqual(server.requests, 32)
+        finally:
+            server.stop()
+
+    def test_AllHostsShrinkingTable(self):
+        server = MockTR64Server().start()
+        try:
+            table = {"amount": 30}
+
+            def amountOfHosts(arguments, path):
+                amount = table["amount"]
+
+                # the table shrinks after the scan has been started
+                table["amount"] = 20
+                return {"NewHostNumberOfEntries": amount}
+
+            def hostEntry(arguments, path):
+                index = int(arguments["NewIndex"])
+                if index >= table["amount"] or index == table.get("broken"):
+                    raise KeyError(index)
+
+                return {"NewIPAddress": "192.168.178." + str(index), "NewAddressSource": "DHCP",
+                        "NewLeaseTimeRemaining": 0, "NewMACAddress": "38:C9:86:26:7E:%02X" % index,
+                        "NewInterfaceType": "Ethernet", "NewActive": 1, "NewHostName": "host" + str(index)}
+
+            server.removeAction("X_AVM-DE_GetHostListPath")
+            server.setResults("GetHostNumberOfEntries", amountOfHosts)
+            server.setResults("GetGenericHostEntry", hostEntry)
+
+            with Lan("127.0.0.1", port=server.port) as box:
+                box.setupTR64Device("fritz.box")
+
+                hosts = box.getAllHosts(concurrency=4)
+                self.assertEqual([host.ipaddress for host in hosts],
+                                 ["192.168.178." + str(index) for index in range(20)])
+                self.assertEqual(server.requests, 1 + 1 + 30 + 1)
+
+                # a host which can not be loaded while the table has not shrunk
+                table["broken"] = 5
+                with self.assertRaises(ValueError):
+                    box.getAllHosts(concurrency=4)
+        finally:
+            server.stop()
+
+    def test_IterHosts(self):
+        server = MockTR64Server().start()
+        try:
+            table = {"amount": 30}
+
+            def amountOfHosts(arguments, path):
+                amount = table["amount"]
+
+                # the table shrinks after the scan has been started
+                table["amount"] = 20
+                return {"NewHostNumberOfEntries": amount}
+
+            def hostEntry(arguments, path):
+                index = int(arguments["NewIndex"])
+                if index >= table["amount"] or index == table.get("broken"):
+                    raise KeyError(index)
+
+                return {"NewIPAddress": "192.168.178." + str(index), "NewAddressSource": "DHCP",
+                        "NewLeaseTimeRemaining": 0, "NewMACAddress": "38:C9:86:26:7E:%02X" % index,
+                        "NewInterfaceType": "Ethernet", "NewActive": 1, "NewHostName": "host" + str(index)}
+
+            server.setResults("GetHostNumberOfEntries", amountOfHosts)
+            server.setResults("GetGenericHostEntry", hostEntry)
+
+            with Lan("127.0.0.1", port=server.port) as box:
+                box.setupTR64Device("fritz.box")
+
+                hosts = list(box.iterHosts(concurrency=4))
+                self.assertEqual(sorted(host.ipaddress for host in hosts),
+                                 sorted("192.168.178." + str(index) for index in range(20)))
+
+                # stop early
+                requests = server.requests
+                iterator = box.iterHosts(concurrency=4)
+                next(iterator)
+                iterator.close()
+                self.assertTrue(server.requests - requests <= 1 + 4 + 4)
+
+                # a host which can not be loaded while the table has not shrunk
+                table["broken"] = 5
+                with self.assertRaises(ValueError):
+                    list(box.iterHosts(concurrency=4))
+        finally:
+            server.stop()
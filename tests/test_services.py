@@ -0,0 +1,83 @@
+import asyncio
+import unittest
+
+from mockserver import MockTR64Server
+from simpletr64.asyncdevicetr64 import AsyncDeviceTR64
+from simpletr64.devicetr64 import DeviceTR64
+
+
+class TestServices(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockTR64Server().loadFixtures().start()
+        self.server.setResults("X_AVM-DE_GetChangeCounter", {"NewX_AVM-DE_ChangeCounter": 17})
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_services(self):
+        with DeviceTR64("127.0.0.1", port=self.server.port) as box:
+            box.loadDeviceDefinitions(self.server.url("/tr64desc.xml"))
+            services = box.services
+
+            self.assertEqual(services.Hosts.serviceType, "urn:dslforum-org:service:Hosts:1")
+            self.assertEqual(services.Hosts.controlURL, "/upnp/control/hosts")
+            self.assertTrue(services.Hosts is services.Hosts)
+            self.assertEqual(services.WLANConfiguration.serviceType,
+                             "urn:dslforum-org:service:WLANConfiguration:1")
+            self.assertEqual(services.WLANConfiguration2.serviceType,
+                             "urn:dslforum-org:service:WLANConfiguration:2")
+            self.assertEqual(services["urn:dslforum-org:service:Time:1"].serviceType,
+                             "urn:dslforum-org:service:Time:1")
+            self.assertTrue("Hosts" in dir(services))
+
+            with self.assertRaises(AttributeError):
+                services.Unknown
+
+            # no SCPD loaded
+            with self.assertRaises(AttributeError):
+                services.Hosts.GetGenericHostEntry
+
+    def test_actions(self):
+        with DeviceTR64("127.0.0.1", port=self.server.port) as box:
+            box.loadDeviceDefinitions(self.server.url("/tr64desc.xml"))
+            box.loadSCPD()
+            hosts = box.services.Hosts
+
+            self.assertTrue("X_AVM-DE_GetHostListPath" in hosts.actions)
+            self.assertTrue("X_AVM_DE_GetHostListPath" in dir(hosts))
+            self.assertEqual(hosts.GetGenericHostEntry.signature.inArguments, [("NewIndex", "ui2")])
+
+            requests = self.server.requests
+            self.assertEqual(hosts.GetGenericHostEntry(NewIndex=3)["NewIndex"], "3")
+            self.assertEqual(hosts.X_AVM_DE_GetChangeCounter()["NewX_AVM-DE_ChangeCounter"], "17")
+            self.assertEqual(hosts["X_AVM-DE_GetChangeCounter"]()["NewX_AVM-DE_ChangeCounter"], "17")
+            self.assertEqual(self.server.requests, requests + 3)
+
+            with self.assertRaises(ValueError):
+                hosts.GetGenericHostEntry(NewIndex=-1)
+            self.assertEqual(self.server.requests, requests + 3)
+
+            with self.assertRaises(AttributeError):
+                hosts.GetUnknown
+
+            box.typedResults = True
+            self.assertEqual(box.services.Hosts.X_AVM_DE_GetChangeCounter()["NewX_AVM-DE_ChangeCounter"], 17)
+
+    def test_lazySCPD(self):
+        with DeviceTR64("127.0.0.1", port=self.server.port) as box:
+            box.lazySCPD = True
+            box.loadDeviceDefinitions(self.server.url("/tr64desc.xml"))
+
+            self.assertEqual(box.services.Hosts.GetGenericHostEntry(NewIndex=1)["NewIndex"], "1")
+            self.assertEqual(len(box.deviceSCPD), 1)
+            self.assertEqual(self.server.requests, 3)
+
+    def test_async(self):
+        async def run():
+            async with AsyncDeviceTR64("127.0.0.1", port=self.server.port) as box:
+                await box.loadDeviceDefinitions(self.server.url("/tr64desc.xml"))
+                await box.loadSCPD()
+                return await box.services.Hosts.GetGenericHostEntry(NewIndex=5)
+
+        self.assertEqual(asyncio.run(run())["NewIndex"], "5")
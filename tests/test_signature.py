@@ -0,0 +1,49 @@
+import datetime
+import unittest
+
+from simpletr64.signature import ActionSignature
+
+
+class TestActionSignature(unittest.TestCase):
+
+    def setUp(self):
+        self.signature = ActionSignature.createFromSCPD("GetGenericHostEntry", {
+            "inParameter": {"NewIndex": {"variable": "HostNumberOfEntries", "dataType": "ui2"}},
+            "outParameter": {"NewIPAddress": {"variable": "IPAddress", "dataType": "string"},
+                             "NewLeaseTimeRemaining": {"variable": "LeaseTimeRemaining", "dataType": "i4"},
+                             "NewActive": {"variable": "Active", "dataType": "boolean"},
+                             "NewLastChange": {"variable": "LastChange", "dataType": "dateTime"}}})
+
+    def test_arguments(self):
+        self.assertEqual(self.signature.name, "GetGenericHostEntry")
+        self.assertEqual(self.signature.inArguments, [("NewIndex", "ui2")])
+        self.assertEqual([argument[0] for argument in self.signature.outArguments],
+                         ["NewIPAddress", "NewLeaseTimeRemaining", "NewActive", "NewLastChange"])
+
+    def test_validate(self):
+        self.signature.validate({"NewIndex": 3})
+        self.signature.validate({"NewIndex": "65535"})
+
+        for arguments in [{}, {"NewIndex": 3, "NewOther": 1}, {"NewIndex": -1}, {"NewIndex": 65536},
+                          {"NewIndex": "three"}, {"NewIndex": 1.5}]:
+            with self.assertRaises(ValueError):
+                self.signature.validate(arguments)
+
+    def test_convertResults(self):
+        results = self.signature.convertResults({"NewIPAddress": "192.168.178.20", "NewLeaseTimeRemaining": "-1",
+                                                 "NewActive": "1", "NewLastChange": "2016-01-24T12:30:05+01:00"})
+
+        self.assertEqual(results["NewIPAddress"], "192.168.178.20")
+        self.assertEqual(results["NewLeaseTimeRemaining"], -1)
+        self.assertTrue(results["NewActive"] is True)
+        self.assertEqual(results["NewLastChange"].replace(tzinfo=None), datetime.datetime(2016, 1, 24, 12, 30, 5))
+        self.assertEqual(results["NewLastChange"].utcoffset(), datetime.timedelta(hours=1))
+
+        results = self.signature.convertResults({"NewLeaseTimeRemaining": "", "NewActive": "false",
+                                                 "NewLastChange": "0001-01-01T00:00:00"})
+        self.assertEqual(results["NewLeaseTimeRemaining"], None)
+        self.assertTrue(results["NewActive"] is False)
+        self.assertEqual(results["NewLastChange"], datetime.datetime(1, 1, 1))
+
+        with self.assertRaises(ValueError):
+            self.signature.convertResults({"NewActive": "maybe"})
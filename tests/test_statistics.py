@@ -0,0 +1,121 @@
+import unittest
+
+from simpletr64.statistics import CounterTracker, RingBuffer, numpy
+
+
+class TestCounterTracker(unittest.TestCase):
+
+    def test_rate(self):
+        tracker = CounterTracker()
+
+        self.assertEqual(tracker.update(1000, timestamp=10), None)
+        self.assertEqual(tracker.update(6000, timestamp=15), 1000.0)
+        self.assertEqual(tracker.delta, 5000)
+        self.assertEqual(tracker.update(6000, timestamp=15), None)
+        self.assertEqual(tracker.delta, 0)
+        self.assertEqual(tracker.total, 5000)
+        self.assertEqual((tracker.value, tracker.timestamp), (6000, 15))
+
+        with self.assertRaises(AttributeError):
+            tracker.other = 1
+
+    def test_wrap(self):
+        tracker = CounterTracker(width=32)
+
+        tracker.update(2 ** 32 - 1000, timestamp=0)
+        self.assertEqual(tracker.update(1000, timestamp=2), 1000.0)
+        self.assertEqual(tracker.delta, 2000)
+        self.assertEqual((tracker.wraps, tracker.resets), (1, 0))
+
+        # a wrap around which is faster than the maximum rate has to be a reset
+        tracker = CounterTracker(width=32, maximumRate=1000)
+        tracker.update(2 ** 32 - 1000, timestamp=0)
+        self.assertEqual(tracker.update(1000, timestamp=1), None)
+        self.assertEqual((tracker.wraps, tracker.resets), (0, 1))
+        self.assertEqual(tracker.update(3000, timestamp=2), 2000.0)
+        self.assertEqual(tracker.total, 3000)
+
+    def test_reboot(self):
+        tracker = CounterTracker(width=32)
+
+        tracker.update(5000, timestamp=0, uptime=100)
+        self.assertEqual(tracker.update(4000, timestamp=10, uptime=5), None)
+        self.assertEqual((tracker.wraps, tracker.resets), (0, 1))
+
+        # the uptime proves that there was no reboot
+        self.assertEqual(tracker.update(1000, timestamp=20, uptime=15), float(2 ** 32 - 3000) / 10)
+        self.assertEqual((tracker.wraps, tracker.resets), (1, 1))
+
+        tracker.reset()
+        self.assertEqual(tracker.update(10, timestamp=30), None)
+        self.assertEqual(tracker.rate, None)
+
+        with self.assertRaises(ValueError):
+            CounterTracker(width=0)
+
+
+class TestRingBuffer(unittest.TestCase):
+
+    def fill(self, buffer):
+        for index in range(15):
+            buffer.append(index * 2, timestamp=100 + index)
+
+    def test_append(self):
+        buffer = RingBuffer(10, useNumPy=False)
+        self.assertEqual((len(buffer), buffer.minimum(), buffer.average(), buffer.percentile(50)),
+                         (0, None, None, None))
+
+        self.fill(buffer)
+
+        self.assertEqual(len(buffer), 10)
+        self.assertEqual(list(buffer.values()), [float(index * 2) for index in range(5, 15)])
+        self.assertEqual(list(buffer.timestamps(since=112)), [112.0, 113.0, 114.0])
+        self.assertEqual(list(buffer.values(since=200)), [])
+
+        segments = buffer.segments()
+        self.assertEqual(len(segments), 2)
+        self.assertEqual([list(values) for timestamps, values in segments],
+                         [[10.0, 12.0, 14.0, 16.0, 18.0], [20.0, 22.0, 24.0, 26.0, 28.0]])
+
+        buffer.clear()
+        self.assertEqual(list(buffer.values()), [])
+
+        with self.assertRaises(ValueError):
+            RingBuffer(0)
+
+    def test_aggregations(self):
+        buffer = RingBuffer(10, typecode="l", useNumPy=False)
+        self.fill(buffer)
+
+        self.assertEqual((buffer.minimum(), buffer.maximum()), (10, 28))
+        self.assertEqual(buffer.average(), 19.0)
+        self.assertEqual(buffer.average(since=113), 27.0)
+        self.assertEqual(buffer.percentile(0), 10.0)
+        self.assertEqual(buffer.percentile(50), 19.0)
+        self.assertEqual(buffer.percentile(95), 27.1)
+        self.assertEqual(buffer.percentile(100, since=110), 28.0)
+
+        with self.assertRaises(ValueError):
+            buffer.percentile(101)
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numPy(self):
+        buffer = RingBuffer(10)
+        reference = RingBuffer(10, useNumPy=False)
+        self.fill(buffer)
+        self.fill(reference)
+
+        self.assertTrue(buffer.useNumPy)
+        self.assertEqual(list(buffer.values()), list(reference.values()))
+        for since in (None, 108, 113):
+            self.assertEqual(buffer.minimum(since), reference.minimum(since))
+            self.assertEqual(buffer.maximum(since), reference.maximum(since))
+            self.assertAlmostEqual(buffer.average(since), reference.average(since))
+            self.assertAlmostEqual(buffer.percentile(90, since), reference.percentile(90, since))
+
+    @unittest.skipIf(numpy is not None, "NumPy is installed")
+    def test_withoutNumPy(self):
+        self.assertFalse(RingBuffer(10).useNumPy)
+
+        with self.assertRaises(ValueError):
+            RingBuffer(10, useNumPy=True)
@@ -1,7 +1,8 @@
 import unittest
 
 import defaults
-from simpletr64.actions.wan import Wan
+from mockserver import MockTR64Server
+from simpletr64.actions.wan import Wan, WanStatistic
 from simpletr64.devicetr64 import DeviceTR64
 
 
@@ -119,3 +120,87 @@ class TestWan(unittest.TestCase):
         self.assertTrue(connectionInfo.macAddress)
         self.assertTrue(connectionInfo.dnsEnabled or not connectionInfo.dnsEnabled)
         self.assertTrue(len(connectionInfo.raw.keys()) > 0)
+
+    def test_StatisticFromAddonInfos(self):
+        server = MockTR64Server().start()
+        try:
+            server.setResults("GetAddonInfos", {"NewByteSendRate": 1200, "NewByteReceiveRate": 54000,
+                                                "NewPacketSendRate": 10, "NewPacketReceiveRate": 40,
+                                                "NewTotalBytesSent": 4294967295, "NewTotalBytesReceived": 17,
+                                                "NewX_AVM_DE_TotalBytesSent64": 4294967295,
+                                                "NewX_AVM_DE_TotalBytesReceived64": 21474836497})
+
+            with Wan("127.0.0.1", port=server.port) as box:
+                box.setupTR64Device("fritz.box")
+                statistic = box.getStatistic()
+
+            self.assertEqual(statistic.bytesSent, 4294967295)
+            self.assertEqual(statistic.bytesReceived, 21474836497)
+            self.assertEqual(statistic.byteSendRate, 1200)
+            self.assertEqual(statistic.byteReceiveRate, 54000)
+            self.assertEqual(statistic.packetSendRate, 10)
+            self.assertEqual(statistic.packetReceiveRate, 40)
+            self.assertTrue(statistic.timestamp > 0)
+            self.assertEqual(server.requests, 1)
+        finally:
+            server.stop()
+
+    def test_StatisticWithoutAddonInfos(self):
+        server = MockTR64Server().start()
+        try:
+            server.removeAction("GetAddonInfos")
+            server.setResults("GetTotalBytesSent", {"NewTotalBytesSent": 1000})
+            server.setResults("GetTotalBytesReceived", {"NewTotalBytesReceived": 2000})
+
+            with Wan("127.0.0.1", port=server.port) as box:
+                box.setupTR64Device("fritz.box")
+                statistic = box.getStatistic()
+
+                # the device does not support GetAddonInfos, the next poll does not ask again
+                self.assertEqual(box.getStatistic().bytesSent, 1000)
+
+            self.assertEqual(statistic.bytesSent, 1000)
+            self.assertEqual(statistic.bytesReceived, 2000)
+            self.assertEqual(statistic.byteSendRate, None)
+            self.assertEqual(server.requests, 5)
+
+            # the loaded SCPD has no GetAddonInfos, the action does not get tried
+            server.loadFixtures()
+            with Wan("127.0.0.1", port=server.port) as box:
+                box.loadDeviceDefinitions(server.url("/tr64desc.xml"))
+                box.loadSCPD("urn:dslforum-org:service:WANCommonInterfaceConfig:1")
+                requests = server.requests
+
+                self.assertEqual(box.getStatistic().bytesReceived, 2000)
+                self.assertEqual(server.requests, requests + 2)
+        finally:
+            server.stop()
+
+    def test_StatisticFailure(self):
+        server = MockTR64Server().start()
+        try:
+            def addonInfos(arguments, path):
+                raise KeyError(path)
+
+            # only an unsupported action falls back to the byte counters
+            server.setResults("GetAddonInfos", addonInfos)
+
+            with Wan("127.0.0.1", port=server.port) as box:
+                box.setupTR64Device("fritz.box")
+
+                with self.assertRaises(ValueError):
+                    box.getStatistic()
+
+            self.assertEqual(server.requests, 1)
+        finally:
+            server.stop()
+
+    def test_StatisticZeroValues(self):
+        # typed results of 0 are valid values, empty ones are missing
+        statistic = WanStatistic({"NewX_AVM_DE_TotalBytesSent64": 0, "NewTotalBytesSent": 17,
+                                  "NewX_AVM_DE_TotalBytesReceived64": "", "NewTotalBytesReceived": "21",
+                                  "NewByteSendRate": 0, "NewByteReceiveRate": "0", "NewPacketSendRate": ""})
+
+        self.assertEqual((statistic.bytesSent, statistic.bytesReceived), (0, 21))
+        self.assertEqual((statistic.byteSendRate, statistic.byteReceiveRate), (0, 0))
+        self.assertEqual((statistic.packetSendRate, statistic.packetReceiveRate), (None, None))
@@ -1,6 +1,9 @@
+import threading
+import time
 import unittest
 
 import defaults
+from mockserver import MockTR64Server
 from simpletr64.actions.wifi import Wifi
 from simpletr64.devicetr64 import DeviceTR64
 
@@ -79,3 +82,113 @@ class TestWifi(unittest.TestCase):
         self.assertEqual(deviceInfo.ipAddress, deviceInfo2.ipAddress)
         self.assertEqual(deviceInfo.macAddress, deviceInfo2.macAddress)
         self.assertEqual(deviceInfo.authenticated, deviceInfo2.authenticated)
+
+    def test_AllAssociatedDevicesFromDeviceList(self):
+        server = MockTR64Server().start()
+        try:
+            for interfaceId in range(1, 4):
+                items = "".join(["<Item><AssociatedDeviceIndex>" + str(index) + "</AssociatedDeviceIndex>"
+                                 "<AssociatedDeviceMACAddress>38:c9:86:26:" + "%02x:%02x" % (interfaceId, index) +
+                                 "</AssociatedDeviceMACAddress><AssociatedDeviceIPAddress>192.168." +
+                                 str(interfaceId) + "." + str(index) + "</AssociatedDeviceIPAddress>"
+                                 "<AssociatedDeviceAuthState>1</AssociatedDeviceAuthState>"
+                                 "<X_AVM-DE_SignalStrength>70</X_AVM-DE_SignalStrength></Item>"
+                                 for index in range(10 * interfaceId)])
+                server.setDocument("/wlandevicelist" + str(interfaceId) + ".lua?sid=1",
+                                   "<List><TotalAssociations>" + str(10 * interfaceId) + "</TotalAssociations>" +
+                                   items + "</List>")
+
+            server.setResults("X_AVM-DE_GetWLANDeviceListPath", lambda arguments, path: {
+                "NewX_AVM-DE_WLANDeviceListPath": "/wlandevicelist" + path[-1] + ".lua?sid=1"})
+
+            with Wifi("127.0.0.1", port=server.port) as box:
+                box.setupTR64Device("fritz.box")
+                self.assertEqual(box.getWifiInterfaceIds(), [1, 2, 3])
+
+                devices = box.getAllAssociatedDevices()
+
+            self.assertEqual(len(devices), 60)
+            device = devices["38:C9:86:26:03:1D"]
+            self.assertEqual(device.ipAddress, "192.168.3.29")
+            self.assertEqual(device.wifiInterfaceId, 3)
+            self.assertEqual(device.signalStrength, 70)
+            self.assertTrue(device.authenticated)
+            self.assertEqual(server.requests, 6)
+
+            # the device lists are downloaded at the same time
+            server.latency = 0.1
+            with Wifi("127.0.0.1", port=server.port) as box:
+                box.setupTR64Device("fritz.box")
+
+                start = time.time()
+                self.assertEqual(len(box.getAllAssociatedDevices()), 60)
+                self.assertTrue(time.time() - start < 0.35)
+        finally:
+            server.stop()
+
+    def test_AllAssociatedDevicesWithoutDeviceList(self):
+        server = MockTR64Server().start()
+        try:
+            associations = {"/upnp/control/wlanconfig1": 5, "/upnp/control/wlanconfig2": 0,
+                            "/upnp/control/wlanconfig3": 3}
+            running = {"now": 0, "most": 0}
+            lock = threading.Lock()
+
+            def totalAssociations(arguments, path):
+                amount = associations[path]
+
+                # a client disconnects after the first request
+                associations["/upnp/control/wlanconfig3"] = 2
+                return {"NewTotalAssociations": amount}
+
+            def deviceInfo(arguments, path):
+                index = int(arguments["NewAssociatedDeviceIndex"])
+                if index >= associations[path]:
+                    raise KeyError(index)
+
+                with lock:
+                    running["now"] += 1
+                    running["most"] = max(running["most"], running["now"])
+
+                time.sleep(0.05)
+
+                with lock:
+                    running["now"] -= 1
+
+                return {"NewAssociatedDeviceMACAddress": "38:C9:86:26:%s:%02X" % (path[-1], index),
+                        "NewAssociatedDeviceIPAddress": "192.168.178." + str(index),
+                        "NewAssociatedDeviceAuthState": 1}
+
+            server.removeAction("X_AVM-DE_GetWLANDeviceListPath")
+            server.setResults("GetTotalAssociations", totalAssociations)
+            server.setResults("GetGenericAssociatedDeviceInfo", deviceInfo)
+
+            with Wifi("127.0.0.1", port=server.port) as box:
+                box.setupTR64Device("fritz.box")
+                devices = box.getAllAssociatedDevices(concurrency=2)
+
+            self.assertEqual(sorted(devices.keys()), ["38:C9:86:26:1:0%d" % index for index in range(5)] +
+                             ["38:C9:86:26:3:00", "38:C9:86:26:3:01"])
+            self.assertEqual(devices["38:C9:86:26:1:04"].wifiInterfaceId, 1)
+
+            # one budget of concurrent actions for all interfaces
+            self.assertTrue(running["most"] <= 2)
+        finally:
+            server.stop()
+
+    def test_AllAssociatedDevicesBrokenDeviceList(self):
+        server = MockTR64Server().start()
+        try:
+            # the device supports the action but the list can not be downloaded
+            server.setResults("X_AVM-DE_GetWLANDeviceListPath", lambda arguments, path: {
+                "NewX_AVM-DE_WLANDeviceListPath": "/wlandevicelist" + path[-1] + ".lua?sid=1"})
+
+            with Wifi("127.0.0.1", port=server.port) as box:
+                box.setupTR64Device("fritz.box")
+                with self.assertRaises(ValueError):
+                    box.getAllAssociatedDevices()
+
+            # no fallback to the single clients, the lists are requested at the same time
+            self.assertEqual(server.requests, 6)
+        finally:
+            server.stop()
@@ -0,0 +1,83 @@
+import os
+import unittest
+
+from simpletr64.devicetr64 import DeviceTR64
+from simpletr64.xmlparser import XMLBackend, lxmlTree
+
+
+def loadFixture(name):
+    with open(os.path.join(os.path.dirname(__file__), "data", name), "rb") as f:
+        return f.read()
+
+
+class TestXMLBackend(unittest.TestCase):
+
+    def tearDown(self):
+        XMLBackend.setBackend()
+
+    def backends(self):
+        backends = ["etree"]
+        if lxmlTree is not None:
+            backends.append("lxml")
+
+        for name in backends:
+            XMLBackend.setBackend(name)
+            yield name
+
+    def test_default(self):
+        if lxmlTree is None:
+            self.assertEqual(XMLBackend.getBackend().name, "etree")
+        else:
+            self.assertEqual(XMLBackend.getBackend().name, "lxml")
+
+        self.assertEqual(XMLBackend.getSOAPBackend().name, "etree")
+
+        XMLBackend.setBackend("lxml" if lxmlTree is not None else "etree")
+        self.assertEqual(XMLBackend.getSOAPBackend().name, XMLBackend.getBackend().name)
+
+        self.assertRaises(TypeError, XMLBackend)
+        self.assertRaises(ValueError, XMLBackend.setBackend, "unknown")
+
+    def test_parse(self):
+        data = loadFixture("soap_GetGenericHostEntry.xml")
+        chunks = [data[index:index + 32] for index in range(0, len(data), 32)]
+
+        for name in self.backends():
+            root = XMLBackend.getBackend().parse(data)
+            self.assertEqual(len(root[0][0]), 7, name)
+
+            root = XMLBackend.getBackend().parse(iter(chunks))
+            self.assertEqual(len(root[0][0]), 7, name)
+
+            root = XMLBackend.getBackend().parse(data.decode("utf-8"))
+            self.assertEqual(len(root[0][0]), 7, name)
+
+            events = list(XMLBackend.getBackend().iterparse(iter(chunks)))
+            self.assertEqual(len(events), 2 * 10, name)
+
+            self.assertRaises(XMLBackend.ParseError, XMLBackend.getBackend().parse, data[:100])
+
+    def test_comments(self):
+        data = b'<?xml version="1.0"?><!-- comment --><root><!-- comment --><item>1</item></root>'
+
+        for name in self.backends():
+            root = XMLBackend.getBackend().parse(data)
+            self.assertEqual([child.tag for child in root], ["item"], name)
+
+    def test_deviceDefinitions(self):
+        results = []
+
+        for name in self.backends():
+            for fixture in ["tr64desc.xml", "dlna_desc.xml"]:
+                box = DeviceTR64("127.0.0.1")
+                box._loadDeviceDefinitions("http://127.0.0.1:49000/" + fixture, loadFixture(fixture))
+                box._processSCPD("urn:dslforum-org:service:Hosts:1", "/hostsSCPD.xml", loadFixture("hostsSCPD.xml"))
+
+                results.append((name, fixture, box.deviceServiceDefinitions, box.deviceInformations,
+                                box.deviceInformationUnknownKeys, box.deviceSCPD))
+
+        # all backends have to return the same
+        for result in results:
+            for other in results:
+                if result[1] == other[1]:
+                    self.assertEqual(result[2:], other[2:])